@@ -1,29 +1,70 @@
 import os
 import sys
 import cv2
-import base64
-import requests
-import sympy as sp
-from sympy.parsing.latex import parse_latex
 from PyQt5.QtWidgets import (QApplication, QLabel, QPushButton, QVBoxLayout,
                              QWidget, QTextEdit, QHBoxLayout, QStatusBar,
                              QMessageBox, QMainWindow, QFileDialog)
-from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtCore import QTimer, Qt
 
+# Ortak yardımcı modüller pppp/pppp altında duruyor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "pppp", "pppp"))
+from autocapture import AutoCapture
+from camera import CameraCapture
+from latex_normalize import clean_mathpix_latex
+from mathpix_client import MathpixClient
+from ocr_backends import create_backend
+from ocr_cache import OCRCache
+from preprocess import DEFAULT_SPEC, Preprocessor, timed_upload
+from preview import VideoPreview
+from profiling import CaptureProfiler
+from regions import find_equation_regions, solve_regions
+from solver_cache import SolverCache
+from solver_pool import SolverPool
+import startup
+from tracing import span, tracer
+from workers import start_worker
+
 
 class MathOCRApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("MathOCR with Mathpix + SymPy")
         self.setGeometry(100, 100, 1000, 800)
+        # Mathpix + SymPy işlemleri arka planda çalışır; MATHOCR_SYNC=1 eski davranışa döner
+        self.background_processing = os.getenv("MATHOCR_SYNC") != "1"
+        # Karede birden çok denklem varsa her biri ayrı gönderilir; MATHOCR_REGIONS=0 kapatır
+        self.detect_regions = os.getenv("MATHOCR_REGIONS", "1") != "0"
+        # MATHOCR_PROFILE=<klasör>: her Mathpix isteği için bir cProfile .prof dosyası; MATHOCR_PROFILE_FRAMES=1 kamera karelerini de ekler
+        self.profiler = CaptureProfiler(os.getenv("MATHOCR_PROFILE"), frames=os.getenv("MATHOCR_PROFILE_FRAMES") == "1")
+        self.active_workers = set()
+
+        # Yükleme öncesi ön işleme (MATHOCR_PREPROCESS="off" ham PNG gönderir)
+        self.preprocessor = Preprocessor.from_spec(os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+        # Tek, kalıcı Mathpix istemcisi (bağlantı havuzu + keep-alive)
+        app_id = os.getenv("MATHPIX_APP_ID")
+        app_key = os.getenv("MATHPIX_APP_KEY")
+        # MATHOCR_OCR_BACKEND=record yanıtları kasete (MATHOCR_CASSETTE) yazar, replay ağsız oradan okur
+        backend = os.getenv("MATHOCR_OCR_BACKEND", "live")
+        self.mathpix = create_backend(backend, lambda: MathpixClient(app_id, app_key, cache=OCRCache(
+            phash_distance=int(os.getenv("MATHOCR_PHASH_DISTANCE", "0"))),
+            upload_mode=os.getenv("MATHOCR_UPLOAD_MODE", "multipart")),
+            os.getenv("MATHOCR_CASSETTE")) if (app_id and app_key) or backend == "replay" else None
+        if self.mathpix is not None:
+            self.mathpix.warm_up()
+
+        # SymPy değerlendirmesi öldürülebilir bir alt süreçte çalışır (MATHOCR_SOLVE_TIMEOUT sn);
+        # belirli integral ve limitlerde mpmath ile yarışır (MATHOCR_SOLVE_MODE, MATHOCR_EXACT_BUDGET sn)
+        self.solver = SolverPool(workers=int(os.getenv("MATHOCR_SOLVE_WORKERS", "4")),
+                                 timeout=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")), cache=SolverCache(),
+                                 mode=os.getenv("MATHOCR_SOLVE_MODE", "race"),
+                                 exact_budget=float(os.getenv("MATHOCR_EXACT_BUDGET", "1")))
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
 
         # Görüntü alanı
-        self.video_label = QLabel(self)
+        self.video_label = VideoPreview(self)
         self.video_label.setMinimumSize(800, 600)
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("background-color: #22252B; border-radius: 10px;")
@@ -40,6 +81,12 @@ class MathOCRApp(QMainWindow):
         self.capture_button.clicked.connect(self.capture_and_process)
         button_layout.addWidget(self.capture_button)
 
+        self.auto_button = QPushButton("Otomatik Yakalama (A)")
+        self.auto_button.setCheckable(True)
+        self.auto_button.setShortcut(Qt.Key_A)
+        self.auto_button.toggled.connect(self.toggle_auto_capture)
+        button_layout.addWidget(self.auto_button)
+
         self.clear_button = QPushButton("Temizle")
         self.clear_button.clicked.connect(self.clear_results)
         button_layout.addWidget(self.clear_button)
@@ -63,92 +110,169 @@ class MathOCRApp(QMainWindow):
         self.statusBar.showMessage("Hazır")
 
         # Kamera başlat
-        self.kamera = cv2.VideoCapture(0)
+        self.kamera = CameraCapture(0).start()
+        self.auto_capture = AutoCapture()
+        self.shown_frame = -1
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.timer.timeout.connect(self.profiler.wrap_frames(self.update_frame))
         self.timer.start(30)
 
+        # Kamera istatistikleri durum çubuğunun sağında, saniyede bir
+        self.camera_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.camera_stats)
+        # Aşama gecikmeleri (p50/p95/p99); MATHOCR_METRICS=dosya.prom|.json her saniye yeniden yazılır
+        self.trace_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.trace_stats)
+        self.metrics_path = os.getenv("MATHOCR_METRICS")
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_camera_stats)
+        self.stats_timer.start(1000)
+
     def update_frame(self):
-        ret, frame = self.kamera.read()
-        if ret:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image = QImage(rgb_frame, rgb_frame.shape[1], rgb_frame.shape[0], rgb_frame.strides[0], QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(image).scaled(
-                self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        # Yakalama iş parçacığındaki en yeni kare; yeni kare yoksa çizim yapılmaz
+        captured = self.kamera.latest(newer_than=self.shown_frame)
+        if captured is not None:
+            with span('camera.tick'):
+                self.video_label.show_frame(captured.image)
+                self.shown_frame = captured.index
+                self.kamera.shown(captured)
+                startup.mark('first_frame')
+                # Önceki işlem sürerken kareler değerlendirilmez; bitince yeniden N sabit kare beklenir
+                if self.auto_button.isChecked() and not self.active_workers and self.auto_capture.update(captured.image):
+                    self.statusBar.showMessage("Net ve sabit kare yakalandı, işleniyor...")
+                    self.process_with_mathpix(captured.image)
+
+    def toggle_auto_capture(self, checked):
+        self.auto_capture.reset()
+        self.statusBar.showMessage("Otomatik yakalama açık" if checked else "Otomatik yakalama kapalı")
+
+    def update_camera_stats(self):
+        text = self.kamera.stats_text()
+        if self.auto_button.isChecked():
+            text += " | " + self.auto_capture.status_text()
+        self.camera_stats.setText(text)
+        self.trace_stats.setText(tracer.status_text())
+        self.trace_stats.setToolTip(tracer.table_text())
+        if self.metrics_path:
+            tracer.dump(self.metrics_path)
 
     def process_with_mathpix(self, frame):
+        if self.mathpix is None:
+            QMessageBox.warning(self, "Eksik API Bilgisi", "MATHPIX_APP_ID / MATHPIX_APP_KEY .env içinde tanımlı değil.")
+            return
+
+        if not self.background_processing:
+            try:
+                self.show_pipeline_result(self.solve_frame(frame, progress=self.statusBar.showMessage))
+            except Exception as e:
+                self.show_pipeline_error(str(e))
+            return
+
+        if self.active_workers:
+            self.statusBar.showMessage("Önceki işlem devam ediyor...")
+            return
+        start_worker(self, self.solve_frame, frame,
+                     on_result=self.show_pipeline_result,
+                     on_error=self.show_pipeline_error,
+                     on_progress=self.statusBar.showMessage)
+
+    # Arka plan iş parçacığında çalışır: arayüz öğelerine dokunmaz
+    def solve_frame(self, frame, progress):
+        with span('pipeline'):
+            with span('regions'):
+                boxes = find_equation_regions(frame) if self.detect_regions else []
+            if len(boxes) < 2:
+                return self.profiler.run(self.solve_image, frame, progress)
+            # Her bölge kendi OCR + SymPy işini eşzamanlı yürütür
+            progress(f"{len(boxes)} denklem bölgesi bulundu, eşzamanlı işleniyor...")
+            regions = self.profiler.run(solve_regions, frame, boxes, lambda crop: self.solve_image(crop, progress))
+            return {'regions': regions, 'frame_size': (frame.shape[1], frame.shape[0])}
+
+    # Tek bir denklem görüntüsü: OCR, ayrıştırma, çözüm ve çizim
+    def solve_image(self, frame, progress):
+        # SymPy ilk yakalamada (ya da startup.preload ile arka planda) yüklenir
+        from solver import parse_problem
+
+        result = timed_upload(self.preprocessor, self.mathpix, frame, progress)
+
+        if 'latex_styled' not in result:
+            return {'failed': True}
+
+        # 🧹 Temizleme işlemleri
+        with span('clean'):
+            latex_expr = clean_mathpix_latex(result['latex_styled'])
+
+        progress("LaTeX çözümleniyor...")
+        print("Temizlenen LaTeX:", latex_expr)
+
         try:
-            app_id = os.getenv("MATHPIX_APP_ID")
-            app_key = os.getenv("MATHPIX_APP_KEY")
-
-            if not app_id or not app_key:
-                    QMessageBox.warning(self, "Eksik API Bilgisi", "MATHPIX_APP_ID / MATHPIX_APP_KEY .env içinde tanımlı değil.")
-                    return
-
-            _, buffer = cv2.imencode('.png', frame)
-            img_base64 = base64.b64encode(buffer).decode()
-
-            headers = {
-                'app_id': app_id,
-                'app_key': app_key,
-                'Content-type': 'application/json'
-            }
-
-            data = {
-                'src': f'data:image/png;base64,{img_base64}',
-                'formats': ['latex_styled'],
-                'data_options': {
-                    'include_latex': True
-                }
-            }
-
-            response = requests.post('https://api.mathpix.com/v3/text', json=data, headers=headers)
-            result = response.json()
-
-            if 'latex_styled' in result:
-                latex_expr = result['latex_styled']
-
-             # 🧹 Temizleme işlemleri
-                latex_expr = latex_expr.replace(r'\begin{array}{}', '')
-                latex_expr = latex_expr.replace(r'\end{array}', '')
-                latex_expr = latex_expr.replace(r'\\', '')
-                latex_expr = latex_expr.replace(r'\text{ integral }', '')
-                latex_expr = latex_expr.replace(r'd x', 'dx')
-                latex_expr = latex_expr.replace(r'\,', '')
-                latex_expr = latex_expr.strip()
-
-                self.statusBar.showMessage("LaTeX çözümleniyor...")
-                print("Temizlenen LaTeX:", latex_expr)
-
-                try:
-                    sym_expr = parse_latex(latex_expr)
-                    print("SymPy nesnesi:", sym_expr)
-
-                    if hasattr(sym_expr, "doit"):
-                        evaluated = sym_expr.doit()
-                    else:
-                        evaluated = sym_expr.evalf()
-
-                    print("Değerlendirme sonucu:", evaluated)
-
-                    # Sonucu arayüze yaz
-                    self.result_text.clear()
-                    self.result_text.append(f"LaTeX ifadesi:\n{latex_expr}\n")
-                    self.result_text.append(f"Hesaplanan çözüm:\n{evaluated}")
-                    self.statusBar.showMessage("Çözüm başarıyla gösterildi.")
-                except Exception as e:
-                    self.result_text.setText(f"LaTeX: {latex_expr}\n\nSymPy hata: {str(e)}")
-            else:
-                self.result_text.setText("Mathpix çözümleme başarısız.")
-                self.statusBar.showMessage("Yanıt alınamadı.")
+            with span('parse'):
+                problem = parse_problem(latex_expr)
+            print("SymPy nesnesi:", problem.expression)
+
+            # Değerlendirme öldürülebilir bir alt süreçte, süre sınırıyla çalışır
+            with span('solve'):
+                outcome = self.solver.solve(problem)
+            if outcome['status'] == 'timeout':
+                return {'latex_expr': latex_expr, 'error': outcome['error']}
+            if outcome['status'] == 'error':
+                raise ValueError(outcome['error'])
+            evaluated = outcome['result']
+
+            print("Değerlendirme sonucu:", evaluated)
+            return {'latex_expr': latex_expr, 'evaluated': evaluated, 'method': outcome['method']}
         except Exception as e:
-            QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {str(e)}")
+            return {'latex_expr': latex_expr, 'error': str(e)}
+
+    # Arayüz iş parçacığında çalışır: işçinin sonucunu ekrana yazar
+    def show_pipeline_result(self, outcome):
+        startup.mark('first_result')
+        if 'regions' in outcome:
+            self.show_regions(outcome)
+            return
+        self.video_label.clear_overlay()
+        if outcome.get('failed'):
+            self.result_text.setText("Mathpix çözümleme başarısız.")
+            self.statusBar.showMessage("Yanıt alınamadı.")
+        elif 'error' in outcome:
+            self.result_text.setText(f"LaTeX: {outcome['latex_expr']}\n\nSymPy hata: {outcome['error']}")
+        else:
+            # Sonucu arayüze yaz
+            self.result_text.clear()
+            self.result_text.append(f"LaTeX ifadesi:\n{outcome['latex_expr']}\n")
+            label = "Sayısal yaklaşım (mpmath)" if outcome['method'] == 'numeric' else "Hesaplanan çözüm"
+            self.result_text.append(f"{label}:\n{outcome['evaluated']}")
+            solved = "Sayısal yaklaşım gösterildi (mpmath)." if outcome.get('method') == 'numeric' else "Çözüm başarıyla gösterildi."
+            self.statusBar.showMessage(f"{solved} {self.mathpix.stats_text()}, {self.solver.cache.stats_text()}, "
+                                       f"{self.preprocessor.stats_text()}")
+
+    # Çok bölgeli sonuç: bölgeler numaralı listelenir, kutular önizlemeye çizilir
+    def show_regions(self, outcome):
+        regions = outcome['regions']
+        self.result_text.clear()
+        overlay = []
+        for number, region in enumerate(regions, 1):
+            if region.get('failed'):
+                text = "Mathpix çözümleme başarısız."
+            elif 'error' in region:
+                text = f"Hata: {region['error']}"
+            else:
+                text = str(region['evaluated'])
+            self.result_text.append(f"{number}. bölge: {region.get('latex_expr', '')}\nSonuç: {text}\n")
+            overlay.append((region['box'], f"{number}: {text}", 'evaluated' in region))
+        self.video_label.set_overlay(overlay, outcome['frame_size'])
+        solved = sum(ok for _, _, ok in overlay)
+        self.statusBar.showMessage(f"{len(regions)} bölgeden {solved} tanesi çözüldü. "
+                                   f"{self.mathpix.stats_text()}, {self.solver.cache.stats_text()}")
+
+    def show_pipeline_error(self, message):
+        QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {message}")
 
     def capture_and_process(self):
         try:
-            ret, frame = self.kamera.read()
-            if ret:
-                self.process_with_mathpix(frame)
+            captured = self.kamera.latest()
+            if captured is not None:
+                self.process_with_mathpix(captured.image)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Kameradan işlem alınamadı: {str(e)}")
 
@@ -157,13 +281,13 @@ class MathOCRApp(QMainWindow):
             fname, _ = QFileDialog.getOpenFileName(self, 'Görüntü Seç', "", "Görüntü Dosyaları (*.png *.jpg *.jpeg)")
             if fname:
                 frame = cv2.imread(fname)
-                self.video_label.setPixmap(QPixmap(fname).scaled(
-                    self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                self.video_label.show_frame(frame)
                 self.process_with_mathpix(frame)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Resim yüklenemedi: {str(e)}")
 
     def clear_results(self):
+        self.video_label.clear_overlay()
         self.result_text.clear()
         self.statusBar.showMessage("Sonuçlar temizlendi")
 
@@ -173,6 +297,9 @@ class MathOCRApp(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.kamera.release()
+            if self.mathpix is not None:
+                self.mathpix.close()
+            self.solver.close()
             event.accept()
         else:
             event.ignore()
@@ -181,4 +308,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MathOCRApp()
     window.show()
+    startup.preload()
     sys.exit(app.exec_())
@@ -1,19 +1,31 @@
 # Bütün kütüphaneler:
 import sys
 import cv2
-import base64
-import requests
-import sympy as sp
 import os
+import time
 import numpy as np
-from PyQt5.QtWidgets import QApplication, QLabel, QPushButton, QVBoxLayout, QWidget, QHBoxLayout, QStatusBar, QMessageBox, QMainWindow, QFileDialog, QFrame, QDialog, QScrollArea
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication, QLabel, QPushButton, QVBoxLayout, QWidget, QHBoxLayout, QStatusBar, QMessageBox, QMainWindow, QFileDialog, QFrame, QDialog
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import QTimer, Qt
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-import io
-from datetime import datetime
-import re
+
+from autocapture import AutoCapture
+from camera import CameraCapture
+from history_store import HistoryStore
+from history_view import history_list_view
+from latex_normalize import clean_mathpix_latex
+from latex_render import render_cache, render_latex_image
+from mathpix_client import MathpixClient
+from ocr_backends import create_backend
+from ocr_cache import OCRCache
+from preprocess import DEFAULT_SPEC, Preprocessor, timed_upload
+from preview import VideoPreview
+from profiling import CaptureProfiler
+from regions import find_equation_regions, solve_regions
+from solver_cache import SolverCache
+from solver_pool import SolverPool
+import startup
+from tracing import span, tracer
+from workers import start_worker
 
 # Buton tasarımı
 class ModernButton(QPushButton):
@@ -31,34 +43,15 @@ class ModernButton(QPushButton):
 
 # Geçmiş penceresi
 class HistoryDialog(QDialog):
-    def __init__(self, history_items, parent=None):
+    def __init__(self, history, parent=None):
         super().__init__(parent)
         self.setWindowTitle("İşlem Geçmişi")
         self.setGeometry(200, 200, 800, 600)
         layout = QVBoxLayout(self)
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll_content = QWidget()
-        scroll_layout = QVBoxLayout(scroll_content)
-        for item in reversed(history_items):
-            item_frame = QFrame()
-            item_layout = QVBoxLayout(item_frame)
-            time_label = QLabel(item['timestamp'])
-            item_layout.addWidget(time_label)
-            eq_label = QLabel("Orijinal Denklem:")
-            item_layout.addWidget(eq_label)
-            eq_image = QLabel()
-            eq_image.setPixmap(item['equation_pixmap'].scaled(700, 80, Qt.KeepAspectRatio))
-            item_layout.addWidget(eq_image)
-            result_label = QLabel("Sonuç:")
-            item_layout.addWidget(result_label)
-            result_image = QLabel()
-            result_image.setPixmap(item['result_pixmap'].scaled(700, 80, Qt.KeepAspectRatio))
-            item_layout.addWidget(result_image)
-            scroll_layout.addWidget(item_frame)
-        scroll_layout.addStretch()
-        scroll.setWidget(scroll_content)
-        layout.addWidget(scroll)
+        # Yalnızca görünen satırlar çizilir; küçük resimler kaydırıldıkça okunur
+        view = history_list_view(history, self)
+        view.setStyleSheet("QListView { border: none; background-color: #1e272e; }")
+        layout.addWidget(view)
 
 # Ana uygulama
 class MathOCRApp(QMainWindow):
@@ -66,7 +59,31 @@ class MathOCRApp(QMainWindow):
         super().__init__()
         self.setWindowTitle("Matematiksel İfade Tanıma")
         self.setGeometry(100, 100, 1000, 700)
-        self.history = []
+        # Geçmiş SQLite dosyasında (~/.mathocr/history.sqlite3), MATHOCR_HISTORY_MAX kayıt / MATHOCR_HISTORY_DAYS gün sınırlı
+        self.history = HistoryStore(max_entries=int(os.getenv("MATHOCR_HISTORY_MAX", "5000")),
+                                    max_age=float(os.getenv("MATHOCR_HISTORY_DAYS", "365")) * 24 * 3600)
+        # Mathpix + SymPy işlemleri arka planda çalışır; MATHOCR_SYNC=1 eski davranışa döner
+        self.background_processing = os.getenv("MATHOCR_SYNC") != "1"
+        # Karede birden çok denklem varsa her biri ayrı gönderilir; MATHOCR_REGIONS=0 kapatır
+        self.detect_regions = os.getenv("MATHOCR_REGIONS", "1") != "0"
+        # MATHOCR_PROFILE=<klasör>: her Mathpix isteği için bir cProfile .prof dosyası; MATHOCR_PROFILE_FRAMES=1 kamera karelerini de ekler
+        self.profiler = CaptureProfiler(os.getenv("MATHOCR_PROFILE"), frames=os.getenv("MATHOCR_PROFILE_FRAMES") == "1")
+        self.active_workers = set()
+        # Yükleme öncesi ön işleme (MATHOCR_PREPROCESS="off" ham PNG gönderir)
+        self.preprocessor = Preprocessor.from_spec(os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+        # Tek, kalıcı Mathpix istemcisi (bağlantı havuzu + keep-alive)
+        # MATHOCR_OCR_BACKEND=record yanıtları kasete (MATHOCR_CASSETTE) yazar, replay ağsız oradan okur
+        self.mathpix = create_backend(os.getenv("MATHOCR_OCR_BACKEND", "live"), lambda: MathpixClient(
+            os.getenv("MATHPIX_APP_ID", "your_app_id"), os.getenv("MATHPIX_APP_KEY", "your_app_key"),
+            cache=OCRCache(phash_distance=int(os.getenv("MATHOCR_PHASH_DISTANCE", "0"))),
+            upload_mode=os.getenv("MATHOCR_UPLOAD_MODE", "multipart")), os.getenv("MATHOCR_CASSETTE"))
+        self.mathpix.warm_up()
+        # SymPy değerlendirmesi öldürülebilir bir alt süreçte çalışır (MATHOCR_SOLVE_TIMEOUT sn);
+        # belirli integral ve limitlerde mpmath ile yarışır (MATHOCR_SOLVE_MODE, MATHOCR_EXACT_BUDGET sn)
+        self.solver = SolverPool(workers=int(os.getenv("MATHOCR_SOLVE_WORKERS", "4")),
+                                 timeout=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")), cache=SolverCache(),
+                                 mode=os.getenv("MATHOCR_SOLVE_MODE", "race"),
+                                 exact_budget=float(os.getenv("MATHOCR_EXACT_BUDGET", "1")))
         self.initUI()
 
     def initUI(self):
@@ -80,7 +97,7 @@ class MathOCRApp(QMainWindow):
         header.setStyleSheet("font-size: 20px; font-weight: bold; color: #dfe6e9; padding: 5px;")
         layout.addWidget(header)
 
-        self.video_label = QLabel(self)
+        self.video_label = VideoPreview(self)
         self.video_label.setMinimumSize(800, 450)
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("background-color: #2d3436; border-radius: 10px; border: 2px solid #636e72; padding: 10px;")
@@ -104,11 +121,24 @@ class MathOCRApp(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("Hazır")
 
-        self.kamera = cv2.VideoCapture(0)
+        self.kamera = CameraCapture(0).start()
+        self.auto_capture = AutoCapture()
+        self.shown_frame = -1
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.timer.timeout.connect(self.profiler.wrap_frames(self.update_frame))
         self.timer.start(30)
 
+        # Kamera istatistikleri durum çubuğunun sağında, saniyede bir
+        self.camera_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.camera_stats)
+        # Aşama gecikmeleri (p50/p95/p99); MATHOCR_METRICS=dosya.prom|.json her saniye yeniden yazılır
+        self.trace_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.trace_stats)
+        self.metrics_path = os.getenv("MATHOCR_METRICS")
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_camera_stats)
+        self.stats_timer.start(1000)
+
     def add_buttons(self, layout):
         self.load_image_button = ModernButton("Resim Yükle", color="#2980b9")
         self.load_image_button.clicked.connect(self.load_sample_image)
@@ -119,6 +149,12 @@ class MathOCRApp(QMainWindow):
         self.capture_button.setShortcut(Qt.Key_Space)
         layout.addWidget(self.capture_button)
 
+        self.auto_button = ModernButton("Otomatik Yakalama (A)", color="#16a085")
+        self.auto_button.setCheckable(True)
+        self.auto_button.setShortcut(Qt.Key_A)
+        self.auto_button.toggled.connect(self.toggle_auto_capture)
+        layout.addWidget(self.auto_button)
+
         self.history_button = ModernButton("Geçmiş", color="#8e44ad")
         self.history_button.clicked.connect(self.show_history)
         layout.addWidget(self.history_button)
@@ -131,110 +167,168 @@ class MathOCRApp(QMainWindow):
         self.quit_button.clicked.connect(self.close)
         layout.addWidget(self.quit_button)
 
-    # LaTeX'ten Python uyumlu temizleme
-    def clean_latex(self, expr_str):
-        expr_str = expr_str.replace("\\left(", "(").replace("\\right)", ")").replace("\\log", "ln")
-        expr_str = expr_str.replace("\\sin", "sin").replace("\\cos", "cos").replace("\\tan", "tan")
-        expr_str = expr_str.replace("\\cot", "cot").replace("\\sec", "sec").replace("\\csc", "csc")
-        expr_str = expr_str.replace("\\sqrt", "sqrt").replace("\\,", "")
-        expr_str = re.sub(r'x\^{(\d+)}', r'x**\1', expr_str)
-        expr_str = expr_str.strip()
-        return expr_str
-
     # Mathpix sonrası işlem motoru
     def process_with_mathpix(self, frame):
-        try:
-            app_id = "your_app_ıd"
-            app_key = "your_app_key"
-            _, buffer = cv2.imencode('.png', frame)
-            img_base64 = base64.b64encode(buffer).decode()
-            headers = {'app_id': app_id, 'app_key': app_key, 'Content-type': 'application/json'}
-            data = {'src': f'data:image/png;base64,{img_base64}', 'formats': ['latex_styled'], 'data_options': {'include_latex': True}}
-            response = requests.post('https://api.mathpix.com/v3/text', json=data, headers=headers)
-            result = response.json()
-
-            if 'latex_styled' not in result:
-                self.statusBar.showMessage("Mathpix çözümleme başarısız.")
-                return
-
-            latex_expr = result['latex_styled'].replace(r'\begin{array}{}', '').replace(r'\end{array}', '').replace(r'\\', '').strip()
-            expr_str = self.clean_latex(latex_expr)
-            print("OCR ->", expr_str)
-
-            x = sp.Symbol('x')
-
-            if r'\frac{d}{dx}' in latex_expr or r'd/dx' in latex_expr:
-                body = expr_str.split('d}{dx}')[-1] if r'\frac{d}{dx}' in latex_expr else expr_str.split('d/dx')[-1]
-                expr = sp.sympify(body, locals={'x': x})
-                result_expr = sp.diff(expr, x)
-            elif r'\lim' in latex_expr:
-                match = re.search(r'\\lim_{x\\rightarrow([^}]+)}(.*)', latex_expr)
-                limit_point, body = match.groups()
-                expr = sp.sympify(self.clean_latex(body), locals={'x': x})
-                result_expr = sp.limit(expr, x, sp.sympify(limit_point))
-            elif r'\int' in latex_expr:
-                match = re.search(r'\\int\s*(.*)dx', latex_expr)
-                expr = sp.sympify(self.clean_latex(match.group(1)), locals={'x': x})
-                result_expr = sp.integrate(expr, x)
-            else:
-                expr = sp.sympify(expr_str, locals={'x': x})
-                result_expr = expr
-
-            result_latex = sp.latex(result_expr).replace('**', '^').replace('*', '').replace('ln', '\\log')
-            self.display_results(latex_expr, result_latex)
-            self.statusBar.showMessage("Çözüm başarıyla gösterildi.")
-        except Exception as e:
-            QMessageBox.warning(self, "Hata", f"Hata: {str(e)}")
-
-    # Ekrana sonuçları yaz
-    def display_results(self, latex_expr, result_latex):
-        eq_img = self.render_latex(latex_expr)
-        res_img = self.render_latex(result_latex)
+        if not self.background_processing:
+            try:
+                self.display_results(self.solve_frame(frame, progress=self.statusBar.showMessage))
+            except Exception as e:
+                self.show_pipeline_error(str(e))
+            return
+
+        if self.active_workers:
+            self.statusBar.showMessage("Önceki işlem devam ediyor...")
+            return
+        start_worker(self, self.solve_frame, frame,
+                     on_result=self.display_results,
+                     on_error=self.show_pipeline_error,
+                     on_progress=self.statusBar.showMessage)
+
+    # Arka plan iş parçacığında çalışır: arayüz öğelerine dokunmaz
+    def solve_frame(self, frame, progress):
+        with span('pipeline'):
+            with span('regions'):
+                boxes = find_equation_regions(frame) if self.detect_regions else []
+            if len(boxes) < 2:
+                return self.profiler.run(self.solve_image, frame, progress)
+            # Her bölge kendi OCR + SymPy işini eşzamanlı yürütür
+            progress(f"{len(boxes)} denklem bölgesi bulundu, eşzamanlı işleniyor...")
+            regions = self.profiler.run(solve_regions, frame, boxes, lambda crop: self.solve_image(crop, progress))
+            return {'regions': regions, 'frame_size': (frame.shape[1], frame.shape[0])}
+
+    # Tek bir denklem görüntüsü: OCR, ayrıştırma, çözüm ve çizim
+    def solve_image(self, frame, progress):
+        # SymPy ilk yakalamada (ya da startup.preload ile arka planda) yüklenir
+        from solver import format_result_latex, parse_problem
+
+        started = time.perf_counter()
+        result = timed_upload(self.preprocessor, self.mathpix, frame, progress)
+        ocr_ms = (time.perf_counter() - started) * 1000
+
+        if 'latex_styled' not in result:
+            return {'error': "Mathpix çözümleme başarısız."}
+
+        with span('clean'):
+            latex_expr = clean_mathpix_latex(result['latex_styled'])
+        print("OCR ->", latex_expr)
+        progress("LaTeX çözümleniyor...")
+        with span('parse'):
+            problem = parse_problem(latex_expr)
+
+        # SymPy öldürülebilir bir alt süreçte, süre sınırıyla çalışır
+        with span('solve'):
+            outcome = self.solver.solve(problem)
+        if outcome['status'] == 'timeout':
+            return {'error': f"SymPy {outcome['error']}."}
+        if outcome['status'] == 'error':
+            raise ValueError(outcome['error'])
+        result_expr = outcome['result']
+
+        result_latex = format_result_latex(result_expr, outcome['method'])
+        progress("Sonuç çiziliyor...")
+        with span('render') as render_span:
+            equation_image = render_latex_image(latex_expr)
+            result_image = render_latex_image(result_latex)
+        return {
+            'latex_expr': latex_expr,
+            'result_latex': result_latex,
+            'method': outcome['method'],
+            'equation_image': equation_image,
+            'result_image': result_image,
+            'timings': {'ocr_ms': round(ocr_ms, 1),
+                        'solve_ms': round(outcome['seconds'] * 1000, 1),
+                        'render_ms': round(render_span.ms, 1)}
+        }
+
+    # Ekrana sonuçları yaz (arayüz iş parçacığında)
+    def display_results(self, outcome):
+        startup.mark('first_result')
+        if 'regions' in outcome:
+            self.show_regions(outcome)
+            return
+        self.video_label.clear_overlay()
+        if 'error' in outcome:
+            self.statusBar.showMessage(outcome['error'])
+            return
+        eq_img = QPixmap.fromImage(outcome['equation_image'])
+        res_img = QPixmap.fromImage(outcome['result_image'])
         self.latex_label.setPixmap(eq_img.scaled(self.latex_label.width(), 80, Qt.KeepAspectRatio))
         self.result_label.setPixmap(res_img.scaled(self.result_label.width(), 80, Qt.KeepAspectRatio))
-        self.history.append({'timestamp': datetime.now().strftime("%d.%m.%Y %H:%M:%S"), 'equation_pixmap': eq_img, 'result_pixmap': res_img})
+        self.history.add(outcome['latex_expr'], outcome['result_latex'],
+                         equation_image=outcome['equation_image'], result_image=outcome['result_image'],
+                         timings=outcome.get('timings'))
+        solved = "Sayısal yaklaşım gösterildi (mpmath)." if outcome.get('method') == 'numeric' else "Çözüm başarıyla gösterildi."
+        self.statusBar.showMessage(f"{solved} {self.mathpix.stats_text()}, {self.solver.cache.stats_text()}, "
+                                   f"{render_cache.stats_text()}, {self.preprocessor.stats_text()}")
+
+    # Çok bölgeli sonuç: çözülen her bölge tek sonuç gibi geçmişe eklenir, kutular önizlemeye çizilir
+    def show_regions(self, outcome):
+        regions = outcome['regions']
+        solved = [r for r in regions if 'error' not in r]
+        for region in solved:
+            self.display_results(region)
+        self.video_label.set_overlay(
+            [(r['box'], r.get('result_image') or r['error'], 'error' not in r) for r in regions],
+            outcome['frame_size'])
+        self.statusBar.showMessage(f"{len(regions)} bölgeden {len(solved)} tanesi çözüldü. "
+                                   f"{self.mathpix.stats_text()}, {self.solver.cache.stats_text()}")
+
+    def show_pipeline_error(self, message):
+        QMessageBox.warning(self, "Hata", f"Hata: {message}")
 
     def render_latex(self, latex_str):
-        fig = plt.figure(figsize=(8, 2))
-        plt.text(0.5, 0.5, f"${latex_str}$", ha='center', va='center', fontsize=20, color='#dfe6e9')
-        plt.axis('off')
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, facecolor='#2d3436')
-        buf.seek(0)
-        img = QImage.fromData(buf.getvalue())
-        plt.close(fig)
-        return QPixmap.fromImage(img)
+        return QPixmap.fromImage(render_latex_image(latex_str))
 
     # Kameradan oku
     def capture_and_process(self):
-        ret, frame = self.kamera.read()
-        if ret:
-            self.process_with_mathpix(frame)
+        captured = self.kamera.latest()
+        if captured is not None:
+            self.process_with_mathpix(captured.image)
 
     # Dosyadan oku
     def load_sample_image(self):
         fname, _ = QFileDialog.getOpenFileName(self, 'Görüntü Seç', "", "Görüntü Dosyaları (*.png *.jpg *.jpeg)")
         if fname:
             frame = cv2.imdecode(np.fromfile(fname, dtype=np.uint8), cv2.IMREAD_COLOR)
-            self.video_label.setPixmap(QPixmap(fname).scaled(self.video_label.size(), Qt.KeepAspectRatio))
+            self.video_label.show_frame(frame)
             self.process_with_mathpix(frame)
 
     def clear_results(self):
+        self.video_label.clear_overlay()
         self.latex_label.clear()
         self.result_label.clear()
         self.statusBar.showMessage("Sonuçlar temizlendi")
 
     def update_frame(self):
-        ret, frame = self.kamera.read()
-        if ret:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = QImage(rgb, rgb.shape[1], rgb.shape[0], rgb.strides[0], QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(img).scaled(self.video_label.size(), Qt.KeepAspectRatio))
+        # Yakalama iş parçacığındaki en yeni kare; yeni kare yoksa çizim yapılmaz
+        captured = self.kamera.latest(newer_than=self.shown_frame)
+        if captured is not None:
+            with span('camera.tick'):
+                self.video_label.show_frame(captured.image)
+                self.shown_frame = captured.index
+                self.kamera.shown(captured)
+                startup.mark('first_frame')
+                # Önceki işlem sürerken kareler değerlendirilmez; bitince yeniden N sabit kare beklenir
+                if self.auto_button.isChecked() and not self.active_workers and self.auto_capture.update(captured.image):
+                    self.statusBar.showMessage("Net ve sabit kare yakalandı, işleniyor...")
+                    self.process_with_mathpix(captured.image)
+
+    def toggle_auto_capture(self, checked):
+        self.auto_capture.reset()
+        self.statusBar.showMessage("Otomatik yakalama açık" if checked else "Otomatik yakalama kapalı")
+
+    def update_camera_stats(self):
+        text = self.kamera.stats_text()
+        if self.auto_button.isChecked():
+            text += " | " + self.auto_capture.status_text()
+        self.camera_stats.setText(text)
+        self.trace_stats.setText(tracer.status_text())
+        self.trace_stats.setToolTip(tracer.table_text())
+        if self.metrics_path:
+            tracer.dump(self.metrics_path)
 
     def show_history(self):
-        if not self.history:
+        if not self.history.count():
             QMessageBox.information(self, "Geçmiş", "Henüz işlem geçmişi bulunmuyor.")
             return
         dialog = HistoryDialog(self.history, self)
@@ -244,6 +338,9 @@ class MathOCRApp(QMainWindow):
         reply = QMessageBox.question(self, 'Çıkış', 'Çıkmak istiyor musunuz?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.kamera.release()
+            self.mathpix.close()
+            self.history.close()
+            self.solver.close()
             event.accept()
         else:
             event.ignore()
@@ -252,4 +349,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MathOCRApp()
     window.show()
+    startup.preload()
     sys.exit(app.exec_())
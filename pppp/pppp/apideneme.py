@@ -1,20 +1,33 @@
 import sys
 import cv2
-import base64
-import requests
-import sympy as sp
 import os
+import time
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QLabel, QPushButton, QVBoxLayout,
                              QWidget, QTextEdit, QHBoxLayout, QStatusBar,
                              QMessageBox, QMainWindow, QFileDialog, QFrame,
-                             QDialog, QScrollArea)
-from PyQt5.QtGui import QImage, QPixmap, QFont, QPainter, QColor
+                             QDialog)
+from PyQt5.QtGui import QPixmap, QFont, QPainter, QColor
 from PyQt5.QtCore import QTimer, Qt, QSize
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-import io
-from datetime import datetime
+
+from autocapture import AutoCapture
+from camera import CameraCapture
+from history_store import HistoryStore
+from history_view import history_list_view
+from latex_normalize import clean_mathpix_latex
+from latex_render import render_cache, render_latex_image
+from mathpix_client import MathpixClient
+from ocr_backends import create_backend
+from ocr_cache import OCRCache
+from preprocess import DEFAULT_SPEC, Preprocessor, timed_upload
+from preview import VideoPreview
+from profiling import CaptureProfiler
+from regions import find_equation_regions, solve_regions
+from solver_cache import SolverCache
+from solver_pool import SolverPool
+import startup
+from tracing import span, tracer
+from workers import start_worker
 
 class ModernButton(QPushButton):
     def __init__(self, text, parent=None, color="#2d3436", hover_color="#353b48", pressed_color="#2f3640"):
@@ -40,7 +53,7 @@ class ModernButton(QPushButton):
         self.setMinimumHeight(40)
 
 class HistoryDialog(QDialog):
-    def __init__(self, history_items, parent=None):
+    def __init__(self, history, parent=None):
         super().__init__(parent)
         self.setWindowTitle("İşlem Geçmişi")
         self.setGeometry(200, 200, 800, 600)
@@ -48,27 +61,16 @@ class HistoryDialog(QDialog):
             QDialog {
                 background-color: #1e272e;
             }
-            QLabel {
-                color: #dfe6e9;
-                font-size: 14px;
-            }
-            QScrollArea {
-                border: none;
-                background-color: #1e272e;
-            }
-            QWidget#scrollContent {
-                background-color: #1e272e;
-            }
         """)
 
         layout = QVBoxLayout(self)
         
-        # Geçmiş öğeleri için kaydırma alanı
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("""
-            QScrollArea {
+        # Yalnızca görünen satırlar çizilir; küçük resimler kaydırıldıkça okunur
+        view = history_list_view(history, self)
+        view.setStyleSheet("""
+            QListView {
                 border: none;
+                background-color: #1e272e;
             }
             QScrollBar:vertical {
                 border: none;
@@ -85,61 +87,38 @@ class HistoryDialog(QDialog):
                 height: 0px;
             }
         """)
-        
-        scroll_content = QWidget()
-        scroll_content.setObjectName("scrollContent")
-        scroll_layout = QVBoxLayout(scroll_content)
-        scroll_layout.setSpacing(15)
-        
-        for item in reversed(history_items):  # En yeniden en eskiye göster
-            item_frame = QFrame()
-            item_frame.setStyleSheet("""
-                QFrame {
-                    background-color: #2d3436;
-                    border-radius: 10px;
-                    border: 1px solid #636e72;
-                    padding: 10px;
-                }
-            """)
-            item_layout = QVBoxLayout(item_frame)
-            
-            # Zaman damgası
-            time_label = QLabel(item['timestamp'])
-            time_label.setStyleSheet("color: #b2bec3; font-size: 12px;")
-            item_layout.addWidget(time_label)
-            
-            # Orijinal denklem
-            eq_label = QLabel("Orijinal Denklem:")
-            eq_label.setStyleSheet("color: #dfe6e9; font-weight: bold;")
-            item_layout.addWidget(eq_label)
-            
-            eq_image = QLabel()
-            eq_image.setPixmap(item['equation_pixmap'].scaled(
-                700, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            item_layout.addWidget(eq_image)
-            
-            # Sonuç
-            result_label = QLabel("Sonuç:")
-            result_label.setStyleSheet("color: #dfe6e9; font-weight: bold;")
-            item_layout.addWidget(result_label)
-            
-            result_image = QLabel()
-            result_image.setPixmap(item['result_pixmap'].scaled(
-                700, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            item_layout.addWidget(result_image)
-            
-            scroll_layout.addWidget(item_frame)
-        
-        scroll_layout.addStretch()
-        scroll.setWidget(scroll_content)
-        layout.addWidget(scroll)
+        layout.addWidget(view)
 
 class MathOCRApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Matematiksel İfade Tanıma")
         self.setGeometry(100, 100, 1000, 700)
-        self.history = []  # Geçmiş öğelerini sakla
+        # Geçmiş SQLite dosyasında tutulur; en fazla MATHOCR_HISTORY_MAX kayıt, MATHOCR_HISTORY_DAYS gün
+        self.history = HistoryStore(max_entries=int(os.getenv("MATHOCR_HISTORY_MAX", "5000")),
+                                    max_age=float(os.getenv("MATHOCR_HISTORY_DAYS", "365")) * 24 * 3600)
+        # Mathpix + SymPy işlemleri arka planda çalışır; MATHOCR_SYNC=1 eski davranışa döner
+        self.background_processing = os.getenv("MATHOCR_SYNC") != "1"
+        # Karede birden çok denklem varsa her biri ayrı gönderilir; MATHOCR_REGIONS=0 kapatır
+        self.detect_regions = os.getenv("MATHOCR_REGIONS", "1") != "0"
+        # MATHOCR_PROFILE=<klasör>: her Mathpix isteği için bir cProfile .prof dosyası; MATHOCR_PROFILE_FRAMES=1 kamera karelerini de ekler
+        self.profiler = CaptureProfiler(os.getenv("MATHOCR_PROFILE"), frames=os.getenv("MATHOCR_PROFILE_FRAMES") == "1")
+        self.active_workers = set()
+        # Yükleme öncesi ön işleme (MATHOCR_PREPROCESS="off" ham PNG gönderir)
+        self.preprocessor = Preprocessor.from_spec(os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+        # Tek, kalıcı Mathpix istemcisi (bağlantı havuzu + keep-alive)
+        # MATHOCR_OCR_BACKEND=record yanıtları kasete (MATHOCR_CASSETTE) yazar, replay ağsız oradan okur
+        self.mathpix = create_backend(os.getenv("MATHOCR_OCR_BACKEND", "live"), lambda: MathpixClient(
+            os.getenv("MATHPIX_APP_ID", "your_app_id"), os.getenv("MATHPIX_APP_KEY", "your_app_key"),
+            cache=OCRCache(phash_distance=int(os.getenv("MATHOCR_PHASH_DISTANCE", "0"))),
+            upload_mode=os.getenv("MATHOCR_UPLOAD_MODE", "multipart")), os.getenv("MATHOCR_CASSETTE"))
+        self.mathpix.warm_up()
+        # SymPy değerlendirmesi öldürülebilir bir alt süreçte çalışır (MATHOCR_SOLVE_TIMEOUT sn);
+        # belirli integral ve limitlerde mpmath ile yarışır (MATHOCR_SOLVE_MODE, MATHOCR_EXACT_BUDGET sn)
+        self.solver = SolverPool(workers=int(os.getenv("MATHOCR_SOLVE_WORKERS", "4")),
+                                 timeout=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")), cache=SolverCache(),
+                                 mode=os.getenv("MATHOCR_SOLVE_MODE", "race"),
+                                 exact_budget=float(os.getenv("MATHOCR_EXACT_BUDGET", "1")))
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #1e272e;
@@ -173,7 +152,7 @@ class MathOCRApp(QMainWindow):
         main_layout.addWidget(header_label)
 
         # Görüntü alanı
-        self.video_label = QLabel(self)
+        self.video_label = VideoPreview(self)
         self.video_label.setMinimumSize(800, 450)
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("""
@@ -205,6 +184,16 @@ class MathOCRApp(QMainWindow):
         self.capture_button.setShortcut(Qt.Key_Space)
         button_layout.addWidget(self.capture_button)
 
+        # Otomatik Yakalama - Turkuaz tonu, basılı kaldıkça açık
+        self.auto_button = ModernButton("Otomatik Yakalama (A)", 
+            color="#16a085", 
+            hover_color="#1abc9c", 
+            pressed_color="#138d75")
+        self.auto_button.setCheckable(True)
+        self.auto_button.setShortcut(Qt.Key_A)
+        self.auto_button.toggled.connect(self.toggle_auto_capture)
+        button_layout.addWidget(self.auto_button)
+
         # Geçmiş - Mor tonu
         self.history_button = ModernButton("Geçmiş", 
             color="#8e44ad", 
@@ -264,284 +253,160 @@ class MathOCRApp(QMainWindow):
         self.statusBar.showMessage("Hazır")
 
         # Kamera başlat
-        self.kamera = cv2.VideoCapture(0)
+        self.kamera = CameraCapture(0).start()
+        self.auto_capture = AutoCapture()
+        self.shown_frame = -1
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.timer.timeout.connect(self.profiler.wrap_frames(self.update_frame))
         self.timer.start(30)
 
+        # Kamera istatistikleri durum çubuğunun sağında, saniyede bir
+        self.camera_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.camera_stats)
+        # Aşama gecikmeleri (p50/p95/p99); MATHOCR_METRICS=dosya.prom|.json her saniye yeniden yazılır
+        self.trace_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.trace_stats)
+        self.metrics_path = os.getenv("MATHOCR_METRICS")
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_camera_stats)
+        self.stats_timer.start(1000)
+
     def render_latex(self, latex_str):
-        fig = plt.figure(figsize=(8, 2))
-        fig.patch.set_facecolor('#2d3436')
-        plt.text(0.5, 0.5, f"${latex_str}$", 
-                horizontalalignment='center',
-                verticalalignment='center',
-                fontsize=20,
-                color='#dfe6e9')
-        plt.axis('off')
-        
-        # Matplotlib figürünü QPixmap'e dönüştür
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, facecolor='#2d3436')
-        buf.seek(0)
-        img = QImage.fromData(buf.getvalue())
-        pixmap = QPixmap.fromImage(img)
-        plt.close(fig)
-        return pixmap
+        return QPixmap.fromImage(render_latex_image(latex_str))
 
     def show_history(self):
-        if not self.history:
+        if not self.history.count():
             QMessageBox.information(self, "Geçmiş", "Henüz işlem geçmişi bulunmuyor.")
             return
         dialog = HistoryDialog(self.history, self)
         dialog.exec_()
 
     def process_with_mathpix(self, frame):
-        try:
-            app_id = "your_app_ıd"
-            app_key = "your_app_key"
-
-            _, buffer = cv2.imencode('.png', frame)
-            img_base64 = base64.b64encode(buffer).decode()
+        if not self.background_processing:
+            try:
+                self.show_pipeline_result(self.solve_frame(frame, progress=self.statusBar.showMessage))
+            except Exception as e:
+                self.show_pipeline_error(str(e))
+            return
 
-            headers = {
-                'app_id': app_id,
-                'app_key': app_key,
-                'Content-type': 'application/json'
-            }
+        if self.active_workers:
+            self.statusBar.showMessage("Önceki işlem devam ediyor...")
+            return
+        start_worker(self, self.solve_frame, frame,
+                     on_result=self.show_pipeline_result,
+                     on_error=self.show_pipeline_error,
+                     on_progress=self.statusBar.showMessage)
+
+    # Arka plan iş parçacığında çalışır: arayüz öğelerine dokunmaz
+    def solve_frame(self, frame, progress):
+        with span('pipeline'):
+            with span('regions'):
+                boxes = find_equation_regions(frame) if self.detect_regions else []
+            if len(boxes) < 2:
+                return self.profiler.run(self.solve_image, frame, progress)
+            # Her bölge kendi OCR + SymPy işini eşzamanlı yürütür
+            progress(f"{len(boxes)} denklem bölgesi bulundu, eşzamanlı işleniyor...")
+            regions = self.profiler.run(solve_regions, frame, boxes, lambda crop: self.solve_image(crop, progress))
+            return {'regions': regions, 'frame_size': (frame.shape[1], frame.shape[0])}
+
+    # Tek bir denklem görüntüsü: OCR, ayrıştırma, çözüm ve çizim
+    def solve_image(self, frame, progress):
+        # SymPy ilk yakalamada (ya da startup.preload ile arka planda) yüklenir
+        from solver import format_result_latex, parse_problem
+
+        started = time.perf_counter()
+        result = timed_upload(self.preprocessor, self.mathpix, frame, progress)
+        ocr_ms = (time.perf_counter() - started) * 1000
+
+        if 'latex_styled' not in result:
+            return {'error': "Mathpix çözümleme başarısız."}
+
+        with span('clean'):
+            latex_expr = clean_mathpix_latex(result['latex_styled'])
+
+        progress("LaTeX çözümleniyor...")
+        print("Temizlenen LaTeX:", latex_expr)
 
-            data = {
-                'src': f'data:image/png;base64,{img_base64}',
-                'formats': ['latex_styled'],
-                'data_options': {
-                    'include_latex': True
-                }
+        try:
+            with span('parse'):
+                problem = parse_problem(latex_expr)
+            with span('solve'):
+                outcome = self.solver.solve(problem)
+            if outcome['status'] == 'timeout':
+                return {'error': f"SymPy {outcome['error']}."}
+            if outcome['status'] == 'error':
+                raise ValueError(outcome['error'])
+            result_latex = format_result_latex(outcome['result'], outcome['method'])
+
+            # LaTeX ifadesini ve sonucu görüntüye dönüştür
+            progress("Sonuç çiziliyor...")
+            with span('render') as render_span:
+                equation_image = render_latex_image(latex_expr)
+                result_image = render_latex_image(result_latex)
+            return {
+                'latex_expr': latex_expr,
+                'result_latex': result_latex,
+                'method': outcome['method'],
+                'equation_image': equation_image,
+                'result_image': result_image,
+                'timings': {'ocr_ms': round(ocr_ms, 1),
+                            'solve_ms': round(outcome['seconds'] * 1000, 1),
+                            'render_ms': round(render_span.ms, 1)}
             }
-
-            response = requests.post('https://api.mathpix.com/v3/text', json=data, headers=headers)
-            result = response.json()
-
-            if 'latex_styled' in result:
-                latex_expr = result['latex_styled']
-
-                # 🧹 Temizleme işlemleri
-                latex_expr = latex_expr.replace(r'\begin{array}{}', '')
-                latex_expr = latex_expr.replace(r'\end{array}', '')
-                latex_expr = latex_expr.replace(r'\\', '')
-                latex_expr = latex_expr.replace(r'\text{ integral }', '')
-                latex_expr = latex_expr.replace(r'd x', 'dx')
-                latex_expr = latex_expr.replace(r'\,', '')
-                latex_expr = latex_expr.strip()
-
-                self.statusBar.showMessage("LaTeX çözümleniyor...")
-                print("Temizlenen LaTeX:", latex_expr)
-
-                try:
-                    # Değişkeni tanımla
-                    x = sp.Symbol('x')
-                    u = sp.Symbol('u')
-                    
-                    # Farklı ifade türlerini işle
-                    if r'\lim' in latex_expr:
-                        # Limitleri işle
-                        try:
-                            # İfadeyi ve limit noktasını çıkar
-                            import re
-                            # Yönlü limitler ve daha karmaşık ifadeler için güncellenmiş regex
-                            match = re.search(r'\\lim_{([a-zA-Z]+)\\rightarrow([^{}]+)(?:\^{+}|\^{-})?}(.*)', latex_expr)
-                            if match:
-                                var_str = match.group(1).strip()
-                                point_str = match.group(2).strip()
-                                expr_str = match.group(3).strip()
-                                
-                                var = sp.Symbol(var_str)
-                                expr_str = expr_str.replace('\\left(', '(').replace('\\right)', ')')
-                                expr_str = expr_str.replace('\\log', 'ln')  # log'u ln'e dönüştür
-                                expr_str = expr_str.replace('\\left|', 'Abs(').replace('\\right|', ')')  # Mutlak değeri işle
-                                
-                                try:
-                                    expr = sp.parse_latex(expr_str)
-                                except:
-                                    # Kesirleri işle
-                                    def replace_fraction(match):
-                                        num = match.group(1).strip()
-                                        den = match.group(2).strip()
-                                        return f"({num})/({den})"
-                                    
-                                    # Önce iç içe kesirleri işle
-                                    while '\\frac' in expr_str:
-                                        expr_str = re.sub(r'\\frac\{([^{}]+|(?:\{[^{}]*\})+)\}\{([^{}]+|(?:\{[^{}]*\})+)\}', replace_fraction, expr_str)
-                                    
-                                    # Üsleri işle
-                                    expr_str = re.sub(r'x\^{(\d+)}', r'x**\1', expr_str)
-                                    # Çarpmayı işle
-                                    expr_str = re.sub(r'(\d+)\s*x', r'\1*x', expr_str)
-                                    # Boşlukları kaldır
-                                    expr_str = expr_str.replace(' ', '')
-                                    print("Dönüştürülen limit ifadesi:", expr_str)
-                                    
-                                    # Yaygın limit kalıpları için özel işleme
-                                    if 'ln(1+x)/x' in expr_str or 'log(1+x)/x' in expr_str:
-                                        result = sp.Integer(1)  # Bilinen limit 1'dir
-                                    else:
-                                        try:
-                                            expr = sp.sympify(expr_str, locals={var_str: var})
-                                            # Yönlü limitleri işle
-                                            if '^{+}' in latex_expr:
-                                                result = sp.limit(expr, var, sp.sympify(point_str), dir='+')
-                                            elif '^{-}' in latex_expr:
-                                                result = sp.limit(expr, var, sp.sympify(point_str), dir='-')
-                                            else:
-                                                result = sp.limit(expr, var, sp.sympify(point_str))
-                                        except:
-                                            # sympify başarısız olursa, ifadeyi doğrudan oluşturmayı dene
-                                            if 'sin(x)/x' in expr_str:
-                                                result = sp.Integer(1)  # Bilinen limit 1'dir
-                                            elif 'cos(x)-1/x' in expr_str:
-                                                result = sp.Integer(0)  # Bilinen limit 0'dır
-                                            else:
-                                                raise ValueError(f"Limit ifadesi çözümlenemedi: {expr_str}")
-                            else:
-                                raise ValueError("Limit ifadesi formatı tanınmadı")
-                        except Exception as e:
-                            print(f"Limit hesaplama hatası: {str(e)}")
-                            # Bilinen limitler için son çare
-                            if '\\frac{\\log (1+x)}{x}' in latex_expr or '\\frac{\\ln (1+x)}{x}' in latex_expr:
-                                result = sp.Integer(1)  # Bilinen limit 1'dir
-                            elif '\\frac{\\sin x}{x}' in latex_expr:
-                                result = sp.Integer(1)  # Bilinen limit 1'dir
-                            elif '\\frac{\\cos x - 1}{x}' in latex_expr:
-                                result = sp.Integer(0)  # Bilinen limit 0'dır
-                            else:
-                                raise ValueError(f"Limit hesaplanamadı: {str(e)}")
-                    elif r'\int' in latex_expr:
-                        # İntegrali işle
-                        parts = latex_expr.split(r'\int')
-                        if len(parts) > 1:
-                            # Fonksiyon kısmını al (limitleri ve dx'i kaldır)
-                            func_part = parts[1].split('dx')[0] if 'dx' in parts[1] else parts[1].split('d u')[0]
-                            
-                            # Limitleri çıkar
-                            if '_{' in func_part and '}^{' in func_part:
-                                # Limitleri al
-                                limits_part = func_part[:func_part.find('\\left[')] if '\\left[' in func_part else func_part
-                                lower = float(limits_part.split('_{')[1].split('}^{')[0])
-                                upper = float(limits_part.split('}^{')[1].split('}')[0])
-                                
-                                # Limitlerden sonraki fonksiyon kısmını al
-                                if '\\left[' in func_part:
-                                    func_part = func_part[func_part.find('\\left['):]
-                                else:
-                                    func_part = func_part[func_part.find('}')+1:]
-                            else:
-                                lower = None
-                                upper = None
-                            
-                            # Fonksiyon kısmını temizle
-                            func_part = func_part.replace('\\left[', '').replace('\\right]', '')
-                            func_part = func_part.replace('\\left(', '').replace('\\right)', '')
-                            func_part = func_part.replace('\\operatorname{coth}', 'coth')
-                            func_part = func_part.strip()
-                            
-                            print("Fonksiyon kısmı:", func_part)  # Hata ayıklama yazdırması
-                            
-                            # LaTeX'i SymPy ifadesine dönüştür
-                            try:
-                                # Önce LaTeX'i doğrudan ayrıştırmayı dene
-                                integrand = sp.parse_latex(func_part)
-                            except:
-                                # Başarısız olursa, daha basit bir forma dönüştürmeyi dene
-                                # x^{n} formatını x**n formatına dönüştür
-                                import re
-                                # Üsleri işle
-                                func_part = re.sub(r'x\^{(\d+)}', r'x**\1', func_part)
-                                # Çarpmayı işle
-                                func_part = re.sub(r'(\d+)\s*x', r'\1*x', func_part)
-                                # Boşlukları kaldır
-                                func_part = func_part.replace(' ', '')
-                                print("Dönüştürülen fonksiyon kısmı:", func_part)  # Hata ayıklama yazdırması
-                                # SymPy'nin ayrıştırmasını kullanarak ifadeyi oluştur
-                                integrand = sp.sympify(func_part, locals={'x': x})
-                            
-                            # İntegrali hesapla
-                            if lower is not None and upper is not None:
-                                result = sp.integrate(integrand, (x, lower, upper))
-                            else:
-                                result = sp.integrate(integrand, x)
-                        else:
-                            # LaTeX'i SymPy ifadesine dönüştür
-                            try:
-                                result = sp.parse_latex(latex_expr)
-                            except:
-                                # Başarısız olursa, daha basit bir forma dönüştürmeyi dene
-                                import re
-                                # Üsleri işle
-                                expr = re.sub(r'x\^{(\d+)}', r'x**\1', latex_expr)
-                                # Çarpmayı işle
-                                expr = re.sub(r'(\d+)\s*x', r'\1*x', expr)
-                                # Boşlukları kaldır
-                                expr = expr.replace(' ', '')
-                                print("Dönüştürülen ifade:", expr)  # Hata ayıklama yazdırması
-                                # SymPy'nin ayrıştırmasını kullanarak ifadeyi oluştur
-                                result = sp.sympify(expr, locals={'x': x})
-                    else:
-                        # Diğer ifadeleri işle
-                        try:
-                            result = sp.parse_latex(latex_expr)
-                        except:
-                            import re
-                            # Üsleri işle
-                            expr = re.sub(r'x\^{(\d+)}', r'x**\1', latex_expr)
-                            # Çarpmayı işle
-                            expr = re.sub(r'(\d+)\s*x', r'\1*x', expr)
-                            # Boşlukları kaldır
-                            expr = expr.replace(' ', '')
-                            print("Dönüştürülen ifade:", expr)  # Hata ayıklama yazdırması
-                            # SymPy'nin ayrıştırmasını kullanarak ifadeyi oluştur
-                            result = sp.sympify(expr, locals={'x': x})
-                    
-                    # Sonucu LaTeX formatına dönüştür
-                    result_latex = sp.latex(result)
-                    
-                    # Sonucu daha doğal görünmesi için biçimlendir
-                    result_latex = result_latex.replace('**', '^')  # x**2'yi x^2'ye dönüştür
-                    result_latex = result_latex.replace('*', '')    # Çarpma işaretlerini kaldır
-                    result_latex = result_latex.replace('ln', '\\log')  # ln'i log'a geri dönüştür
-
-                    # LaTeX ifadesini görüntüle
-                    latex_pixmap = self.render_latex(latex_expr)
-                    self.latex_label.setPixmap(latex_pixmap.scaled(
-                        self.latex_label.width(), 80,
-                        Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-                    # Sadece sonucu LaTeX formatında görüntüle
-                    result_pixmap = self.render_latex(result_latex)
-                    self.result_label.setPixmap(result_pixmap.scaled(
-                        self.result_label.width(), 80,
-                        Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-                    # Geçmişe ekle
-                    self.history.append({
-                        'timestamp': datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
-                        'equation_pixmap': latex_pixmap,
-                        'result_pixmap': result_pixmap
-                    })
-
-                    self.statusBar.showMessage("Çözüm başarıyla gösterildi.")
-                except Exception as e:
-                    self.statusBar.showMessage(f"Hata: {str(e)}")
-                    print(f"Hata detayları: {str(e)}")
-            else:
-                self.statusBar.showMessage("Mathpix çözümleme başarısız.")
         except Exception as e:
-            QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {str(e)}")
+            print(f"Hata detayları: {str(e)}")
+            return {'error': f"Hata: {str(e)}"}
+
+    # Arayüz iş parçacığında çalışır: işçinin sonucunu ekrana yazar
+    def show_pipeline_result(self, outcome):
+        startup.mark('first_result')
+        if 'regions' in outcome:
+            self.show_regions(outcome)
+            return
+        self.video_label.clear_overlay()
+        if 'error' in outcome:
+            self.statusBar.showMessage(outcome['error'])
+            return
+
+        latex_pixmap = QPixmap.fromImage(outcome['equation_image'])
+        self.latex_label.setPixmap(latex_pixmap.scaled(
+            self.latex_label.width(), 80,
+            Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+        result_pixmap = QPixmap.fromImage(outcome['result_image'])
+        self.result_label.setPixmap(result_pixmap.scaled(
+            self.result_label.width(), 80,
+            Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+        # Geçmişe ekle
+        self.history.add(outcome['latex_expr'], outcome['result_latex'],
+                         equation_image=outcome['equation_image'], result_image=outcome['result_image'],
+                         timings=outcome.get('timings'))
+
+        solved = "Sayısal yaklaşım gösterildi (mpmath)." if outcome.get('method') == 'numeric' else "Çözüm başarıyla gösterildi."
+        self.statusBar.showMessage(f"{solved} {self.mathpix.stats_text()}, {self.solver.cache.stats_text()}, "
+                                   f"{render_cache.stats_text()}, {self.preprocessor.stats_text()}")
+
+    # Çok bölgeli sonuç: çözülen her bölge tek sonuç gibi geçmişe eklenir, kutular önizlemeye çizilir
+    def show_regions(self, outcome):
+        regions = outcome['regions']
+        solved = [r for r in regions if 'error' not in r]
+        for region in solved:
+            self.show_pipeline_result(region)
+        self.video_label.set_overlay(
+            [(r['box'], r.get('result_image') or r['error'], 'error' not in r) for r in regions],
+            outcome['frame_size'])
+        self.statusBar.showMessage(f"{len(regions)} bölgeden {len(solved)} tanesi çözüldü. "
+                                   f"{self.mathpix.stats_text()}, {self.solver.cache.stats_text()}")
+
+    def show_pipeline_error(self, message):
+        QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {message}")
 
     def capture_and_process(self):
         try:
-            ret, frame = self.kamera.read()
-            if ret:
-                self.process_with_mathpix(frame)
+            captured = self.kamera.latest()
+            if captured is not None:
+                self.process_with_mathpix(captured.image)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Kameradan işlem alınamadı: {str(e)}")
 
@@ -554,24 +419,44 @@ class MathOCRApp(QMainWindow):
                 frame = cv2.imdecode(np.fromfile(abs_path, dtype=np.uint8), cv2.IMREAD_COLOR)
                 if frame is None:
                     raise Exception("Görüntü okunamadı")
-                self.video_label.setPixmap(QPixmap(fname).scaled(
-                    self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                self.video_label.show_frame(frame)
                 self.process_with_mathpix(frame)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Resim yüklenemedi: {str(e)}")
 
     def clear_results(self):
+        self.video_label.clear_overlay()
         self.latex_label.clear()
         self.result_label.clear()
         self.statusBar.showMessage("Sonuçlar temizlendi")
 
     def update_frame(self):
-        ret, frame = self.kamera.read()
-        if ret:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image = QImage(rgb_frame, rgb_frame.shape[1], rgb_frame.shape[0], rgb_frame.strides[0], QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(image).scaled(
-                self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        # Yakalama iş parçacığındaki en yeni kare; yeni kare yoksa çizim yapılmaz
+        captured = self.kamera.latest(newer_than=self.shown_frame)
+        if captured is not None:
+            with span('camera.tick'):
+                self.video_label.show_frame(captured.image)
+                self.shown_frame = captured.index
+                self.kamera.shown(captured)
+                startup.mark('first_frame')
+                # Önceki işlem sürerken kareler değerlendirilmez; bitince yeniden N sabit kare beklenir
+                if self.auto_button.isChecked() and not self.active_workers and self.auto_capture.update(captured.image):
+                    self.statusBar.showMessage("Net ve sabit kare yakalandı, işleniyor...")
+                    self.process_with_mathpix(captured.image)
+
+    def toggle_auto_capture(self, checked):
+        self.auto_capture.reset()
+        self.statusBar.showMessage("Otomatik yakalama açık" if checked else "Otomatik yakalama kapalı")
+
+    def update_camera_stats(self):
+        text = self.kamera.stats_text()
+        if self.auto_button.isChecked():
+            text += " | " + self.auto_capture.status_text()
+        self.camera_stats.setText(text)
+        self.trace_stats.setText(tracer.status_text())
+        self.trace_stats.setToolTip(tracer.table_text())
+        if self.metrics_path:
+            tracer.dump(self.metrics_path)
 
     def closeEvent(self, event):
         reply = QMessageBox.question(self, 'Çıkış',
@@ -579,6 +464,9 @@ class MathOCRApp(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.kamera.release()
+            self.mathpix.close()
+            self.history.close()
+            self.solver.close()
             event.accept()
         else:
             event.ignore()
@@ -587,4 +475,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MathOCRApp()
     window.show()
+    startup.preload()
     sys.exit(app.exec_())
@@ -0,0 +1,68 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+class AutoCapture:
+    """Decides when a camera frame is worth sending to Mathpix on its own.
+
+    Every frame is reduced to a small grey thumbnail. Sharpness is the variance
+    of its Laplacian, motion the mean absolute difference from the previous
+    thumbnail. ``update`` returns True once ``stable_frames`` frames in a row were
+    sharp and still. After firing it waits ``cooldown`` seconds, and it will
+    not fire again while the view still looks like the page it last sent
+    (mean difference below ``dedup``). Unset thresholds come from the
+    ``MATHOCR_AUTO_*`` environment variables.
+    """
+
+    def __init__(self, sharpness=None, motion=None, stable_frames=None, cooldown=None, dedup=None,
+                 size=(160, 120)):
+        self.sharpness = sharpness if sharpness is not None else float(os.getenv("MATHOCR_AUTO_SHARPNESS", "80"))
+        self.motion = motion if motion is not None else float(os.getenv("MATHOCR_AUTO_MOTION", "3"))
+        self.stable_frames = stable_frames or int(os.getenv("MATHOCR_AUTO_FRAMES", "8"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("MATHOCR_AUTO_COOLDOWN", "3"))
+        self.dedup = dedup if dedup is not None else float(os.getenv("MATHOCR_AUTO_DEDUP", "8"))
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.stable = 0
+        self.last_sharpness = 0.0
+        self.last_motion = 0.0
+        self._previous = None
+        self._fired = None
+        self._fired_at = float('-inf')
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+    def update(self, frame, now=None):
+        """Feeds one BGR frame; True means "process this one"."""
+        now = time.perf_counter() if now is None else now
+        thumb = self._thumbnail(frame)
+        self.last_sharpness = cv2.Laplacian(thumb, cv2.CV_32F).var()
+        self.last_motion = (float(np.mean(cv2.absdiff(thumb, self._previous)))
+                            if self._previous is not None else float('inf'))
+        self._previous = thumb
+
+        if self.last_sharpness >= self.sharpness and self.last_motion <= self.motion:
+            self.stable += 1
+        else:
+            self.stable = 0
+        if self.stable < self.stable_frames or now - self._fired_at < self.cooldown:
+            return False
+        # Aynı sayfa hâlâ görüntüde: yeniden gönderme
+        if self._fired is not None and float(np.mean(cv2.absdiff(thumb, self._fired))) < self.dedup:
+            return False
+        self._fired = thumb
+        self._fired_at = now
+        self.stable = 0
+        return True
+
+    def status_text(self):
+        return (f"Otomatik: netlik {self.last_sharpness:.0f}/{self.sharpness:.0f}, "
+                f"hareket {self.last_motion:.1f}/{self.motion:.1f}, "
+                f"sabit {self.stable}/{self.stable_frames}")
@@ -0,0 +1,235 @@
+"""Headless batch runner: Mathpix OCR + SymPy over a directory or glob of images.
+
+    python batch.py taramalar/ "sayfalar/*.png" -o sonuclar.jsonl --ocr-workers 8 --solve-workers 4
+
+Mathpix calls run on a bounded thread pool, SymPy runs in a SolverPool of
+killable worker processes (``--solve-timeout`` seconds per expression) and
+every finished image is appended to the output as one JSON line. Paths that
+already appear in the output are skipped, so an interrupted run can simply be
+started again with the same arguments. With ``--retry-errors`` failed images
+are processed again and their old error lines are removed from the output
+first, so every path appears once.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from latex_normalize import clean_mathpix_latex
+from mathpix_client import MathpixClient
+from ocr_backends import BACKENDS, create_backend
+from ocr_cache import OCRCache
+from preprocess import DEFAULT_SPEC, Preprocessor
+from solver import format_result_latex, parse_problem
+from solver_cache import SolverCache
+from solver_pool import MODES, SolverPool
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def find_images(inputs):
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths.update(p for p in glob.glob(item, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def load_done(output, retry_errors=False):
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Yarıda kesilmiş son satır
+            if retry_errors and record.get('error'):
+                continue
+            done.add(record['path'])
+    return done
+
+
+def drop_errors(output, paths):
+    """Rewrites ``output`` without the error records of ``paths``, which are about to be retried."""
+    if not os.path.exists(output):
+        return
+    kept = []
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Yarıda kesilmiş son satır
+            if not (record.get('error') and record['path'] in paths):
+                kept.append(line if line.endswith('\n') else line + '\n')
+    temp = output + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+    os.replace(temp, output)
+
+
+def ocr_image(path, preprocessor, client):
+    record = {'path': path, 'latex_styled': None, 'latex': None, 'result_latex': None, 'method': None,
+              'timings': {}, 'error': None}
+    timings = record['timings']
+    try:
+        start = time.perf_counter()
+        frame = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Görüntü okunamadı")
+        timings['read_ms'] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        buffer, mime = preprocessor.process(frame)
+        timings['preprocess_ms'] = (time.perf_counter() - start) * 1000
+
+        ocr_start = time.perf_counter()
+        result = client.recognize(buffer, frame, mime)
+        timings['ocr_ms'] = (time.perf_counter() - ocr_start) * 1000
+        if client.last_upload is not None:
+            preprocessor.record(len(buffer), time.perf_counter() - start)
+
+        if 'latex_styled' not in result:
+            raise ValueError(result.get('error', "Mathpix çözümleme başarısız."))
+        record['latex_styled'] = result['latex_styled']
+
+        start = time.perf_counter()
+        record['latex'] = clean_mathpix_latex(result['latex_styled'])
+        timings['clean_ms'] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        record['error'] = str(e)
+    return record
+
+
+# Çözüm iş parçacığında çalışır; ağır SymPy işi SolverPool sürecindedir
+def solve_job(solver, latex_expr):
+    start = time.perf_counter()
+    method = None
+    try:
+        outcome = solver.solve(parse_problem(latex_expr))
+        if outcome['status'] == 'ok':
+            method = outcome['method']
+            result_latex, error = format_result_latex(outcome['result'], method), None
+        else:
+            result_latex, error = None, outcome['error']
+    except Exception as e:
+        result_latex, error = None, str(e)
+    return result_latex, method, error, (time.perf_counter() - start) * 1000
+
+
+def run(paths, output, client, preprocessor, ocr_workers, solve_workers, solve_timeout=10.0,
+        solve_cache=None, solve_mode='race'):
+    solver = SolverPool(solve_workers, solve_timeout, cache=solve_cache, mode=solve_mode)
+    try:
+        _run(paths, output, client, preprocessor, ocr_workers, solve_workers, solver)
+        print(preprocessor.stats_text(), file=sys.stderr)
+        if solve_cache is not None:
+            print(solve_cache.stats_text(), file=sys.stderr)
+    finally:
+        solver.close()
+
+
+def _run(paths, output, client, preprocessor, ocr_workers, solve_workers, solver):
+    total = len(paths)
+    remaining = iter(paths)
+    finished = 0
+    pending_ocr = set()
+    pending_solve = {}
+
+    with ThreadPoolExecutor(ocr_workers) as ocr_pool, \
+            ThreadPoolExecutor(solve_workers) as solve_pool, \
+            open(output, 'a', encoding='utf-8') as out:
+
+        def fill():
+            # Bellekte sınırlı sayıda görüntü tut
+            while len(pending_ocr) < ocr_workers * 2 and len(pending_solve) < solve_workers * 4:
+                path = next(remaining, None)
+                if path is None:
+                    return
+                pending_ocr.add(ocr_pool.submit(ocr_image, path, preprocessor, client))
+
+        def write(record):
+            nonlocal finished
+            finished += 1
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            status = f"HATA: {record['error']}" if record['error'] else "tamam"
+            print(f"[{finished}/{total}] {record['path']} {status}", file=sys.stderr)
+
+        fill()
+        while pending_ocr or pending_solve:
+            done, _ = wait(pending_ocr | set(pending_solve), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in pending_ocr:
+                    pending_ocr.discard(future)
+                    record = future.result()
+                    if record['error']:
+                        write(record)
+                    else:
+                        pending_solve[solve_pool.submit(solve_job, solver, record['latex'])] = record
+                else:
+                    record = pending_solve.pop(future)
+                    try:
+                        record['result_latex'], record['method'], record['error'], record['timings']['solve_ms'] = \
+                            future.result()
+                    except Exception as e:
+                        record['error'] = f"Çözücü süreci hatası: {e}"
+                    write(record)
+            fill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Görüntü klasörünü Mathpix + SymPy ile JSON Lines'a işler.")
+    parser.add_argument('inputs', nargs='+', help="Görüntü klasörleri, dosyaları veya glob kalıpları")
+    parser.add_argument('-o', '--output', default='sonuclar.jsonl')
+    parser.add_argument('--ocr-workers', type=int, default=8, help="Eşzamanlı Mathpix isteği sayısı")
+    parser.add_argument('--solve-workers', type=int, default=os.cpu_count() or 2, help="SymPy süreç sayısı")
+    parser.add_argument('--solve-timeout', type=float, default=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")),
+                        help="İfade başına SymPy süre sınırı (sn)")
+    parser.add_argument('--solve-mode', choices=MODES, default=os.getenv("MATHOCR_SOLVE_MODE", "race"),
+                        help="exact: yalnızca SymPy; numeric: önce mpmath; race: ikisi yarışır")
+    parser.add_argument('--preprocess', default=os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+    parser.add_argument('--upload-mode', default=os.getenv("MATHOCR_UPLOAD_MODE", "multipart"),
+                        choices=['multipart', 'json'])
+    parser.add_argument('--no-cache', action='store_true', help="Mathpix yanıt ve SymPy sonuç önbelleklerini kullanma")
+    parser.add_argument('--retry-errors', action='store_true', help="Hatalı kayıtları yeniden işle")
+    parser.add_argument('--ocr-backend', choices=BACKENDS, default=os.getenv("MATHOCR_OCR_BACKEND", "live"),
+                        help="live: Mathpix; record: Mathpix + kasete yaz; replay: yalnızca kasetten oku")
+    parser.add_argument('--cassette', default=os.getenv("MATHOCR_CASSETTE"), help="Kaset dosyası (.jsonl veya .jsonl.gz)")
+    args = parser.parse_args(argv)
+
+    app_id = os.getenv("MATHPIX_APP_ID")
+    app_key = os.getenv("MATHPIX_APP_KEY")
+    if args.ocr_backend != 'replay' and (not app_id or not app_key):
+        parser.error("MATHPIX_APP_ID / MATHPIX_APP_KEY ortam değişkenleri tanımlı değil.")
+
+    done = load_done(args.output, args.retry_errors)
+    paths = [p for p in find_images(args.inputs) if p not in done]
+    print(f"{len(paths)} görüntü işlenecek ({len(done)} tanesi zaten çıktı dosyasında).", file=sys.stderr)
+    if args.retry_errors:
+        drop_errors(args.output, set(paths))
+
+    client = create_backend(args.ocr_backend, lambda: MathpixClient(
+        app_id, app_key, pool_size=args.ocr_workers, cache=None if args.no_cache else OCRCache(),
+        upload_mode=args.upload_mode), args.cassette)
+    try:
+        run(paths, args.output, client, Preprocessor.from_spec(args.preprocess),
+            args.ocr_workers, args.solve_workers, args.solve_timeout,
+            None if args.no_cache else SolverCache(), args.solve_mode)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
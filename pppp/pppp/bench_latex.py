@@ -0,0 +1,166 @@
+"""Micro-benchmark: LaTeX cleanup and LaTeX-to-SymPy parsing on a recorded corpus.
+
+    python bench_latex.py [--corpus corpus/latex_styled.txt | sonuclar.jsonl] [--number 200]
+
+The corpus is either a text file with one Mathpix ``latex_styled`` string per
+line, a batch.py JSON Lines output or an ``ocr_backends`` cassette. Each string is cleaned and parsed by
+
+* ``legacy``: the replace/re.sub chain + ``sp.sympify`` that parse_problem used,
+* ``parse_latex``: SymPy's ANTLR parser (needs ``antlr4-python3-runtime``),
+* ``latex_parser``: the recursive-descent parser,
+
+and the per-string time, the number of strings each one could parse and the
+number whose result agrees with ``parse_latex`` are printed, followed by the
+strings on which ``latex_parser`` and ``parse_latex`` disagree.
+"""
+import argparse
+import json
+import os
+import re
+import time
+import timeit
+
+import sympy as sp
+
+from latex_normalize import clean_mathpix_latex
+from latex_parser import parse_latex_expr
+from ocr_backends import read_cassette
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'latex_styled.txt')
+NAMED_CONSTANTS = {'e': sp.E, 'pi': sp.pi}
+
+
+def load_corpus(path):
+    if path.endswith('.gz'):
+        return [r['response']['latex_styled'] for r in read_cassette(path)
+                if r.get('response', {}).get('latex_styled')]
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            records = (json.loads(line) for line in f if line.strip())
+            # batch.py çıktısı ya da ocr_backends kaseti ({'response': {...}})
+            records = (r.get('response', r) for r in records)
+            return [r['latex_styled'] for r in records if r.get('latex_styled')]
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def legacy_clean_mathpix_latex(latex_expr):
+    latex_expr = latex_expr.replace(r'\begin{array}{}', '')
+    latex_expr = latex_expr.replace(r'\end{array}', '')
+    latex_expr = latex_expr.replace(r'\\', '')
+    latex_expr = latex_expr.replace(r'\text{ integral }', '')
+    latex_expr = latex_expr.replace(r'd x', 'dx')
+    latex_expr = latex_expr.replace(r'\,', '')
+    return latex_expr.strip()
+
+
+def legacy_parse(expr_str):
+    """The fallback chain from the limit branch of apideneme.py, kept only for comparison."""
+    expr_str = expr_str.replace('\\left(', '(').replace('\\right)', ')')
+    expr_str = expr_str.replace('\\log', 'ln')
+    expr_str = expr_str.replace('\\left|', 'Abs(').replace('\\right|', ')')
+
+    def replace_fraction(match):
+        return f"({match.group(1).strip()})/({match.group(2).strip()})"
+
+    # Eski döngü; iç içe kesirlerde her seviye için dizinin tamamı yeniden taranır
+    for _ in range(100):
+        if '\\frac' not in expr_str:
+            break
+        expr_str = re.sub(r'\\frac\{([^{}]+|(?:\{[^{}]*\})+)\}\{([^{}]+|(?:\{[^{}]*\})+)\}',
+                          replace_fraction, expr_str)
+    expr_str = re.sub(r'x\^{(\d+)}', r'x**\1', expr_str)
+    expr_str = re.sub(r'(\d+)\s*x', r'\1*x', expr_str)
+    return sp.sympify(expr_str.replace(' ', ''), locals={'x': sp.Symbol('x')})
+
+
+def nested_fraction(depth):
+    latex = 'x'
+    for i in range(depth):
+        latex = rf'\frac{{{latex}}}{{x+{i}}}'
+    return latex
+
+
+def load_parsers():
+    parsers = {'legacy': legacy_parse}
+    try:
+        start = time.perf_counter()
+        from sympy.parsing.latex import parse_latex
+        parse_latex('x')
+        print(f"parse_latex yükleme: {(time.perf_counter() - start) * 1000:.0f} ms")
+        parsers['parse_latex'] = parse_latex
+    except Exception as e:  # antlr4 kurulu değil
+        print("parse_latex kullanılamıyor:", e)
+    parsers['latex_parser'] = parse_latex_expr
+    return parsers
+
+
+def run_parser(parse, latex):
+    try:
+        return parse(latex)
+    except Exception:  # Her ayrıştırıcının kendi hata türleri var
+        return None
+
+
+def agrees(result, reference):
+    """Whether two parses are the same expression, up to symbol assumptions and simplification."""
+    if result is None or reference is None:
+        return False
+    # Ayrıştırıcılar sembollere farklı varsayımlar koyabilir; yalnızca adları karşılaştırılır.
+    # parse_latex e ve \pi'yi sembol olarak bırakır
+    rename = {s: NAMED_CONSTANTS.get(s.name, sp.Symbol(s.name))
+              for s in result.free_symbols | reference.free_symbols}
+    result, reference = result.xreplace(rename), reference.xreplace(rename)
+    if result == reference:
+        return True
+    try:
+        return sp.simplify(result - reference) == 0
+    except Exception:  # Eq gibi çıkarılamayan ifadeler
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    cleaned = [clean_mathpix_latex(latex) for latex in corpus]
+    print(f"{len(corpus)} örnek: {args.corpus}")
+
+    legacy_us = min(timeit.repeat(lambda: [legacy_clean_mathpix_latex(s) for s in corpus],
+                                  number=args.number, repeat=5)) * 1e6 / args.number / len(corpus)
+    new_us = min(timeit.repeat(lambda: [clean_mathpix_latex(s) for s in corpus],
+                               number=args.number, repeat=5)) * 1e6 / args.number / len(corpus)
+    print(f"temizleme: eski {legacy_us:.2f} µs, yeni {new_us:.2f} µs / örnek\n")
+
+    parsers = load_parsers()
+    results = {name: [run_parser(parse, s) for s in cleaned] for name, parse in parsers.items()}
+    reference = results.get('parse_latex')
+    print(f"{'ayrıştırıcı':<14} {'µs/örnek':>10} {'başarılı':>9} {'parse_latex ile aynı':>21}")
+    for name, parse in parsers.items():
+        number = max(args.number // 20, 3)
+        seconds = min(timeit.repeat(lambda: [run_parser(parse, s) for s in cleaned], number=number, repeat=3))
+        ok = sum(result is not None for result in results[name])
+        same = '-' if reference is None else \
+            f"{sum(agrees(r, ref) for r, ref in zip(results[name], reference))}/{len(cleaned)}"
+        print(f"{name:<14} {seconds * 1e6 / number / len(cleaned):10.1f} {ok:>5}/{len(cleaned)} {same:>21}")
+
+    if reference is not None:
+        differing = [(latex, result, ref) for latex, result, ref in zip(cleaned, results['latex_parser'], reference)
+                     if ref is not None and not agrees(result, ref)]
+        if differing:
+            print(f"\nlatex_parser ile parse_latex {len(differing)} örnekte ayrışıyor:")
+            for latex, result, ref in differing:
+                print(f"  {latex}\n    latex_parser: {result}\n    parse_latex:  {ref}")
+
+    print(f"\n{'iç içe kesir':<14}" + ''.join(f"{name:>14}" for name in parsers))
+    for depth in (4, 16, 48):
+        latex = nested_fraction(depth)
+        times = [min(timeit.repeat(lambda: run_parser(parse, latex), number=5, repeat=3)) * 1e6 / 5
+                 for parse in parsers.values()]
+        print(f"{'derinlik ' + str(depth):<14}" + ''.join(f"{t:14.0f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
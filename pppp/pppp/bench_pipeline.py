@@ -0,0 +1,182 @@
+"""End-to-end benchmark: encode, HTTP, clean, parse, solve and render against a Mathpix stand-in.
+
+    python bench_pipeline.py [görüntüler...] [--requests 100] [--concurrency 1 4 8] [--latency 0.3 --jitter 0.1]
+    python bench_pipeline.py --url http://127.0.0.1:8765 --save sonuc.json
+
+By default a ``mathpix_stub`` server is started in-process with the given
+latency, jitter and error rate; ``--url`` points the client at a server that
+is already running instead. Every request runs the same stages as the apps'
+``solve_image`` on a thread pool of ``concurrency`` threads, with SymPy in a
+``SolverPool`` of as many processes. The OCR and SymPy caches are off and
+renders bypass the render cache, so every stage really runs. For each
+concurrency level the throughput and the p50/p95/p99 of every stage (from
+``tracing``) are printed and, with ``--save``, written as JSON.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from batch import find_images
+from bench_latex import DEFAULT_CORPUS
+from latex_normalize import clean_mathpix_latex
+from latex_render import render_latex_image
+from mathpix_client import MathpixClient
+import mathpix_stub
+from preprocess import DEFAULT_SPEC, Preprocessor
+from solver import format_result_latex, parse_problem
+from solver_pool import MODES, SolverPool
+from tracing import span, tracer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_IMAGES = sorted(glob.glob(os.path.join(HERE, '*.PNG')))
+STAGES = ('pipeline', 'preprocess', 'ocr', 'mathpix.post', 'clean', 'parse', 'solve', 'render')
+
+
+def run_one(frame, preprocessor, client, solver, render=True):
+    """One capture through every stage; raises on an OCR, solver or render failure."""
+    with span('pipeline'):
+        with span('preprocess'):
+            buffer, mime = preprocessor.process(frame)
+        with span('ocr'):
+            result = client.recognize(buffer, frame, mime)
+        if 'latex_styled' not in result:
+            raise ValueError(result.get('error', "Mathpix çözümleme başarısız."))
+        with span('clean'):
+            latex_expr = clean_mathpix_latex(result['latex_styled'])
+        with span('parse'):
+            problem = parse_problem(latex_expr)
+        with span('solve'):
+            outcome = solver.solve(problem)
+        if outcome['status'] != 'ok':
+            raise ValueError(f"SymPy: {outcome['error']}")
+        if render:
+            with span('render'):
+                render_latex_image(latex_expr, cache=None)
+                render_latex_image(format_result_latex(outcome['result']), cache=None)
+
+
+def run_level(frames, requests, concurrency, preprocessor, client, solver, render):
+    def job(i):
+        try:
+            run_one(frames[i % len(frames)], preprocessor, client, solver, render)
+            return None
+        except Exception as e:
+            return str(e).splitlines()[0] if str(e) else type(e).__name__
+
+    # İstemcinin her yüklemede yazdığı satırlar çıktıyı boğmasın
+    with ThreadPoolExecutor(concurrency) as pool, contextlib.redirect_stdout(io.StringIO()):
+        # Isınma: süreçler başlasın, bağlantılar açılsın; ölçüme katılmaz
+        list(pool.map(job, range(concurrency)))
+        tracer.reset()
+        start = time.perf_counter()
+        errors = list(pool.map(job, range(requests)))
+        seconds = time.perf_counter() - start
+
+    failures = [e for e in errors if e]
+    stats = tracer.snapshot()
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'ok': requests - len(failures),
+        'errors': len(failures),
+        'error_samples': sorted(set(failures))[:5],
+        'seconds': seconds,
+        'throughput': (requests - len(failures)) / seconds,
+        'stages': {name: {key: (value * 1000 if key.startswith('p') else value)
+                          for key, value in stats[name].items() if key != 'sum'}
+                   for name in STAGES if name in stats},
+    }
+
+
+def print_level(level):
+    print(f"\neşzamanlılık {level['concurrency']}: {level['requests']} istek, {level['ok']} başarılı, "
+          f"{level['errors']} hata, {level['seconds']:.2f} sn, {level['throughput']:.2f} istek/sn")
+    print(f"  {'aşama':<14}{'p50':>9}{'p95':>9}{'p99':>9}  ms")
+    for name, stage in level['stages'].items():
+        print(f"  {name:<14}{stage['p50']:9.1f}{stage['p95']:9.1f}{stage['p99']:9.1f}")
+    for message in level['error_samples']:
+        print("  hata:", message)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='*', help="Görüntü klasörleri, dosyaları veya glob kalıpları")
+    parser.add_argument('--requests', type=int, default=100, help="Her eşzamanlılık düzeyinde istek sayısı")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--url', help="Çalışan bir sunucunun taban adresi; verilmezse taklit sunucu başlatılır")
+    parser.add_argument('--responses', nargs='*', default=[DEFAULT_CORPUS], help="Taklit sunucunun yanıtları")
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--preprocess', default=os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+    parser.add_argument('--solve-timeout', type=float, default=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")))
+    parser.add_argument('--solve-mode', choices=MODES, default=os.getenv("MATHOCR_SOLVE_MODE", "race"))
+    parser.add_argument('--no-render', action='store_true', help="Çizim aşamasını atla")
+    parser.add_argument('--save', help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    paths = find_images(args.images) if args.images else SAMPLE_IMAGES
+    frames = [cv2.imdecode(np.fromfile(p, dtype=np.uint8), cv2.IMREAD_COLOR) for p in paths]
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        parser.error("Okunabilir görüntü yok.")
+
+    server = None
+    state = None
+    url = args.url
+    if url is None:
+        by_digest, pool = mathpix_stub.load_responses(args.responses)
+        state = mathpix_stub.StubState(by_digest, pool, args.latency, args.jitter, args.error_rate, seed=args.seed)
+        server, url = mathpix_stub.start(state)
+    print(f"{len(frames)} görüntü, sunucu {url}")
+
+    workers = max(args.concurrency)
+    client = MathpixClient(os.getenv("MATHPIX_APP_ID", "bench"), os.getenv("MATHPIX_APP_KEY", "bench"),
+                           url=url.rstrip('/') + '/v3/text', pool_size=workers)
+    solver = SolverPool(workers=workers, timeout=args.solve_timeout, mode=args.solve_mode)
+    preprocessor = Preprocessor.from_spec(args.preprocess)
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            level = run_level(frames, args.requests, concurrency, preprocessor, client, solver, not args.no_render)
+            print_level(level)
+            levels.append(level)
+    finally:
+        client.close()
+        solver.close()
+        if server is not None:
+            server.shutdown()
+
+    if args.save:
+        report = {
+            'created': time.time(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'url': url if args.url else None,
+            'stub': None if state is None else {'latency': args.latency, 'jitter': args.jitter,
+                                                'error_rate': args.error_rate, 'counts': state.counts},
+            'images': [os.path.basename(p) for p in paths],
+            'preprocess': args.preprocess,
+            'solve_mode': args.solve_mode,
+            'render': not args.no_render,
+            'levels': levels,
+        }
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nSonuçlar {args.save} dosyasına yazıldı.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
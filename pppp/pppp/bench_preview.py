@@ -0,0 +1,76 @@
+"""Benchmark: CPU time per camera preview frame, old QLabel path vs VideoPreview.
+
+    python bench_preview.py [--frames 300] [--size 640x480 --size 1280x720]
+
+Each frame is pushed through the whole preview step and painted with
+``repaint()``: the old ``cvtColor`` + ``QImage`` + ``QPixmap`` +
+``SmoothTransformation`` scale + ``setPixmap``, against
+``VideoPreview.show_frame``. The widgets are 800x450 with the apps' style
+sheet. CPU is ``time.process_time`` (all threads, including Qt's).
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from preview import VideoPreview
+
+SAMPLE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '5.PNG')
+STYLE = "background-color: #2d3436; border-radius: 10px; border: 2px solid #636e72; padding: 10px;"
+
+
+def legacy_step(label, frame):
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image = QImage(rgb_frame, rgb_frame.shape[1], rgb_frame.shape[0], rgb_frame.strides[0], QImage.Format_RGB888)
+    label.setPixmap(QPixmap.fromImage(image).scaled(label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    label.repaint()
+
+
+def preview_step(widget, frame):
+    widget.show_frame(frame)
+    widget.repaint()
+
+
+def measure(step, widget, frames):
+    for frame in frames[:10]:  # Isınma
+        step(widget, frame)
+    cpu, wall = time.process_time(), time.perf_counter()
+    for frame in frames:
+        step(widget, frame)
+    return ((time.process_time() - cpu) * 1000 / len(frames),
+            (time.perf_counter() - wall) * 1000 / len(frames))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--size', action='append', help="Kare boyutu, GENxYÜK")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    sample = cv2.imread(SAMPLE_IMAGE)
+    print(f"{'kare':<10} {'yol':<14} {'CPU ms/kare':>12} {'süre ms/kare':>13}")
+    for size in args.size or ['640x480', '1280x720']:
+        width, height = map(int, size.split('x'))
+        base = cv2.resize(sample, (width, height))
+        # Her kare farklı olsun: önbelleğe alınmış piksellerle ölçmeyelim
+        frames = [cv2.add(base, (i % 50, 0, 0, 0)) for i in range(args.frames)]
+        for name, widget_type, step in (('QLabel', QLabel, legacy_step), ('VideoPreview', VideoPreview, preview_step)):
+            widget = widget_type()
+            widget.setAlignment(Qt.AlignCenter)
+            widget.setStyleSheet(STYLE)
+            widget.resize(800, 450)
+            widget.show()
+            app.processEvents()
+            cpu, wall = measure(step, widget, frames)
+            print(f"{size:<10} {name:<14} {cpu:12.2f} {wall:13.2f}")
+            widget.close()
+
+
+if __name__ == "__main__":
+    main()
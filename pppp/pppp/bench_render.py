@@ -0,0 +1,94 @@
+"""Benchmark: LaTeX rendering to QImage, renders per second.
+
+    python bench_render.py [--corpus corpus/latex_styled.txt | sonuclar.jsonl] [--seconds 3] [--save-dir out/]
+
+Compares the old path (Figure + FigureCanvasAgg, ``savefig`` to PNG in a
+BytesIO, ``QImage.fromData``) with ``render_latex_image``'s mathtext
+rasteriser. The render cache is bypassed so every call really draws.
+``--save-dir`` writes both images of every string for a visual check.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+from matplotlib.mathtext import MathTextParser
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from bench_latex import DEFAULT_CORPUS, load_corpus
+from latex_normalize import clean_mathpix_latex
+from latex_render import render_latex_image
+
+
+def legacy_render(latex_str, fontsize=20, color='#dfe6e9', facecolor='#2d3436'):
+    """The Figure + savefig + QImage.fromData path, kept only for comparison."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+
+    fig = Figure(figsize=(8, 2))
+    fig.patch.set_facecolor(facecolor)
+    canvas = FigureCanvas(fig)
+    fig.text(0.5, 0.5, f"${latex_str}$",
+             horizontalalignment='center',
+             verticalalignment='center',
+             fontsize=fontsize,
+             color=color)
+    canvas.draw()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, facecolor=facecolor)
+    return QImage.fromData(buf.getvalue())
+
+
+def mathtext_render(latex_str):
+    # mathtext'in kendi 50'lik ayrıştırma önbelleği de boşaltılır: her çağrı soğuk ölçülür
+    MathTextParser._parse_cached.cache_clear()
+    return render_latex_image(latex_str, cache=None)
+
+
+def renders_per_second(render, corpus, seconds):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for latex in corpus:
+            render(latex)
+        count += len(corpus)
+    return count / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--save-dir')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])  # QImage yazı tipleri için
+    corpus = []
+    for latex in map(clean_mathpix_latex, load_corpus(args.corpus)):
+        try:
+            legacy_render(latex)
+            mathtext_render(latex)
+        except ValueError as e:  # mathtext'in desteklemediği komutlar
+            print("Atlandı:", latex, "-", str(e).splitlines()[0])
+            continue
+        corpus.append(latex)
+    print(f"{len(corpus)} örnek: {args.corpus}")
+
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+        for i, latex in enumerate(corpus):
+            legacy_render(latex).save(os.path.join(args.save_dir, f"{i:03d}_eski.png"))
+            mathtext_render(latex).save(os.path.join(args.save_dir, f"{i:03d}_yeni.png"))
+
+    rates = {}
+    for name, render in (('savefig+PNG', legacy_render), ('mathtext', mathtext_render)):
+        rates[name] = renders_per_second(render, corpus, args.seconds)
+        print(f"{name:<12} {rates[name]:8.1f} çizim/sn  {1000 / rates[name]:7.2f} ms/çizim")
+    print(f"hızlanma: {rates['mathtext'] / rates['savefig+PNG']:.1f}x")
+    del app
+
+
+if __name__ == "__main__":
+    main()
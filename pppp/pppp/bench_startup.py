@@ -0,0 +1,160 @@
+"""Start-up benchmark for the GUI entry points: import time, first frame, first result.
+
+    python bench_startup.py [apideneme fixed_mathocr_app api app] [--runs 3] [--save base.json]
+    python bench_startup.py --compare base.json     # >%20 (ve >50 ms) yavaşlama çıkış kodu 1 verir
+
+Every run is a fresh interpreter. The Mathpix reply for the sample image is
+put into a temporary OCR cache first, so "first result" measures our own
+start-up (imports, SymPy worker spawn, parsing, solving, rendering) and not
+the network. Without a camera a short synthetic clip stands in for it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+ENTRY_POINTS = ('apideneme', 'fixed_mathocr_app', 'api', 'app')
+SAMPLE_IMAGE = os.path.join(HERE, '5.PNG')
+SAMPLE_LATEX = r'\int_{0}^{1} x^{2} \sin x d x'
+METRICS = ('interpreter', 'import', 'window_shown', 'first_frame', 'first_result', 'preloaded')
+
+
+def prepare(workdir):
+    """Seeds the OCR cache with the sample image's reply and writes the stand-in camera clip."""
+    import cv2
+    from ocr_cache import OCRCache, image_digest
+    from preprocess import DEFAULT_SPEC, Preprocessor
+
+    frame = cv2.imread(SAMPLE_IMAGE)
+    buffer, _ = Preprocessor.from_spec(os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC)).process(frame)
+    cache = OCRCache(path=os.path.join(workdir, "ocr_cache.sqlite3"))
+    cache.put(image_digest(buffer), {'latex_styled': SAMPLE_LATEX})
+    cache.close()
+
+    clip = os.path.join(workdir, "kamera.avi")
+    writer = cv2.VideoWriter(clip, cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 480))
+    for _ in range(300):
+        writer.write(cv2.resize(frame, (640, 480)))
+    writer.release()
+    return clip
+
+
+def child(entry, clip):
+    started = time.perf_counter()
+    interpreter = time.time() - float(os.environ['BENCH_SPAWNED'])
+    sys.path[:0] = [HERE, ROOT]
+    module = __import__(entry)
+    imported = time.perf_counter()
+
+    import cv2
+    import startup
+    from camera import CameraCapture
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1])
+    window = module.MathOCRApp()
+    window.show()
+    startup.preload()
+    if not window.kamera.isOpened():
+        window.kamera.release()
+        window.kamera = CameraCapture(clip).start()
+
+    frame = cv2.imread(SAMPLE_IMAGE)
+    QTimer.singleShot(0, lambda: window.process_with_mathpix(frame))
+
+    def check():
+        done = all(name in startup.marks for name in ('first_frame', 'first_result', 'preloaded'))
+        if done or time.perf_counter() - started > 60:
+            app.quit()
+
+    poll = QTimer()
+    poll.timeout.connect(check)
+    poll.start(5)
+    app.exec_()
+
+    offset = startup.STARTED - started
+    result = {'interpreter': interpreter, 'import': imported - started}
+    for name in ('window_shown', 'first_frame', 'first_result', 'preloaded'):
+        if name in startup.marks:
+            result[name] = startup.marks[name] + offset
+    window.solver.close()
+    print("BENCH " + json.dumps(result))
+
+
+def run_once(entry, workdir, clip):
+    env = dict(os.environ, BENCH_SPAWNED=repr(time.time()), MATHOCR_CACHE_DIR=workdir,
+               MATHPIX_APP_ID=os.getenv("MATHPIX_APP_ID", "bench"),
+               MATHPIX_APP_KEY=os.getenv("MATHPIX_APP_KEY", "bench"))
+    if not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    # Her çalıştırmada çözüm önbelleği boş başlar
+    for name in ("solver_cache.sqlite3",):
+        path = os.path.join(workdir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', entry, '--clip', clip],
+                            env=env, capture_output=True, text=True, timeout=120).stdout
+    for line in output.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[6:])
+    raise RuntimeError(f"{entry} ölçüm satırı üretmedi:\n{output[-2000:]}")
+
+
+def compare(results, baseline, tolerance=0.2, slack=0.05):
+    regressions = []
+    for entry, metrics in results.items():
+        for name, value in metrics.items():
+            old = baseline.get(entry, {}).get(name)
+            if old is not None and value > old * (1 + tolerance) and value - old > slack:
+                regressions.append(f"{entry}.{name}: {old * 1000:.0f} ms -> {value * 1000:.0f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entries', nargs='*', default=list(ENTRY_POINTS))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--save', help="Medyanları JSON olarak kaydet")
+    parser.add_argument('--compare', help="Kaydedilmiş medyanlarla karşılaştır")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--clip', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.clip)
+        return 0
+
+    sys.path.insert(0, HERE)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        clip = prepare(workdir)
+        print(f"{'giriş':<18}" + ''.join(f"{name:>14}" for name in METRICS) + "   (ms, medyan)")
+        for entry in args.entries:
+            runs = [run_once(entry, workdir, clip) for _ in range(args.runs)]
+            results[entry] = {name: statistics.median(r[name] for r in runs)
+                              for name in METRICS if all(name in r for r in runs)}
+            print(f"{entry:<18}" + ''.join(
+                f"{results[entry][name] * 1000:14.0f}" if name in results[entry] else f"{'-':>14}"
+                for name in METRICS))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print("YAVAŞLAMA:", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
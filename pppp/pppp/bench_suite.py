@@ -0,0 +1,359 @@
+"""Benchmark suite: clean, parse, solve and render timed per stage on a versioned corpus.
+
+    python bench_suite.py [--corpus corpus/suite_v2.jsonl] [--repeat 5] [--category limit ...] [--save sonuc.json]
+    python bench_suite.py --compare onceki.json              # çalıştır ve karşılaştır
+    python bench_suite.py --compare onceki.json sonraki.json  # yalnızca karşılaştır
+
+The corpus is JSON Lines, one Mathpix ``latex_styled`` string per line with
+an ``id``, a ``category`` (integral, definite_integral, limit,
+directional_limit, derivative, expression, malformed) and, except for most
+malformed OCR output, the ``expect``-ed answer in SymPy syntax, or the status
+(``parse_error``, ``error``, ``timeout``) a case has to end in. A changed
+corpus gets a new file name (``suite_v3.jsonl``); reports record its SHA-256.
+
+Every stage is timed on its own, ``--repeat`` times, and the minimum and
+median are kept:
+
+* ``clean``: ``clean_mathpix_latex``,
+* ``parse.latex_parser``: ``parse_problem`` as the apps use it,
+  ``parse.parse_latex``: SymPy's ANTLR parser (if installed) and
+  ``parse.sympify``: the old replace chain + ``sp.sympify`` fallback,
+* ``solve``: ``evaluate_problem``, after a first run in a ``SolverPool``
+  with ``--solve-timeout``, so one runaway case cannot stall the suite,
+  ``solve.numeric``: ``evaluate_numeric`` for definite integrals and limits
+  (its answer is checked against ``expect`` too, as ``numeric_correct``),
+* ``render.input`` / ``render.result``: ``render_latex_image`` of the
+  expression and of the answer, bypassing ``latex_render``'s cache and, where
+  this matplotlib version exposes it, mathtext's parse cache.
+
+SymPy's cache is cleared before every parse and solve, so each one is timed
+cold. The report is JSON with the commit, library versions and per-case
+results; ``--compare`` prints per-stage totals of the best times and the cases
+that got slower, faster or changed status between two reports.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import sympy as sp
+from sympy.core.cache import clear_cache
+
+from bench_latex import legacy_parse
+from latex_normalize import clean_mathpix_latex
+from solver import evaluate_numeric, evaluate_problem, format_result_latex, has_numeric_path, parse_problem
+from solver_pool import SolverPool
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SUITE_CORPUS = os.path.join(HERE, 'corpus', 'suite_v2.jsonl')
+STAGES = ('clean', 'parse.latex_parser', 'parse.parse_latex', 'parse.sympify', 'solve', 'solve.numeric',
+          'render.input', 'render.result')
+# Karşılaştırmada bu orandan ve 1 ms'den büyük farklar gösterilir (örnek başına en iyi süre)
+THRESHOLD = 1.5
+SAMPLE_POINTS = (0.37, 0.81, 1.43, 2.6)
+# expect bir yanıt yerine bu durumlardan birini de isteyebilir
+FAILURE_STATUSES = ('parse_error', 'error', 'timeout')
+
+
+def load_suite(path):
+    with open(path, encoding='utf-8') as f:
+        data = f.read()
+    cases = [json.loads(line) for line in data.splitlines() if line.strip()]
+    return cases, hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def measure(fn, repeat, setup=None):
+    """``{'min_ms', 'median_ms', 'number'}`` of ``fn()``; exceptions from ``fn`` propagate.
+
+    Calls shorter than a millisecond are looped so the clock resolution does
+    not dominate; ``setup`` runs untimed before every measured call.
+    """
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = 1 if setup is not None else max(1, min(1000, int(0.002 / max(first, 1e-7))))
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        samples.append(timeit.timeit(fn, number=number) / number)
+    return {'min_ms': min(samples) * 1000, 'median_ms': statistics.median(samples) * 1000, 'number': number}
+
+
+def matches(result, expect, problem):
+    """Whether ``result`` equals the expected answer, checked numerically at a few points.
+
+    Indefinite integrals may differ by a constant, so there the differences
+    are compared with the one at the first point.
+    """
+    expected = sp.sympify(expect)
+    if not (expected.is_finite is not False and result.is_finite is not False):
+        return result == expected  # oo, -oo, zoo
+    # Ayrıştırıcının sembolleri varsayım taşıyabilir; aynı adlı semboller aynı değeri alır
+    symbols = result.free_symbols | expected.free_symbols
+    names = sorted({s.name for s in symbols})
+    values = []
+    for point in SAMPLE_POINTS:
+        at = {s: point + 0.29 * names.index(s.name) for s in symbols}
+        values.append((complex(sp.N(result.subs(at))), complex(sp.N(expected.subs(at)))))
+    if problem.operation == 'integrate' and problem.bounds is None:
+        values = [(r - values[0][0], e - values[0][1]) for r, e in values[1:]]
+    return all(abs(r - e) <= 1e-7 * max(1.0, abs(e)) for r, e in values)
+
+
+def load_parsers():
+    parsers = {'parse.latex_parser': parse_problem, 'parse.sympify': legacy_parse}
+    try:
+        from sympy.parsing.latex import parse_latex
+        parse_latex('x')
+        parsers['parse.parse_latex'] = parse_latex
+    except Exception as e:  # antlr4 kurulu değil
+        print("parse_latex kullanılamıyor:", e, file=sys.stderr)
+    return parsers
+
+
+def load_renderer():
+    try:
+        from matplotlib.mathtext import MathTextParser
+        from PyQt5.QtWidgets import QApplication
+        from latex_render import render_latex_image
+    except ImportError as e:
+        print("Çizim aşaması atlanıyor:", e, file=sys.stderr)
+        return None, None, None
+    app = QApplication.instance() or QApplication(sys.argv[:1])  # QImage yazı tipleri için
+
+    def render(latex):
+        return render_latex_image(latex, cache=None)
+
+    # mathtext'in kendi ayrıştırma önbelleği de boşaltılır: her çizim soğuk ölçülür. Bu özel bir
+    # matplotlib ayrıntısıdır; bulunamazsa çizimler önbellekli (sıcak) ölçülür
+    clear = getattr(getattr(MathTextParser, '_parse_cached', None), 'cache_clear', None)
+    if clear is None:
+        print("Uyarı: mathtext önbelleği boşaltılamıyor, çizim süreleri sıcak ölçülecek", file=sys.stderr)
+    return render, clear, app
+
+
+def run_case(case, repeat, parsers, renderer, solver):
+    entry = {'id': case['id'], 'category': case['category'], 'status': 'ok', 'error': None,
+             'result': None, 'correct': None, 'numeric_correct': None, 'stages': {}}
+    stages = entry['stages']
+    expect = case.get('expect')
+    expect_failure = expect in FAILURE_STATUSES
+    expect_answer = expect is not None and not expect_failure
+
+    def fail(status, error):
+        entry['status'] = status
+        entry['error'] = str(error).splitlines()[0] if str(error) else type(error).__name__
+        if expect_failure:
+            entry['correct'] = status == expect
+        return entry
+
+    stages['clean'] = measure(lambda: clean_mathpix_latex(case['latex']), repeat)
+    cleaned = clean_mathpix_latex(case['latex'])
+
+    for name, parse in parsers.items():
+        try:
+            stages[name] = measure(lambda: parse(cleaned), repeat, setup=clear_cache)
+            stages[name]['ok'] = True
+        except Exception as e:  # Her ayrıştırıcının kendi hata türleri var
+            stages[name] = {'ok': False, 'error': str(e).splitlines()[0] if str(e) else type(e).__name__}
+    if not stages['parse.latex_parser']['ok']:
+        return fail('parse_error', stages['parse.latex_parser']['error'])
+    problem = parse_problem(cleaned)
+
+    if has_numeric_path(problem) and expect_answer:
+        try:
+            stages['solve.numeric'] = measure(lambda: evaluate_numeric(problem), repeat, setup=clear_cache)
+            entry['numeric_correct'] = bool(matches(evaluate_numeric(problem), case['expect'], problem))
+        except ValueError as e:  # Yakınsamadı: kesin yol gerekir
+            stages['solve.numeric'] = {'ok': False, 'error': str(e)}
+
+    outcome = solver.solve(problem)
+    if outcome['status'] != 'ok':
+        return fail(outcome['status'], outcome['error'])
+    result = outcome['result']
+    entry['result'] = str(result)
+    if expect_failure:
+        entry['correct'] = False
+    elif expect_answer:
+        try:
+            entry['correct'] = bool(matches(result, case['expect'], problem))
+        except Exception:  # Beklenen değer SymPy'ye çevrilemedi
+            entry['correct'] = False
+    stages['solve'] = measure(lambda: evaluate_problem(problem), repeat, setup=clear_cache)
+
+    render, clear_render = renderer
+    if render is not None:
+        for name, latex in (('render.input', cleaned), ('render.result', format_result_latex(result))):
+            try:
+                stages[name] = measure(lambda: render(latex), repeat, setup=clear_render)
+            except ValueError as e:  # mathtext'in desteklemediği komutlar
+                stages[name] = {'ok': False, 'error': str(e).splitlines()[0]}
+    return entry
+
+
+def summarize(cases):
+    """``{stage: {'total': {'n', 'min_ms', 'median_ms'}, <category>: {...}}}``: sums over the cases."""
+    summary = {}
+    for case in cases:
+        for stage, timing in case['stages'].items():
+            if 'median_ms' not in timing:
+                continue
+            for key in ('total', case['category']):
+                bucket = summary.setdefault(stage, {}).setdefault(key, {'n': 0, 'min_ms': 0.0, 'median_ms': 0.0})
+                bucket['n'] += 1
+                bucket['min_ms'] += timing['min_ms']
+                bucket['median_ms'] += timing['median_ms']
+    return summary
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=HERE,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def versions():
+    found = {'python': platform.python_version(), 'sympy': sp.__version__}
+    for name in ('mpmath', 'matplotlib', 'antlr4'):
+        try:
+            module = __import__(name)
+            found[name] = getattr(module, '__version__', 'kurulu')
+        except ImportError:
+            found[name] = None
+    return found
+
+
+def print_report(report):
+    summary = report['summary']
+    categories = sorted({c['category'] for c in report['cases']})
+    print(f"\n{'aşama (ms)':<20}{'toplam':>9}" + ''.join(f"{c[:11]:>12}" for c in categories))
+    for stage in STAGES:
+        if stage not in summary:
+            continue
+        row = summary[stage]
+        print(f"{stage:<20}{row['total']['median_ms']:9.2f}" +
+              ''.join(f"{row[c]['median_ms']:12.2f}" if c in row else f"{'-':>12}" for c in categories))
+
+    counts = {}
+    for case in report['cases']:
+        counts[case['status']] = counts.get(case['status'], 0) + 1
+    wrong = [c['id'] for c in report['cases'] if c['correct'] is False]
+    print("\ndurum: " + ", ".join(f"{status} {n}" for status, n in sorted(counts.items())))
+    if wrong:
+        print("beklenenden farklı sonuç:", ", ".join(wrong))
+
+
+def compare(old, new, threshold=THRESHOLD):
+    if old['corpus']['sha256'] != new['corpus']['sha256']:
+        print("Uyarı: derlemler farklı; yalnızca ortak örnekler karşılaştırılıyor.")
+    print(f"\n{old.get('commit') or '?'} -> {new.get('commit') or '?'}")
+    print(f"{'aşama (en iyi)':<20}{'önce ms':>10}{'sonra ms':>10}{'oran':>8}")
+    for stage in STAGES:
+        before = old['summary'].get(stage, {}).get('total')
+        after = new['summary'].get(stage, {}).get('total')
+        if before and after:
+            print(f"{stage:<20}{before['min_ms']:10.2f}{after['min_ms']:10.2f}"
+                  f"{after['min_ms'] / max(before['min_ms'], 1e-9):8.2f}")
+
+    old_cases = {c['id']: c for c in old['cases']}
+    changes = []
+    for case in new['cases']:
+        previous = old_cases.get(case['id'])
+        if previous is None:
+            continue
+        if (previous['status'], previous['correct']) != (case['status'], case['correct']):
+            changes.append(f"  {case['id']}: {previous['status']}/{previous['correct']} -> "
+                           f"{case['status']}/{case['correct']}")
+        for stage in STAGES:
+            a = previous['stages'].get(stage, {}).get('min_ms')
+            b = case['stages'].get(stage, {}).get('min_ms')
+            if a is None or b is None or abs(b - a) < 1.0:
+                continue
+            if b > a * threshold or a > b * threshold:
+                changes.append(f"  {case['id']} {stage}: {a:.1f} -> {b:.1f} ms ({b / a:.2f}x)")
+    if changes:
+        print(f"\nDeğişenler (>{threshold:g}x ve >1 ms ya da durum):")
+        print("\n".join(changes))
+    else:
+        print("\nÖrnek düzeyinde kayda değer değişiklik yok.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=SUITE_CORPUS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--category', nargs='+', help="Yalnızca bu kategoriler")
+    parser.add_argument('--solve-timeout', type=float, default=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")))
+    parser.add_argument('--no-render', action='store_true', help="Çizim aşamalarını atla")
+    parser.add_argument('--save', help="Rapor dosyası (varsayılan: suite-<commit>.json)")
+    parser.add_argument('--compare', nargs='+', metavar='RAPOR',
+                        help="Bir rapor: çalıştırıp onunla karşılaştır; iki rapor: yalnızca karşılaştır")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="Örnek düzeyinde gösterilecek en küçük oran")
+    args = parser.parse_args(argv)
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0], encoding='utf-8') as a, open(args.compare[1], encoding='utf-8') as b:
+            compare(json.load(a), json.load(b), args.threshold)
+        return
+
+    cases, digest = load_suite(args.corpus)
+    if args.category:
+        cases = [c for c in cases if c['category'] in args.category]
+    parsers = load_parsers()
+    render, clear_render, app = load_renderer() if not args.no_render else (None, None, None)
+    solver = SolverPool(workers=1, timeout=args.solve_timeout, mode='exact')
+    print(f"{len(cases)} örnek: {args.corpus}")
+
+    results = []
+    try:
+        for i, case in enumerate(cases, 1):
+            entry = run_case(case, args.repeat, parsers, (render, clear_render), solver)
+            mark = '' if entry['correct'] is not False else ' (beklenenden farklı)'
+            print(f"[{i}/{len(cases)}] {entry['id']}: {entry['status']}{mark}", file=sys.stderr)
+            results.append(entry)
+    finally:
+        solver.close()
+
+    commit, dirty = git_revision()
+    report = {
+        'created': time.time(),
+        'commit': commit,
+        'dirty': dirty,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'versions': versions(),
+        'corpus': {'path': os.path.basename(args.corpus), 'sha256': digest, 'cases': len(cases)},
+        'repeat': args.repeat,
+        'solve_timeout': args.solve_timeout,
+        'summary': summarize(results),
+        'cases': results,
+    }
+    print_report(report)
+
+    path = args.save or f"suite-{(commit or 'local')[:10]}{'-dirty' if dirty else ''}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nRapor {path} dosyasına yazıldı.", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            compare(json.load(f), report, args.threshold)
+    del app
+
+
+if __name__ == "__main__":
+    main()
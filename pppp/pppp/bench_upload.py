@@ -0,0 +1,70 @@
+"""Upload-body benchmark: multipart vs base64 JSON request size and build time per preprocessing setting.
+
+    python bench_upload.py [görüntüler...] [--preprocess "gray,crop,max=1600,png=3" off] [--repeat 20]
+
+Every image is preprocessed with each ``--preprocess`` spec and both request
+bodies are built with ``MathpixClient.compare_upload_modes``; nothing is sent,
+so no credentials or network are needed. For each spec the average encoded
+image size, the size of each body and the fastest build time over
+``--repeat`` runs are printed.
+"""
+import argparse
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from batch import find_images
+from mathpix_client import MathpixClient
+from preprocess import DEFAULT_SPEC, Preprocessor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_IMAGES = sorted(glob.glob(os.path.join(HERE, '*.PNG')))
+MODES = ('multipart', 'json')
+
+
+def measure(frames, preprocessor, client, repeat):
+    """Averages over ``frames`` of the image size and, per mode, body size and best build time."""
+    image_bytes = 0
+    totals = {mode: {'payload_bytes': 0, 'encode_ms': 0.0} for mode in MODES}
+    for frame in frames:
+        buffer, mime = preprocessor.process(frame)
+        image_bytes += len(buffer)
+        runs = [client.compare_upload_modes(buffer, mime) for _ in range(repeat)]
+        for mode in MODES:
+            totals[mode]['payload_bytes'] += runs[0][mode]['payload_bytes']
+            totals[mode]['encode_ms'] += min(run[mode]['encode_ms'] for run in runs)
+    count = len(frames)
+    return image_bytes / count, {mode: {key: value / count for key, value in entry.items()}
+                                 for mode, entry in totals.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='*', help="Görüntü dosyaları, klasörleri veya glob kalıpları")
+    parser.add_argument('--preprocess', nargs='+', default=[DEFAULT_SPEC, 'off'])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    paths = find_images(args.images) if args.images else SAMPLE_IMAGES
+    frames = [cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR) for path in paths]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        parser.error("Okunabilen görüntü yok")
+    print(f"{len(frames)} görüntü, her gövde {args.repeat} kez oluşturuldu (en iyi süre)\n")
+
+    client = MathpixClient('yok', 'yok')
+    print(f"{'ön işleme':<28} {'görüntü':>9} {'multipart':>10} {'ms':>6} {'json':>10} {'ms':>6}")
+    try:
+        for spec in args.preprocess:
+            image_bytes, report = measure(frames, Preprocessor.from_spec(spec), client, args.repeat)
+            print(f"{spec:<28} {image_bytes:9.0f} "
+                  + " ".join(f"{report[mode]['payload_bytes']:10.0f} {report[mode]['encode_ms']:6.2f}"
+                             for mode in MODES))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
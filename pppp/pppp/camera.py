@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+from tracing import tracer
+
+# Yakalama iş parçacığının ürettiği kare: görüntü, sıra numarası, perf_counter zamanı
+Frame = namedtuple('Frame', ['image', 'index', 'timestamp'])
+
+
+class CameraCapture:
+    """Reads a ``cv2.VideoCapture`` on a background thread into a small ring buffer.
+
+    ``read()`` blocks until the driver delivers the next frame, so it must not run
+    on the GUI thread. The capture thread keeps the last ``buffer_size`` frames,
+    each stamped with ``time.perf_counter()``; consumers only ever take the
+    newest one through ``latest()``. A frame that is overwritten before anyone
+    took it counts as dropped. ``shown(frame)`` records the capture-to-display
+    latency. Video files are paced to their own FPS and looped.
+    """
+
+    def __init__(self, source=0, buffer_size=3):
+        self.source = source
+        self.capture = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.frames = deque(maxlen=buffer_size)
+        self.captured = 0
+        self.dropped = 0
+        self._taken = -1
+        self._times = deque(maxlen=60)
+        self._latencies = deque(maxlen=60)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        frame_count = self.capture.get(cv2.CAP_PROP_FRAME_COUNT) if self.capture.isOpened() else 0
+        fps = self.capture.get(cv2.CAP_PROP_FPS) if frame_count > 0 else 0
+        self._interval = 1 / fps if fps > 0 else 0  # Kamera kendi hızında verir, dosya beklenir
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def start(self):
+        if self._thread is None and self.capture.isOpened():
+            self._thread = threading.Thread(target=self._run, name="CameraCapture", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            ok, image = self.capture.read()
+            if not ok:
+                if self._interval:  # Dosyanın sonu: başa sar
+                    self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self._stop.wait(0.01)
+                continue
+            now = time.perf_counter()
+            with self._lock:
+                if self.frames and self.frames[-1].index > self._taken:
+                    self.dropped += 1
+                self.frames.append(Frame(image, self.captured, now))
+                self.captured += 1
+                self._times.append(now)
+            if self._interval:
+                next_at = max(next_at + self._interval, now)
+                self._stop.wait(next_at - time.perf_counter())
+
+    def latest(self, newer_than=-1):
+        """Returns the newest Frame, or None if there is none newer than index ``newer_than``."""
+        with self._lock:
+            if not self.frames or self.frames[-1].index <= newer_than:
+                return None
+            frame = self.frames[-1]
+            self._taken = max(self._taken, frame.index)
+            return frame
+
+    def shown(self, frame):
+        """Records that ``frame`` reached the screen."""
+        latency = time.perf_counter() - frame.timestamp
+        tracer.record('camera.latency', latency)
+        with self._lock:
+            self._latencies.append(latency)
+
+    def stats(self):
+        with self._lock:
+            times = list(self._times)
+            latencies = list(self._latencies)
+            fps = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+            return {'fps': fps, 'captured': self.captured, 'dropped': self.dropped,
+                    'latency_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0}
+
+    def stats_text(self):
+        stats = self.stats()
+        return (f"Kamera: {stats['fps']:.1f} fps, {stats['dropped']} atlanan kare, "
+                f"gecikme {stats['latency_ms']:.0f} ms")
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.capture.release()
@@ -1,20 +1,33 @@
 import sys
 import cv2
-import base64
-import requests
-import sympy as sp
 import os
+import time
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QLabel, QPushButton, QVBoxLayout,
                              QWidget, QTextEdit, QHBoxLayout, QStatusBar,
                              QMessageBox, QMainWindow, QFileDialog, QFrame,
-                             QDialog, QScrollArea)
-from PyQt5.QtGui import QImage, QPixmap, QFont, QPainter, QColor
+                             QDialog)
+from PyQt5.QtGui import QPixmap, QFont, QPainter, QColor
 from PyQt5.QtCore import QTimer, Qt, QSize
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-import io
-from datetime import datetime
+
+from autocapture import AutoCapture
+from camera import CameraCapture
+from history_store import HistoryStore
+from history_view import history_list_view
+from latex_normalize import clean_mathpix_latex
+from latex_render import render_cache, render_latex_image
+from mathpix_client import MathpixClient
+from ocr_backends import create_backend
+from ocr_cache import OCRCache
+from preprocess import DEFAULT_SPEC, Preprocessor, timed_upload
+from preview import VideoPreview
+from profiling import CaptureProfiler
+from regions import find_equation_regions, solve_regions
+from solver_cache import SolverCache
+from solver_pool import SolverPool
+import startup
+from tracing import span, tracer
+from workers import start_worker
 
 class ModernButton(QPushButton):
     def __init__(self, text, parent=None, color="#2d3436", hover_color="#353b48", pressed_color="#2f3640"):
@@ -40,7 +53,7 @@ class ModernButton(QPushButton):
         self.setMinimumHeight(40)
 
 class HistoryDialog(QDialog):
-    def __init__(self, history_items, parent=None):
+    def __init__(self, history, parent=None):
         super().__init__(parent)
         self.setWindowTitle("İşlem Geçmişi")
         self.setGeometry(200, 200, 800, 600)
@@ -48,27 +61,16 @@ class HistoryDialog(QDialog):
             QDialog {
                 background-color: #1e272e;
             }
-            QLabel {
-                color: #dfe6e9;
-                font-size: 14px;
-            }
-            QScrollArea {
-                border: none;
-                background-color: #1e272e;
-            }
-            QWidget#scrollContent {
-                background-color: #1e272e;
-            }
         """)
 
         layout = QVBoxLayout(self)
         
-        # Scroll area for history items
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("""
-            QScrollArea {
+        # Only the visible rows are painted; thumbnails are loaded as they scroll into view
+        view = history_list_view(history, self)
+        view.setStyleSheet("""
+            QListView {
                 border: none;
+                background-color: #1e272e;
             }
             QScrollBar:vertical {
                 border: none;
@@ -85,61 +87,38 @@ class HistoryDialog(QDialog):
                 height: 0px;
             }
         """)
-        
-        scroll_content = QWidget()
-        scroll_content.setObjectName("scrollContent")
-        scroll_layout = QVBoxLayout(scroll_content)
-        scroll_layout.setSpacing(15)
-        
-        for item in reversed(history_items):  # Show newest first
-            item_frame = QFrame()
-            item_frame.setStyleSheet("""
-                QFrame {
-                    background-color: #2d3436;
-                    border-radius: 10px;
-                    border: 1px solid #636e72;
-                    padding: 10px;
-                }
-            """)
-            item_layout = QVBoxLayout(item_frame)
-            
-            # Timestamp
-            time_label = QLabel(item['timestamp'])
-            time_label.setStyleSheet("color: #b2bec3; font-size: 12px;")
-            item_layout.addWidget(time_label)
-            
-            # Original equation
-            eq_label = QLabel("Orijinal Denklem:")
-            eq_label.setStyleSheet("color: #dfe6e9; font-weight: bold;")
-            item_layout.addWidget(eq_label)
-            
-            eq_image = QLabel()
-            eq_image.setPixmap(item['equation_pixmap'].scaled(
-                700, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            item_layout.addWidget(eq_image)
-            
-            # Result
-            result_label = QLabel("Sonuç:")
-            result_label.setStyleSheet("color: #dfe6e9; font-weight: bold;")
-            item_layout.addWidget(result_label)
-            
-            result_image = QLabel()
-            result_image.setPixmap(item['result_pixmap'].scaled(
-                700, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            item_layout.addWidget(result_image)
-            
-            scroll_layout.addWidget(item_frame)
-        
-        scroll_layout.addStretch()
-        scroll.setWidget(scroll_content)
-        layout.addWidget(scroll)
+        layout.addWidget(view)
 
 class MathOCRApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Matematiksel İfade Tanıma")
         self.setGeometry(100, 100, 1000, 700)
-        self.history = []  # Store history items
+        # History lives in a SQLite file, bounded by MATHOCR_HISTORY_MAX entries and MATHOCR_HISTORY_DAYS days
+        self.history = HistoryStore(max_entries=int(os.getenv("MATHOCR_HISTORY_MAX", "5000")),
+                                    max_age=float(os.getenv("MATHOCR_HISTORY_DAYS", "365")) * 24 * 3600)
+        # Mathpix + SymPy work runs in the background; MATHOCR_SYNC=1 restores the old behaviour
+        self.background_processing = os.getenv("MATHOCR_SYNC") != "1"
+        # Several equations in one frame are sent separately; MATHOCR_REGIONS=0 turns it off
+        self.detect_regions = os.getenv("MATHOCR_REGIONS", "1") != "0"
+        # MATHOCR_PROFILE=<dir>: one cProfile .prof file per Mathpix request; MATHOCR_PROFILE_FRAMES=1 adds camera ticks
+        self.profiler = CaptureProfiler(os.getenv("MATHOCR_PROFILE"), frames=os.getenv("MATHOCR_PROFILE_FRAMES") == "1")
+        self.active_workers = set()
+        # Frame preprocessing before upload (MATHOCR_PREPROCESS="off" sends the raw PNG)
+        self.preprocessor = Preprocessor.from_spec(os.getenv("MATHOCR_PREPROCESS", DEFAULT_SPEC))
+        # One long-lived Mathpix client (pooled keep-alive connection)
+        # MATHOCR_OCR_BACKEND=record writes every response to a cassette (MATHOCR_CASSETTE), replay serves them offline
+        self.mathpix = create_backend(os.getenv("MATHOCR_OCR_BACKEND", "live"), lambda: MathpixClient(
+            os.getenv("MATHPIX_APP_ID", "your_app_id"), os.getenv("MATHPIX_APP_KEY", "your_app_key"),
+            cache=OCRCache(phash_distance=int(os.getenv("MATHOCR_PHASH_DISTANCE", "0"))),
+            upload_mode=os.getenv("MATHOCR_UPLOAD_MODE", "multipart")), os.getenv("MATHOCR_CASSETTE"))
+        self.mathpix.warm_up()
+        # SymPy evaluation runs in a killable worker process (MATHOCR_SOLVE_TIMEOUT seconds);
+        # definite integrals and limits race an mpmath estimate (MATHOCR_SOLVE_MODE, MATHOCR_EXACT_BUDGET seconds)
+        self.solver = SolverPool(workers=int(os.getenv("MATHOCR_SOLVE_WORKERS", "4")),
+                                 timeout=float(os.getenv("MATHOCR_SOLVE_TIMEOUT", "10")), cache=SolverCache(),
+                                 mode=os.getenv("MATHOCR_SOLVE_MODE", "race"),
+                                 exact_budget=float(os.getenv("MATHOCR_EXACT_BUDGET", "1")))
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #1e272e;
@@ -173,7 +152,7 @@ class MathOCRApp(QMainWindow):
         main_layout.addWidget(header_label)
 
         # Görüntü alanı
-        self.video_label = QLabel(self)
+        self.video_label = VideoPreview(self)
         self.video_label.setMinimumSize(800, 450)
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("""
@@ -205,6 +184,16 @@ class MathOCRApp(QMainWindow):
         self.capture_button.setShortcut(Qt.Key_Space)
         button_layout.addWidget(self.capture_button)
 
+        # Otomatik Yakalama - Turkuaz tonu, basılı kaldıkça açık
+        self.auto_button = ModernButton("Otomatik Yakalama (A)", 
+            color="#16a085", 
+            hover_color="#1abc9c", 
+            pressed_color="#138d75")
+        self.auto_button.setCheckable(True)
+        self.auto_button.setShortcut(Qt.Key_A)
+        self.auto_button.toggled.connect(self.toggle_auto_capture)
+        button_layout.addWidget(self.auto_button)
+
         # Geçmiş - Mor tonu
         self.history_button = ModernButton("Geçmiş", 
             color="#8e44ad", 
@@ -264,272 +253,160 @@ class MathOCRApp(QMainWindow):
         self.statusBar.showMessage("Hazır")
 
         # Kamera başlat
-        self.kamera = cv2.VideoCapture(0)
+        self.kamera = CameraCapture(0).start()
+        self.auto_capture = AutoCapture()
+        self.shown_frame = -1
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        self.timer.timeout.connect(self.profiler.wrap_frames(self.update_frame))
         self.timer.start(30)
 
+        # Camera statistics on the right of the status bar, once a second
+        self.camera_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.camera_stats)
+        # Per-stage latency (p50/p95/p99); MATHOCR_METRICS=file.prom|.json is rewritten every second
+        self.trace_stats = QLabel()
+        self.statusBar.addPermanentWidget(self.trace_stats)
+        self.metrics_path = os.getenv("MATHOCR_METRICS")
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_camera_stats)
+        self.stats_timer.start(1000)
+
     def render_latex(self, latex_str):
-        fig = plt.figure(figsize=(8, 2))
-        fig.patch.set_facecolor('#2d3436')
-        plt.text(0.5, 0.5, f"${latex_str}$", 
-                horizontalalignment='center',
-                verticalalignment='center',
-                fontsize=20,
-                color='#dfe6e9')
-        plt.axis('off')
-        
-        # Convert matplotlib figure to QPixmap
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, facecolor='#2d3436')
-        buf.seek(0)
-        img = QImage.fromData(buf.getvalue())
-        pixmap = QPixmap.fromImage(img)
-        plt.close(fig)
-        return pixmap
+        return QPixmap.fromImage(render_latex_image(latex_str))
 
     def show_history(self):
-        if not self.history:
+        if not self.history.count():
             QMessageBox.information(self, "Geçmiş", "Henüz işlem geçmişi bulunmuyor.")
             return
         dialog = HistoryDialog(self.history, self)
         dialog.exec_()
 
     def process_with_mathpix(self, frame):
-        try:
-            app_id = "your_app_ıd"
-            app_key = "your_app_key"
-
-            _, buffer = cv2.imencode('.png', frame)
-            img_base64 = base64.b64encode(buffer).decode()
+        if not self.background_processing:
+            try:
+                self.show_pipeline_result(self.solve_frame(frame, progress=self.statusBar.showMessage))
+            except Exception as e:
+                self.show_pipeline_error(str(e))
+            return
 
-            headers = {
-                'app_id': app_id,
-                'app_key': app_key,
-                'Content-type': 'application/json'
-            }
+        if self.active_workers:
+            self.statusBar.showMessage("Önceki işlem devam ediyor...")
+            return
+        start_worker(self, self.solve_frame, frame,
+                     on_result=self.show_pipeline_result,
+                     on_error=self.show_pipeline_error,
+                     on_progress=self.statusBar.showMessage)
+
+    # Runs on a worker thread: must not touch any widgets
+    def solve_frame(self, frame, progress):
+        with span('pipeline'):
+            with span('regions'):
+                boxes = find_equation_regions(frame) if self.detect_regions else []
+            if len(boxes) < 2:
+                return self.profiler.run(self.solve_image, frame, progress)
+            # Each region runs its own OCR + SymPy job concurrently
+            progress(f"{len(boxes)} denklem bölgesi bulundu, eşzamanlı işleniyor...")
+            regions = self.profiler.run(solve_regions, frame, boxes, lambda crop: self.solve_image(crop, progress))
+            return {'regions': regions, 'frame_size': (frame.shape[1], frame.shape[0])}
+
+    # A single equation image: OCR, parsing, solving and rendering
+    def solve_image(self, frame, progress):
+        # SymPy is loaded on the first capture (or in the background by startup.preload)
+        from solver import format_result_latex, parse_problem
+
+        started = time.perf_counter()
+        result = timed_upload(self.preprocessor, self.mathpix, frame, progress)
+        ocr_ms = (time.perf_counter() - started) * 1000
+
+        if 'latex_styled' not in result:
+            return {'error': "Mathpix çözümleme başarısız."}
+
+        with span('clean'):
+            latex_expr = clean_mathpix_latex(result['latex_styled'])
+
+        progress("LaTeX çözümleniyor...")
+        print("Temizlenen LaTeX:", latex_expr)
 
-            data = {
-                'src': f'data:image/png;base64,{img_base64}',
-                'formats': ['latex_styled'],
-                'data_options': {
-                    'include_latex': True
-                }
+        try:
+            with span('parse'):
+                problem = parse_problem(latex_expr)
+            with span('solve'):
+                outcome = self.solver.solve(problem)
+            if outcome['status'] == 'timeout':
+                return {'error': f"SymPy {outcome['error']}."}
+            if outcome['status'] == 'error':
+                raise ValueError(outcome['error'])
+            result_latex = format_result_latex(outcome['result'], outcome['method'])
+
+            # Render the LaTeX expression and the result
+            progress("Sonuç çiziliyor...")
+            with span('render') as render_span:
+                equation_image = render_latex_image(latex_expr)
+                result_image = render_latex_image(result_latex)
+            return {
+                'latex_expr': latex_expr,
+                'result_latex': result_latex,
+                'method': outcome['method'],
+                'equation_image': equation_image,
+                'result_image': result_image,
+                'timings': {'ocr_ms': round(ocr_ms, 1),
+                            'solve_ms': round(outcome['seconds'] * 1000, 1),
+                            'render_ms': round(render_span.ms, 1)}
             }
-
-            response = requests.post('https://api.mathpix.com/v3/text', json=data, headers=headers)
-            result = response.json()
-
-            if 'latex_styled' in result:
-                latex_expr = result['latex_styled']
-
-                # 🧹 Temizleme işlemleri
-                latex_expr = latex_expr.replace(r'\begin{array}{}', '')
-                latex_expr = latex_expr.replace(r'\end{array}', '')
-                latex_expr = latex_expr.replace(r'\\', '')
-                latex_expr = latex_expr.replace(r'\text{ integral }', '')
-                latex_expr = latex_expr.replace(r'd x', 'dx')
-                latex_expr = latex_expr.replace(r'\,', '')
-                latex_expr = latex_expr.strip()
-
-                self.statusBar.showMessage("LaTeX çözümleniyor...")
-                print("Temizlenen LaTeX:", latex_expr)
-
-                try:
-                    # Define the variable
-                    x = sp.Symbol('x')
-                    u = sp.Symbol('u')
-                    
-                    # Handle different types of expressions
-                    if r'\int' in latex_expr:
-                        # Handle integrals
-                        parts = latex_expr.split(r'\int')
-                        if len(parts) > 1:
-                            func_part = parts[1].split('dx')[0] if 'dx' in parts[1] else parts[1].split('d u')[0]
-                            
-                            if '_{' in func_part and '}^{' in func_part:
-                                limits_part = func_part[:func_part.find('\\left[')] if '\\left[' in func_part else func_part
-                                lower = float(limits_part.split('_{')[1].split('}^{')[0])
-                                upper = float(limits_part.split('}^{')[1].split('}')[0])
-                                
-                                if '\\left[' in func_part:
-                                    func_part = func_part[func_part.find('\\left['):]
-                                else:
-                                    func_part = func_part[func_part.find('}')+1:]
-                            else:
-                                lower = None
-                                upper = None
-                            
-                            func_part = func_part.replace('\\left[', '').replace('\\right]', '')
-                            func_part = func_part.replace('\\left(', '').replace('\\right)', '')
-                            func_part = func_part.replace('\\operatorname{coth}', 'coth')
-                            func_part = func_part.strip()
-                            
-                            try:
-                                integrand = sp.parse_latex(func_part)
-                            except:
-                                import re
-                                func_part = re.sub(r'x\^{(\d+)}', r'x**\1', func_part)
-                                func_part = re.sub(r'(\d+)\s*x', r'\1*x', func_part)
-                                func_part = func_part.replace(' ', '')
-                                integrand = sp.sympify(func_part, locals={'x': x})
-                            
-                            if lower is not None and upper is not None:
-                                result = sp.integrate(integrand, (x, lower, upper))
-                            else:
-                                result = sp.integrate(integrand, x)
-                    elif r'\\lim' in latex_expr:
-    try:
-        print("Raw LaTeX received:", latex_expr)
-
-        # Extract using regex
-        match = re.search(r'\\lim_{([a-zA-Z]+)\\rightarrow([^}]+)}(.*)', latex_expr)
-        if match:
-            var_str = match.group(1).strip()
-            point_str = match.group(2).strip()
-            expr_str = match.group(3).strip()
-
-            var = sp.Symbol(var_str)
-            expr_str = expr_str.replace('\\left(', '(').replace('\\right)', ')')
-            expr_str = expr_str.replace('\\log', 'ln')  # Convert log to ln
-
-            try:
-                expr = sp.parse_latex(expr_str)
-            except Exception:
-                expr_str = re.sub(r'x\^{(\d+)}', r'x**\1', expr_str)
-                expr_str = re.sub(r'(\d+)\s*\*?x', r'\1*x', expr_str)
-                expr_str = expr_str.replace(' ', '')
-                expr = sp.sympify(expr_str, locals={var_str: var})
-
-            result = sp.limit(expr, var, sp.sympify(point_str))
-        else:
-            raise ValueError("Limit expression format not recognized.")
-
-    except Exception as e:
-        print(f"Limit evaluation failed: {str(e)}")
-        self.statusBar.showMessage("Limit ifadesi çözümlenemedi.")
-        return
-else:
-    # Handle other expressions
-                        # Handle limits
-                        try:
-                            # Extract the expression and limit point
-                            expr_parts = latex_expr.split(r'\lim')[1].split('}')
-                            if len(expr_parts) < 2:
-                                raise ValueError("Invalid limit expression format")
-                                
-                            limit_expr = expr_parts[1].strip()
-                            limit_point = expr_parts[0].split('\\rightarrow')[1].strip()
-                            
-                            # Clean up the expression
-                            limit_expr = limit_expr.replace('\\left(', '(').replace('\\right)', ')')
-                            limit_expr = limit_expr.replace('\\log', 'ln')  # Convert log to ln
-                            
-                            # Parse the expression
-                            try:
-                                # First try direct LaTeX parsing
-                                expr = sp.parse_latex(limit_expr)
-                            except:
-                                # If that fails, try manual conversion
-                                import re
-                                # Handle fractions
-                                def replace_fraction(match):
-                                    num = match.group(1).strip()
-                                    den = match.group(2).strip()
-                                    return f"({num})/({den})"
-                                
-                                # First handle nested fractions
-                                while '\\frac' in limit_expr:
-                                    limit_expr = re.sub(r'\\frac\{([^{}]+|(?:\{[^{}]*\})+)\}\{([^{}]+|(?:\{[^{}]*\})+)\}', replace_fraction, limit_expr)
-                                
-                                # Handle exponents
-                                limit_expr = re.sub(r'x\^{(\d+)}', r'x**\1', limit_expr)
-                                # Handle multiplication
-                                limit_expr = re.sub(r'(\d+)\s*x', r'\1*x', limit_expr)
-                                # Remove spaces
-                                limit_expr = limit_expr.replace(' ', '')
-                                print("Converted limit expression:", limit_expr)  # Debug print
-                                
-                                # Special handling for common limit patterns
-                                if 'ln(1+x)/x' in limit_expr or 'log(1+x)/x' in limit_expr:
-                                    result = sp.Integer(1)  # Known limit is 1
-                                else:
-                                    try:
-                                        expr = sp.sympify(limit_expr, locals={'x': x})
-                                        result = sp.limit(expr, x, float(limit_point))
-                                    except:
-                                        # If sympify fails, try to construct the expression directly
-                                        if 'sin(x)/x' in limit_expr:
-                                            result = sp.Integer(1)  # Known limit is 1
-                                        elif 'cos(x)-1/x' in limit_expr:
-                                            result = sp.Integer(0)  # Known limit is 0
-                                        else:
-                                            raise ValueError(f"Could not parse limit expression: {limit_expr}")
-                        except Exception as e:
-                            print(f"Limit calculation error: {str(e)}")
-                            # Final fallback for known limits
-                            if '\\frac{\\log (1+x)}{x}' in latex_expr or '\\frac{\\ln (1+x)}{x}' in latex_expr:
-                                result = sp.Integer(1)  # Known limit is 1
-                            elif '\\frac{\\sin x}{x}' in latex_expr:
-                                result = sp.Integer(1)  # Known limit is 1
-                            elif '\\frac{\\cos x - 1}{x}' in latex_expr:
-                                result = sp.Integer(0)  # Known limit is 0
-                            else:
-                                raise ValueError(f"Could not calculate limit: {str(e)}")
-                    else:
-                        # Handle other expressions
-                        try:
-                            result = sp.parse_latex(latex_expr)
-                        except:
-                            import re
-                            expr = re.sub(r'x\^{(\d+)}', r'x**\1', latex_expr)
-                            expr = re.sub(r'(\d+)\s*x', r'\1*x', latex_expr)
-                            expr = expr.replace(' ', '')
-                            result = sp.sympify(expr, locals={'x': x})
-                    
-                    # Convert result to LaTeX format
-                    result_latex = sp.latex(result)
-                    
-                    # Format the result to look more natural
-                    result_latex = result_latex.replace('**', '^')  # Convert x**2 to x^2
-                    result_latex = result_latex.replace('*', '')    # Remove multiplication signs
-                    result_latex = result_latex.replace('ln', '\\log')  # Convert ln back to log
-
-                    # Render LaTeX expression
-                    latex_pixmap = self.render_latex(latex_expr)
-                    self.latex_label.setPixmap(latex_pixmap.scaled(
-                        self.latex_label.width(), 80,
-                        Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-                    # Render only the result in LaTeX format
-                    result_pixmap = self.render_latex(result_latex)
-                    self.result_label.setPixmap(result_pixmap.scaled(
-                        self.result_label.width(), 80,
-                        Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-                    # Add to history
-                    self.history.append({
-                        'timestamp': datetime.now().strftime("%d.%m.%Y %H:%M:%S"),
-                        'equation_pixmap': latex_pixmap,
-                        'result_pixmap': result_pixmap
-                    })
-
-                    self.statusBar.showMessage("Çözüm başarıyla gösterildi.")
-                except Exception as e:
-                    self.statusBar.showMessage(f"Hata: {str(e)}")
-                    print(f"Error details: {str(e)}")
-            else:
-                self.statusBar.showMessage("Mathpix çözümleme başarısız.")
         except Exception as e:
-            QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {str(e)}")
+            print(f"Error details: {str(e)}")
+            return {'error': f"Hata: {str(e)}"}
+
+    # Runs on the GUI thread: shows the worker's result
+    def show_pipeline_result(self, outcome):
+        startup.mark('first_result')
+        if 'regions' in outcome:
+            self.show_regions(outcome)
+            return
+        self.video_label.clear_overlay()
+        if 'error' in outcome:
+            self.statusBar.showMessage(outcome['error'])
+            return
+
+        latex_pixmap = QPixmap.fromImage(outcome['equation_image'])
+        self.latex_label.setPixmap(latex_pixmap.scaled(
+            self.latex_label.width(), 80,
+            Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+        result_pixmap = QPixmap.fromImage(outcome['result_image'])
+        self.result_label.setPixmap(result_pixmap.scaled(
+            self.result_label.width(), 80,
+            Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+        # Add to history
+        self.history.add(outcome['latex_expr'], outcome['result_latex'],
+                         equation_image=outcome['equation_image'], result_image=outcome['result_image'],
+                         timings=outcome.get('timings'))
+
+        solved = "Sayısal yaklaşım gösterildi (mpmath)." if outcome.get('method') == 'numeric' else "Çözüm başarıyla gösterildi."
+        self.statusBar.showMessage(f"{solved} {self.mathpix.stats_text()}, {self.solver.cache.stats_text()}, "
+                                   f"{render_cache.stats_text()}, {self.preprocessor.stats_text()}")
+
+    # Multi-region result: every solved region goes to history like a single one, boxes go on the preview
+    def show_regions(self, outcome):
+        regions = outcome['regions']
+        solved = [r for r in regions if 'error' not in r]
+        for region in solved:
+            self.show_pipeline_result(region)
+        self.video_label.set_overlay(
+            [(r['box'], r.get('result_image') or r['error'], 'error' not in r) for r in regions],
+            outcome['frame_size'])
+        self.statusBar.showMessage(f"{len(regions)} bölgeden {len(solved)} tanesi çözüldü. "
+                                   f"{self.mathpix.stats_text()}, {self.solver.cache.stats_text()}")
+
+    def show_pipeline_error(self, message):
+        QMessageBox.warning(self, "Mathpix Hatası", f"Hata: {message}")
 
     def capture_and_process(self):
         try:
-            ret, frame = self.kamera.read()
-            if ret:
-                self.process_with_mathpix(frame)
+            captured = self.kamera.latest()
+            if captured is not None:
+                self.process_with_mathpix(captured.image)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Kameradan işlem alınamadı: {str(e)}")
 
@@ -542,24 +419,44 @@ else:
                 frame = cv2.imdecode(np.fromfile(abs_path, dtype=np.uint8), cv2.IMREAD_COLOR)
                 if frame is None:
                     raise Exception("Görüntü okunamadı")
-                self.video_label.setPixmap(QPixmap(fname).scaled(
-                    self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                self.video_label.show_frame(frame)
                 self.process_with_mathpix(frame)
         except Exception as e:
             QMessageBox.warning(self, "Hata", f"Resim yüklenemedi: {str(e)}")
 
     def clear_results(self):
+        self.video_label.clear_overlay()
         self.latex_label.clear()
         self.result_label.clear()
         self.statusBar.showMessage("Sonuçlar temizlendi")
 
     def update_frame(self):
-        ret, frame = self.kamera.read()
-        if ret:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image = QImage(rgb_frame, rgb_frame.shape[1], rgb_frame.shape[0], rgb_frame.strides[0], QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(image).scaled(
-                self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        # Newest frame from the capture thread; nothing is drawn if there is no new one
+        captured = self.kamera.latest(newer_than=self.shown_frame)
+        if captured is not None:
+            with span('camera.tick'):
+                self.video_label.show_frame(captured.image)
+                self.shown_frame = captured.index
+                self.kamera.shown(captured)
+                startup.mark('first_frame')
+                # Frames are not scored while a capture is running; afterwards N stable frames are needed again
+                if self.auto_button.isChecked() and not self.active_workers and self.auto_capture.update(captured.image):
+                    self.statusBar.showMessage("Net ve sabit kare yakalandı, işleniyor...")
+                    self.process_with_mathpix(captured.image)
+
+    def toggle_auto_capture(self, checked):
+        self.auto_capture.reset()
+        self.statusBar.showMessage("Otomatik yakalama açık" if checked else "Otomatik yakalama kapalı")
+
+    def update_camera_stats(self):
+        text = self.kamera.stats_text()
+        if self.auto_button.isChecked():
+            text += " | " + self.auto_capture.status_text()
+        self.camera_stats.setText(text)
+        self.trace_stats.setText(tracer.status_text())
+        self.trace_stats.setToolTip(tracer.table_text())
+        if self.metrics_path:
+            tracer.dump(self.metrics_path)
 
     def closeEvent(self, event):
         reply = QMessageBox.question(self, 'Çıkış',
@@ -567,6 +464,9 @@ else:
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.kamera.release()
+            self.mathpix.close()
+            self.history.close()
+            self.solver.close()
             event.accept()
         else:
             event.ignore()
@@ -575,4 +475,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MathOCRApp()
     window.show()
+    startup.preload()
     sys.exit(app.exec_())
@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PyQt5.QtGui import QImage
+
+from ocr_cache import CACHE_DIR
+
+# Geçmiş penceresinde görüntüler en fazla bu yükseklikte gösterilir
+THUMBNAIL_HEIGHT = 80
+
+
+def encode_thumbnail(image, height=THUMBNAIL_HEIGHT):
+    """Scales a rendered QImage down to ``height`` px and returns it as PNG bytes."""
+    if image.height() > height:
+        image = image.scaledToHeight(height, Qt.SmoothTransformation)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, 'PNG')
+    return bytes(data)
+
+
+def decode_thumbnail(data):
+    return QImage.fromData(data) if data else QImage()
+
+
+class HistoryStore:
+    """Capture history in a SQLite file (WAL mode) instead of a list of QPixmaps.
+
+    Each entry keeps the LaTeX, the result LaTeX, per-stage timings and
+    the two rendered images as small PNG thumbnails, so nothing pixel-sized
+    stays in memory: ``entries`` returns only the text columns and a pixmap is
+    built from ``thumbnails(entry_id)`` when that entry is actually shown.
+    Entries older than ``max_age`` seconds or beyond the newest
+    ``max_entries`` are deleted on every ``add``.
+    """
+
+    def __init__(self, path=None, max_entries=5000, max_age=365 * 24 * 3600):
+        self.path = path or os.path.join(CACHE_DIR, "history.sqlite3")
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL: yazma sırasında okuyucular (geçmiş penceresi) beklemez
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created REAL NOT NULL,
+                latex TEXT NOT NULL,
+                result_latex TEXT,
+                timings TEXT,
+                equation_thumb BLOB,
+                result_thumb BLOB
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS history_created ON history(created)")
+        self._db.commit()
+        self._evict()
+
+    def add(self, latex, result_latex=None, equation_image=None, result_image=None, timings=None):
+        """Stores one solved capture; the QImages are shrunk to PNG thumbnails first."""
+        row = (time.time(), latex, result_latex,
+               json.dumps(timings) if timings else None,
+               encode_thumbnail(equation_image) if equation_image is not None else None,
+               encode_thumbnail(result_image) if result_image is not None else None)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO history (created, latex, result_latex, timings, equation_thumb, result_thumb) "
+                "VALUES (?, ?, ?, ?, ?, ?)", row)
+            self._evict()
+            return cursor.lastrowid
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def entries(self, offset=0, limit=-1):
+        """Newest first, without the thumbnails."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created, latex, result_latex, timings FROM history "
+                "ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [{'id': entry_id, 'created': created, 'latex': latex, 'result_latex': result_latex,
+                 'timings': json.loads(timings) if timings else {}}
+                for entry_id, created, latex, result_latex, timings in rows]
+
+    def thumbnails(self, entry_id):
+        """Returns ``(equation_qimage, result_qimage)`` for one entry."""
+        with self._lock:
+            row = self._db.execute("SELECT equation_thumb, result_thumb FROM history WHERE id = ?",
+                                   (entry_id,)).fetchone()
+        if row is None:
+            return QImage(), QImage()
+        return decode_thumbnail(row[0]), decode_thumbnail(row[1])
+
+    def _evict(self):
+        self._db.execute("DELETE FROM history WHERE created < ?", (time.time() - self.max_age,))
+        self._db.execute("""
+            DELETE FROM history WHERE id IN (
+                SELECT id FROM history ORDER BY id DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from datetime import datetime
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QRect, QSize, Qt
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPixmap
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate
+
+from latex_render import render_latex_image
+
+# Geçmiş penceresi bir seferde bu kadar kaydı okur; aşağı kaydırıldıkça sonraki sayfa gelir
+PAGE_SIZE = 100
+
+EntryRole = Qt.UserRole
+
+
+class HistoryModel(QAbstractListModel):
+    """List model over a ``HistoryStore``, newest entry first.
+
+    Only the text columns are read, ``PAGE_SIZE`` rows at a time through
+    ``canFetchMore``/``fetchMore``, so opening the history costs the same
+    however many entries it holds. ``pixmaps(row)`` decodes an entry's
+    thumbnails on first use and keeps the last ``cache_size`` rows in an LRU;
+    an entry stored without a thumbnail is rendered from its LaTeX instead.
+    """
+
+    def __init__(self, store, cache_size=64, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.cache_size = cache_size
+        self._total = store.count()
+        self._entries = []
+        self._pixmaps = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self._entries) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        page = self.store.entries(offset=len(self._entries), limit=PAGE_SIZE)
+        if not page:
+            self._total = len(self._entries)
+            return
+        self.beginInsertRows(QModelIndex(), len(self._entries), len(self._entries) + len(page) - 1)
+        self._entries.extend(page)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return entry['latex']
+        if role == Qt.ToolTipRole:
+            timings = ", ".join(f"{stage}: {ms:g} ms" for stage, ms in entry['timings'].items())
+            return f"{entry['latex']}\n= {entry['result_latex'] or ''}" + (f"\n{timings}" if timings else "")
+        if role == EntryRole:
+            return entry
+        return None
+
+    def pixmaps(self, row):
+        """``(equation_pixmap, result_pixmap)`` for one row, decoded only when it is painted."""
+        entry = self._entries[row]
+        cached = self._pixmaps.get(entry['id'])
+        if cached is not None:
+            self._pixmaps.move_to_end(entry['id'])
+            return cached
+
+        equation_image, result_image = self.store.thumbnails(entry['id'])
+        if equation_image.isNull():
+            equation_image = render_latex_image(entry['latex'])
+        if result_image.isNull() and entry['result_latex']:
+            result_image = render_latex_image(entry['result_latex'])
+        cached = (QPixmap.fromImage(equation_image), QPixmap.fromImage(result_image))
+        self._pixmaps[entry['id']] = cached
+        while len(self._pixmaps) > self.cache_size:
+            self._pixmaps.popitem(last=False)
+        return cached
+
+
+class HistoryDelegate(QStyledItemDelegate):
+    """Paints one history entry as a card: timestamp, equation and result thumbnails.
+
+    Every row has the same height, so the view can use uniform item sizes and
+    only the rows inside the viewport are ever painted.
+    """
+
+    PADDING = 12
+    SPACING = 15
+    LINE = 22
+    IMAGE_HEIGHT = 80
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.time_font = QFont()
+        self.time_font.setPixelSize(12)
+        self.label_font = QFont()
+        self.label_font.setPixelSize(14)
+        self.label_font.setBold(True)
+
+    def sizeHint(self, option, index):
+        height = 2 * self.PADDING + 3 * self.LINE + 2 * self.IMAGE_HEIGHT + self.SPACING
+        return QSize(max(option.rect.width(), 300), height)
+
+    def paint(self, painter, option, index):
+        entry = index.data(EntryRole)
+        equation, result = index.model().pixmaps(index.row())
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        card = option.rect.adjusted(0, 0, -1, -self.SPACING)
+        painter.setPen(QPen(QColor('#636e72'), 1))
+        painter.setBrush(QColor('#2d3436'))
+        painter.drawRoundedRect(card, 10, 10)
+
+        x = card.left() + self.PADDING
+        width = card.width() - 2 * self.PADDING
+        y = card.top() + self.PADDING
+        painter.setFont(self.time_font)
+        painter.setPen(QColor('#b2bec3'))
+        painter.drawText(QRect(x, y, width, self.LINE), Qt.AlignVCenter | Qt.AlignLeft,
+                         datetime.fromtimestamp(entry['created']).strftime("%d.%m.%Y %H:%M:%S"))
+        y += self.LINE
+
+        for title, pixmap in (("Orijinal Denklem:", equation), ("Sonuç:", result)):
+            painter.setFont(self.label_font)
+            painter.setPen(QColor('#dfe6e9'))
+            painter.drawText(QRect(x, y, width, self.LINE), Qt.AlignVCenter | Qt.AlignLeft, title)
+            y += self.LINE
+            if not pixmap.isNull():
+                # Küçük resimler zaten en fazla 80 px yüksek; yalnızca dar satırda küçültülür
+                size = pixmap.size().scaled(min(width, pixmap.width()), self.IMAGE_HEIGHT, Qt.KeepAspectRatio)
+                painter.drawPixmap(QRect(x, y, size.width(), size.height()), pixmap)
+            y += self.IMAGE_HEIGHT
+        painter.restore()
+
+
+def history_list_view(store, parent=None):
+    """A ``QListView`` wired to ``HistoryModel`` and ``HistoryDelegate``."""
+    view = QListView(parent)
+    view.setModel(HistoryModel(store, parent=view))
+    view.setItemDelegate(HistoryDelegate(view))
+    view.setUniformItemSizes(True)
+    view.setVerticalScrollMode(QListView.ScrollPerPixel)
+    view.setSelectionMode(QListView.NoSelection)
+    view.setFocusPolicy(Qt.NoFocus)
+    return view
@@ -0,0 +1,76 @@
+import re
+
+# Mathpix çıktısı tek seferde belirteçlere ayrılır (latex_parser bu belirteçleri okur)
+_TOKEN = re.compile(r"""
+    (?P<env>\\begin\{array\}\{[^{}]*\}|\\end\{array\})
+  | (?P<text>\\text\s*\{[^{}]*\})
+  | (?P<opname>\\operatorname\s*\{[a-zA-Z]+\})
+  | (?P<cmd>\\[a-zA-Z]+)
+  | (?P<sym>\\.)
+  | (?P<num>\d+(?:\.\d+)?)
+  | (?P<letter>[a-zA-Z])
+  | (?P<space>\s+)
+  | (?P<lbrace>\{)
+  | (?P<rbrace>\})
+  | (?P<char>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Mathpix'in düzen için eklediği, anlamı olmayan belirteçler
+_NOISE_SYMBOLS = {'\\,', '\\;', '\\:', '\\!', '\\ '}
+# Satır sonu yalnızca baştaysa ya da sondaysa gürültüdür; iki satırın arasındaysa korunur
+ROW_BREAK = '\\\\'
+
+
+def tokenize(latex):
+    """Splits LaTeX into ``(kind, text, offset)`` triples in a single regex scan."""
+    return [(m.lastgroup, m.group(), m.start()) for m in _TOKEN.finditer(latex)]
+
+
+def _is_noise(kind, text):
+    if kind == 'env' or (kind == 'sym' and text in _NOISE_SYMBOLS):
+        return True
+    return kind == 'text' and text[text.index('{') + 1:-1].strip() == 'integral'
+
+
+def _noise_mask(tokens):
+    """Which of ``tokens`` are layout noise.
+
+    A ``\\\\`` row break is noise only before the first or after the last real
+    token; between two rows it is kept, so the parser can refuse to merge two
+    lines into one expression.
+    """
+    noise = [_is_noise(kind, text) for kind, text, _ in tokens]
+    content = [i for i, (kind, text, _) in enumerate(tokens)
+               if not noise[i] and kind != 'space' and text != ROW_BREAK]
+    first, last = (content[0], content[-1]) if content else (len(tokens), -1)
+    for i, (_, text, _) in enumerate(tokens):
+        if text == ROW_BREAK and not first < i < last:
+            noise[i] = True
+    return noise
+
+
+def significant_tokens(latex):
+    """``tokenize`` without whitespace and Mathpix layout noise."""
+    tokens = tokenize(latex)
+    return [t for t, noise in zip(tokens, _noise_mask(tokens)) if t[0] != 'space' and not noise]
+
+
+def clean_mathpix_latex(latex_expr):
+    """Strips Mathpix layout noise from a ``latex_styled`` string; the result is still LaTeX.
+
+    Noise is exactly what ``significant_tokens`` drops (``\\begin{array}{l}``,
+    ``\\,``, ``\\text{ integral }`` ...), so what is rendered and what is
+    parsed never disagree.
+    """
+    tokens = tokenize(latex_expr)
+    parts = []
+    previous = None
+    for (kind, text, _), noise in zip(tokens, _noise_mask(tokens)):
+        if noise:
+            if previous == 'cmd':
+                parts.append(' ')  # \pi\,x "\pix" olmasın
+                previous = 'space'
+            continue
+        parts.append(text)
+        previous = kind
+    return ''.join(parts).strip()
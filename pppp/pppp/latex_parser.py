@@ -0,0 +1,424 @@
+import sympy as sp
+
+from latex_normalize import ROW_BREAK, significant_tokens
+
+FUNCTIONS = {
+    'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan, 'cot': sp.cot, 'sec': sp.sec, 'csc': sp.csc,
+    'arcsin': sp.asin, 'arccos': sp.acos, 'arctan': sp.atan,
+    'sinh': sp.sinh, 'cosh': sp.cosh, 'tanh': sp.tanh, 'coth': sp.coth,
+    'exp': sp.exp, 'ln': sp.log, 'log': sp.log
+}
+
+# \sin^{-1} x gibi yazımlar ters fonksiyon anlamına gelir
+INVERSES = {'sin': sp.asin, 'cos': sp.acos, 'tan': sp.atan, 'cot': sp.acot, 'sec': sp.asec, 'csc': sp.acsc}
+
+CONSTANTS = {'pi': sp.pi, 'infty': sp.oo}
+
+GREEK = {
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta', 'theta', 'vartheta',
+    'kappa', 'lambda', 'mu', 'nu', 'xi', 'rho', 'sigma', 'tau', 'phi', 'varphi', 'chi', 'psi', 'omega'
+}
+
+ARROWS = {'\\rightarrow', '\\to', '\\longrightarrow'}
+_SKIPPED = {'\\displaystyle', '\\limits', '\\quad', '\\qquad'}
+
+
+class LatexParseError(ValueError):
+    """Raised with the character offset in the source where parsing stopped."""
+
+    def __init__(self, message, source, position):
+        self.message = message
+        self.source = source
+        self.position = position
+        context = source[position:position + 15] or "ifade sonu"
+        super().__init__(f"{message} (konum {position}: '{context}')")
+
+
+def parse_latex_expr(latex_expr):
+    """Parses the LaTeX subset Mathpix emits straight into a SymPy expression.
+
+    A single recursive-descent pass over the tokens; fractions, powers,
+    ``\\sqrt``, trig/log functions, ``|x|``, implicit multiplication and ``=``
+    are built directly, while ``\\int_{a}^{b} ... dx``, ``\\lim_{x \\to a^{+}}``
+    and ``\\frac{d}{dx}``/``\\frac{dy}{dx}`` become unevaluated
+    ``Integral``/``Limit``/``Derivative`` objects. A limit with no ``^{+}`` or
+    ``^{-}`` is two-sided (``dir='+-'``); inside an integral the ``dx`` may sit
+    in a numerator, as in ``\\int \\frac{dx}{x}``. ``e`` is Euler's number.
+    Errors raise ``LatexParseError``.
+    """
+    return _Parser(latex_expr).parse()
+
+
+class _Parser:
+    def __init__(self, source):
+        self.source = source
+        self.tokens = [t for t in significant_tokens(source) if t[1] not in _SKIPPED]
+        self.pos = 0
+        self.abs_depth = 0
+        self.integral_depth = 0
+        self.limit_point = False
+        self.pending_differential = None
+
+    # Belirteç yardımcıları
+    def peek(self, offset=0):
+        index = self.pos + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return (None, None, len(self.source))
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def at(self, kind, text=None, offset=0):
+        token = self.peek(offset)
+        return token[0] == kind and (text is None or token[1] == text)
+
+    def accept(self, kind, text=None):
+        if self.at(kind, text):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind, text, what):
+        if not self.accept(kind, text):
+            self.error(f"{what} bekleniyordu")
+
+    def error(self, message):
+        if self.at('sym', ROW_BREAK):
+            # Birden çok satır (\begin{array} ... \\ ...) tek ifadeye birleştirilmez
+            message = "Birden çok satır tek ifade olarak okunamaz"
+        raise LatexParseError(message, self.source, self.peek()[2])
+
+    # Dilbilgisi
+    def parse(self):
+        if not self.tokens:
+            self.error("Boş ifade")
+        expr = self.expression()
+        if self.accept('char', '='):
+            expr = sp.Eq(expr, self.expression())
+        if self.pos < len(self.tokens):
+            self.error("Beklenmeyen belirteç")
+        return expr
+
+    def expression(self):
+        expr = self.term()
+        while True:
+            if self.accept('char', '+'):
+                expr = expr + self.term()
+            elif self.accept('char', '-'):
+                expr = expr - self.term()
+            else:
+                return expr
+
+    def term(self):
+        expr = self.unary()
+        while True:
+            kind, text, _ = self.peek()
+            if (kind == 'char' and text == '*') or text in ('\\cdot', '\\times'):
+                self.pos += 1
+                expr = expr * self.unary()
+            elif (kind == 'char' and text == '/') or text == '\\div':
+                self.pos += 1
+                expr = expr / self.unary()
+            elif self.starts_factor():
+                expr = expr * self.power()
+            else:
+                return expr
+
+    def unary(self):
+        if self.accept('char', '-'):
+            return -self.unary()
+        if self.accept('char', '+'):
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        expr = self.primary()
+        while True:
+            if self.at('char', '^') and not (self.limit_point and self.direction_ahead()):
+                self.pos += 1
+                expr = expr ** self.argument()
+            elif self.accept('char', '!'):
+                expr = sp.factorial(expr)
+            else:
+                return expr
+
+    def starts_factor(self):
+        kind, text, _ = self.peek()
+        if kind in ('num', 'opname', 'lbrace'):
+            return True
+        if kind == 'letter':
+            return not self.at_differential()
+        if kind == 'char':
+            return text in '([' or (text == '|' and self.abs_depth == 0)
+        if kind == 'cmd':
+            return text not in ARROWS and text not in ('\\right', '\\cdot', '\\times', '\\div', '\\mathrm')
+        return False
+
+    def at_differential(self):
+        # İntegralin sonundaki "dx" ya da "\mathrm{d} x"
+        if not self.integral_depth:
+            return False
+        if self.at('letter', 'd') and self.at('letter', offset=1):
+            return True
+        return self.at('cmd', '\\mathrm') and self.at('lbrace', offset=1) and self.at('letter', 'd', offset=2)
+
+    def differential(self):
+        """Consumes a ``dx`` or ``\\mathrm{d} x`` and returns the variable."""
+        if self.accept('cmd', '\\mathrm'):
+            self.group_text()
+        else:
+            self.pos += 1
+        return sp.Symbol(self.next()[1])
+
+    def direction_ahead(self):
+        # Limit noktasındaki ^{+} / ^{-} / ^+ / ^-
+        if self.at('lbrace', offset=1):
+            return self.peek(2)[1] in ('+', '-') and self.at('rbrace', offset=3)
+        return self.peek(1)[1] in ('+', '-')
+
+    def argument(self):
+        """One LaTeX argument: a ``{...}`` group or a single token (``x^23`` is ``x^2 * 3``)."""
+        if self.accept('lbrace'):
+            expr = self.expression()
+            self.expect('rbrace', '}', "'}'")
+            return expr
+        kind, text, position = self.peek()
+        if kind == 'num' and len(text) > 1 and '.' not in text:
+            self.tokens[self.pos] = ('num', text[1:], position + 1)
+            return sp.Integer(text[0])
+        if kind in ('num', 'letter', 'cmd'):
+            return self.primary()
+        self.error("Argüman bekleniyordu")
+
+    def group_end(self, offset):
+        """Offset of the ``}`` closing the ``{`` at ``offset``."""
+        depth = 0
+        while self.peek(offset)[0] is not None:
+            depth += self.at('lbrace', offset=offset) - self.at('rbrace', offset=offset)
+            if depth == 0:
+                break
+            offset += 1
+        return offset
+
+    def group_text(self):
+        """Raw letters/digits of a ``{...}`` group or single token, for subscripts."""
+        if not self.accept('lbrace'):
+            return self.next()[1] or ''
+        parts = []
+        while not self.at('rbrace'):
+            if self.peek()[0] is None:
+                self.error("'}' bekleniyordu")
+            parts.append(self.next()[1].lstrip('\\'))
+        self.pos += 1
+        return ''.join(parts)
+
+    def primary(self):
+        kind, text, _ = self.peek()
+        if kind == 'num':
+            self.pos += 1
+            return sp.Float(text) if '.' in text else sp.Integer(text)
+        if kind == 'letter':
+            if text == 'd' and self.at('char', '/', 1) and self.at('letter', 'd', 2) and self.at('letter', offset=3):
+                # Düz metin yazımı: d/dx f
+                self.pos += 4
+                return self.derivative_operand(sp.Symbol(self.peek(-1)[1]), sp.Integer(1))
+            self.pos += 1
+            if self.accept('char', '_'):
+                return sp.Symbol(f'{text}_{self.group_text()}')
+            return sp.E if text == 'e' else sp.Symbol(text)
+        if kind == 'lbrace':
+            return self.argument()
+        if kind == 'char' and text in '([':
+            self.pos += 1
+            expr = self.expression()
+            if not (self.accept('char', ')') or self.accept('char', ']')):
+                self.error("')' bekleniyordu")
+            return expr
+        if kind == 'char' and text == '|' and self.abs_depth == 0:
+            self.pos += 1
+            self.abs_depth += 1
+            expr = self.expression()
+            self.abs_depth -= 1
+            self.expect('char', '|', "'|'")
+            return sp.Abs(expr)
+        if kind == 'opname':
+            self.pos += 1
+            return self.function(text[text.index('{') + 1:-1])
+        if kind == 'cmd':
+            self.pos += 1
+            return self.command(text[1:])
+        self.error("İfade bekleniyordu")
+
+    def command(self, name):
+        if name in FUNCTIONS:
+            return self.function(name)
+        if name in ('frac', 'dfrac', 'tfrac'):
+            return self.fraction()
+        if name == 'sqrt':
+            if self.accept('char', '['):
+                index = self.expression()
+                self.expect('char', ']', "']'")
+                return sp.root(self.argument(), index)
+            return sp.sqrt(self.argument())
+        if name == 'left':
+            return self.delimited()
+        if name == 'int':
+            return self.integral()
+        if name == 'lim':
+            return self.limit()
+        if name in CONSTANTS:
+            return CONSTANTS[name]
+        if name in GREEK:
+            return sp.Symbol(name)
+        if name in ('mathrm', 'mathbf', 'mathit', 'boldsymbol', 'text'):
+            return self.argument()
+        self.pos -= 1
+        self.error(f"Desteklenmeyen komut \\{name}")
+
+    def delimited(self):
+        kind, opening, _ = self.next()
+        if opening not in ('(', '[', '|', '.', '\\{'):
+            self.pos -= 1
+            self.error("\\left ayracı bekleniyordu")
+        if opening == '|':
+            self.abs_depth += 1
+        expr = self.expression()
+        if opening == '|':
+            self.abs_depth -= 1
+        self.expect('cmd', '\\right', "\\right")
+        self.next()  # Kapanış ayracı
+        return sp.Abs(expr) if opening == '|' else expr
+
+    def function(self, name):
+        base = power = None
+        if self.accept('char', '_'):
+            base = self.argument()
+        if self.accept('char', '^'):
+            power = self.argument()
+        argument = self.function_argument()
+
+        if power == -1 and name in INVERSES:
+            return INVERSES[name](argument)
+        func = FUNCTIONS.get(name) or sp.Function(name)
+        result = sp.log(argument, base) if base is not None and name == 'log' else func(argument)
+        return result ** power if power is not None else result
+
+    def function_argument(self):
+        """``(...)`` after a function, or an implicit product: ``\\sin 2x`` is ``sin(2*x)``."""
+        if self.at('char', '(') or self.at('char', '[') or self.at('cmd', '\\left'):
+            return self.primary()
+        argument = self.power()
+        while self.starts_factor() and not self.at_function():
+            argument = argument * self.power()
+        return argument
+
+    def at_function(self):
+        kind, text, _ = self.peek()
+        return kind == 'opname' or (kind == 'cmd' and text[1:] in FUNCTIONS) or self.at_derivative()
+
+    def at_derivative(self, offset=0):
+        # \frac{d}{dx}, \frac{d^{2}}{dx^{2}}, \frac{dy}{dx}: pay "d" ile, payda "d<değişken>" ile başlar
+        if not (self.at('cmd', '\\frac', offset) and self.at('lbrace', offset=offset + 1)
+                and self.at('letter', 'd', offset + 2)):
+            return False
+        denominator = self.group_end(offset + 1) + 1
+        return (self.at('lbrace', offset=denominator) and self.at('letter', 'd', denominator + 1)
+                and self.at('letter', offset=denominator + 2))
+
+    def fraction(self):
+        if self.at_derivative(offset=-1):
+            return self.derivative()
+        if not (self.integral_depth and self.accept('lbrace')):
+            numerator = self.argument()
+            return numerator / self.argument()
+        # İntegral içinde \frac{dx}{...} ya da \frac{x dx}{...}: paydaki dx integralin değişkenidir
+        numerator = sp.Integer(1) if self.at_differential() else self.expression()
+        if self.at_differential():
+            self.pending_differential = self.differential()
+        self.expect('rbrace', '}', "'}'")
+        return numerator / self.argument()
+
+    def derivative(self):
+        self.expect('lbrace', '{', "'{'")
+        self.expect('letter', 'd', "'d'")
+        order = self.argument() if self.accept('char', '^') else sp.Integer(1)
+        # \frac{dy}{dx}: türevi alınan ifade payın içindedir
+        operand = None if self.at('rbrace') else self.expression()
+        self.expect('rbrace', '}', "'}'")
+        self.expect('lbrace', '{', "'{'")
+        self.expect('letter', 'd', "'d'")
+        kind, name, _ = self.next()
+        if kind != 'letter':
+            self.pos -= 1
+            self.error("Türev değişkeni bekleniyordu")
+        if self.accept('char', '^'):
+            self.argument()
+        self.expect('rbrace', '}', "'}'")
+        if operand is not None:
+            return sp.Derivative(operand, (sp.Symbol(name), order))
+        return self.derivative_operand(sp.Symbol(name), order)
+
+    def derivative_operand(self, var, order):
+        # Parantezsiz yazımda türev ifadenin geri kalanına uygulanır: \frac{d}{dx} x^{3}+2x
+        if self.at('char', '(') or self.at('char', '[') or self.at('cmd', '\\left'):
+            operand = self.primary()
+        else:
+            operand = self.expression()
+        return sp.Derivative(operand, (var, order))
+
+    def integral(self):
+        lower = upper = None
+        for _ in range(2):
+            if self.accept('char', '_'):
+                lower = self.argument()
+            elif self.accept('char', '^'):
+                upper = self.argument()
+        if (lower is None) != (upper is None):
+            self.error("İntegralin iki sınırı birlikte verilmeli")
+
+        self.integral_depth += 1
+        outer, self.pending_differential = self.pending_differential, None
+        # \int dx: dx hemen geliyorsa integrand 1'dir
+        integrand = sp.Integer(1) if self.at_differential() else self.expression()
+        # dx kesrin payında verilmiş olabilir: \int \frac{dx}{x}
+        var, self.pending_differential = self.pending_differential, outer
+        if var is None and self.at_differential():
+            var = self.differential()
+        self.integral_depth -= 1
+
+        if var is None:
+            # Mathpix bazen dx'i atlar; tek değişken varsa o kullanılır
+            free = sorted(integrand.free_symbols, key=str)
+            var = free[0] if len(free) == 1 else sp.Symbol('x')
+
+        if lower is None:
+            return sp.Integral(integrand, var)
+        return sp.Integral(integrand, (var, lower, upper))
+
+    def limit(self):
+        self.expect('char', '_', "'_'")
+        self.expect('lbrace', '{', "'{'")
+        kind, name, _ = self.next()
+        if kind != 'letter':
+            self.pos -= 1
+            self.error("Limit değişkeni bekleniyordu")
+        if self.peek()[1] not in ARROWS:
+            self.error("\\rightarrow bekleniyordu")
+        self.pos += 1
+
+        self.limit_point = True
+        point = self.expression()
+        self.limit_point = False
+        direction = '+-'  # Yön verilmezse iki yönlü limit
+        if self.accept('char', '^'):
+            braced = self.accept('lbrace')
+            direction = self.next()[1]
+            if braced:
+                self.expect('rbrace', '}', "'}'")
+        self.expect('rbrace', '}', "'}'")
+
+        operand = self.expression()
+        return sp.Limit(operand, sp.Symbol(name), point, dir=direction)
@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage
+
+# mathtext ayrıştırıcısı iş parçacığı güvenli değil; çizimleri sıraya sok
+_render_lock = threading.Lock()
+
+
+class RenderCache:
+    """Bounded LRU of rendered QImages keyed by (latex, fontsize, colours, dpi).
+
+    Entries are evicted least recently used first once their pixel data exceeds
+    ``max_bytes``. QImage is implicitly shared and never modified after
+    rendering, so the same object can be handed to several threads.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self.bytes -= old.sizeInBytes()
+            self._images[key] = image
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._images), 'bytes': self.bytes}
+
+    def stats_text(self):
+        return f"Çizim önbelleği: {self.hits} isabet / {self.misses} ıskalama"
+
+
+render_cache = RenderCache(max_bytes=int(float(os.getenv("MATHOCR_RENDER_CACHE_MB", "32")) * 1024 * 1024))
+
+
+_parser = None
+
+
+def _rasterize(latex_str, fontsize, color, facecolor, dpi):
+    """Draws ``$latex_str$`` with mathtext and returns a tightly cropped RGB array.
+
+    mathtext yields an 8-bit coverage mask; it is cropped to its ink, padded by
+    0.1 inch and blended between the two colours in NumPy. No Figure, canvas
+    or PNG encode/decode is involved.
+    """
+    global _parser
+    import numpy as np
+    from matplotlib.colors import to_rgb
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.mathtext import MathTextParser
+
+    with _render_lock:
+        if _parser is None:
+            _parser = MathTextParser('agg')
+        mask = np.asarray(_parser.parse(f"${latex_str}$", dpi=dpi, prop=FontProperties(size=fontsize)).image)
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size:
+        mask = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    pad = round(0.1 * dpi)
+    mask = np.pad(mask, pad)
+
+    background = np.array(to_rgb(facecolor), dtype=np.float32) * 255
+    foreground = np.array(to_rgb(color), dtype=np.float32) * 255
+    alpha = mask[..., None].astype(np.float32) / 255
+    return (background + (foreground - background) * alpha + 0.5).astype(np.uint8)
+
+
+def render_latex_image(latex_str, fontsize=20, color='#dfe6e9', facecolor='#2d3436', dpi=100, cache=render_cache):
+    """Renders ``$latex_str$`` to a QImage.
+
+    The pixels come straight from matplotlib's mathtext rasteriser (see
+    ``_rasterize``), so it is safe to call from a worker thread. Only QImage is
+    produced here; turning it into a QPixmap has to happen on the GUI thread.
+    matplotlib is imported on the first call (or by startup.preload) so it does
+    not delay the window. Results are kept in ``cache`` (pass ``None`` to
+    bypass it), so a repeated expression does not touch matplotlib at all.
+    """
+    key = (latex_str, fontsize, color, facecolor, dpi)
+    if cache is not None:
+        image = cache.get(key)
+        if image is not None:
+            return image
+
+    pixels = _rasterize(latex_str, fontsize, color, facecolor, dpi)
+    height, width, _ = pixels.shape
+    # copy(): QImage kendi belleğine sahip olsun, NumPy dizisi serbest kalabilir
+    image = QImage(pixels.data, width, height, pixels.strides[0], QImage.Format_RGB888).copy()
+    if cache is not None:
+        cache.put(key, image)
+    return image
@@ -0,0 +1,154 @@
+import base64
+import json
+import os
+import threading
+import time
+
+from ocr_backends import OCRBackend
+from ocr_cache import image_digest, perceptual_hash
+from tracing import span
+
+DEFAULT_API_BASE = 'https://api.mathpix.com'
+# MATHPIX_API_BASE=http://127.0.0.1:8765 istekleri yerel taklit sunucuya (mathpix_stub.py) yönlendirir
+MATHPIX_API_BASE = os.getenv("MATHPIX_API_BASE", DEFAULT_API_BASE).rstrip('/')
+MATHPIX_URL = MATHPIX_API_BASE + '/v3/text'
+
+MATHPIX_OPTIONS = {
+    'formats': ['latex_styled'],
+    'data_options': {
+        'include_latex': True
+    }
+}
+
+
+class MathpixClient(OCRBackend):
+    """Long-lived Mathpix client (the live ``OCRBackend``); the app creates one and reuses it.
+
+    Owns a ``requests.Session`` with a pooled keep-alive ``HTTPAdapter``, so after
+    the first request the TCP+TLS connection is reused instead of being set up
+    again for each frame. Every call uses ``(connect_timeout, read_timeout)``.
+    With an ``OCRCache`` attached, cached images never reach the network.
+
+    ``upload_mode='multipart'`` sends the encoded buffer as a binary file part;
+    ``'json'`` is the original base64 data-URI body, kept as a fallback.
+    Size and build time of the last request body are kept in ``last_upload``
+    (per thread, so concurrent region uploads do not mix them up).
+    ``requests`` is imported and the session built on first use (normally in
+    the ``warm_up`` thread), not while the window is being created.
+    """
+
+    def __init__(self, app_id, app_key, url=MATHPIX_URL, pool_size=4,
+                 connect_timeout=3.05, read_timeout=30, cache=None, upload_mode='multipart'):
+        super().__init__()
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.upload_mode = upload_mode
+        self._credentials = (app_id, app_key)
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'app_id': self._credentials[0],
+                    'app_key': self._credentials[1],
+                    'Connection': 'keep-alive'
+                })
+                self._session = session
+            return self._session
+
+    # İlk yakalamada TLS el sıkışmasını beklememek için bağlantıyı önceden aç
+    def warm_up(self):
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        import requests
+
+        try:
+            self.session.head(self.url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print("Mathpix ön bağlantısı kurulamadı:", e)
+
+    def recognize(self, buffer, frame=None, mime='image/png'):
+        """Returns the ``/v3/text`` JSON reply for an encoded image buffer.
+
+        ``frame`` is the raw image the buffer was encoded from; when given, its
+        perceptual hash is used for near-duplicate cache lookups.
+        ``last_upload`` stays ``None`` when the reply came from the cache.
+        """
+        self.last_upload = None
+        if self.cache is None:
+            return self._post(buffer, mime)
+
+        digest = image_digest(buffer)
+        phash = perceptual_hash(frame) if frame is not None else None
+        result = self.cache.get(digest, phash)
+        if result is None:
+            result = self._post(buffer, mime)
+            if 'latex_styled' in result:
+                self.cache.put(digest, result, phash)
+        return result
+
+    def _prepare(self, session, buffer, mode, mime='image/png'):
+        import requests  # session kurulduysa zaten yüklüdür
+
+        if mode == 'json':
+            img_base64 = base64.b64encode(buffer).decode()
+            data = dict(MATHPIX_OPTIONS, src=f'data:{mime};base64,{img_base64}')
+            request = requests.Request('POST', self.url, json=data)
+        else:
+            request = requests.Request('POST', self.url,
+                                       files={'file': ('frame.' + mime.split('/')[1], buffer.tobytes(), mime)},
+                                       data={'options_json': json.dumps(MATHPIX_OPTIONS)})
+        return session.prepare_request(request)
+
+    def _post(self, buffer, mime):
+        # Oturum (ve requests'in ilk yüklenmesi) gövde oluşturma süresine sayılmaz
+        session = self.session
+        start = time.perf_counter()
+        prepared = self._prepare(session, buffer, self.upload_mode, mime)
+        self.last_upload = {
+            'mode': self.upload_mode,
+            'image_bytes': len(buffer),
+            'payload_bytes': len(prepared.body),
+            'encode_ms': (time.perf_counter() - start) * 1000
+        }
+        with span('mathpix.post'):
+            response = session.send(prepared, timeout=self.timeout)
+            return response.json()
+
+    def compare_upload_modes(self, buffer, mime='image/png'):
+        """Builds (without sending) both request bodies and reports size and build time.
+
+        Used by ``bench_upload.py``; nothing goes over the network.
+        """
+        session = self.session
+        report = {}
+        for mode in ('multipart', 'json'):
+            start = time.perf_counter()
+            prepared = self._prepare(session, buffer, mode, mime)
+            report[mode] = {
+                'payload_bytes': len(prepared.body),
+                'encode_ms': (time.perf_counter() - start) * 1000
+            }
+        return report
+
+    def stats_text(self):
+        return self.cache.stats_text() if self.cache is not None else "Önbellek kapalı"
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,173 @@
+"""Local stand-in for the Mathpix ``/v3/text`` endpoint, for offline runs and benchmarks.
+
+    python mathpix_stub.py --port 8765 --responses ~/.mathocr/ocr_cache.sqlite3 --latency 0.4 --jitter 0.15
+    MATHPIX_API_BASE=http://127.0.0.1:8765 MATHPIX_APP_ID=x MATHPIX_APP_KEY=x python apideneme.py
+
+Replies are recorded ``/v3/text`` responses keyed by the SHA-256 of the
+uploaded image (the same digest ``OCRCache`` uses), loaded from an OCR cache
+database, an ``ocr_backends`` cassette, a ``{digest: response}`` JSON file or
+a corpus of ``latex_styled`` lines. An image with no recording gets a corpus reply chosen by its digest
+(``--fallback cycle``) or a Mathpix-style error (``--fallback error``).
+Every reply waits ``latency`` ± ``jitter`` seconds and fails with HTTP 500
+at ``error_rate``. Credentials are not checked.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_latex import DEFAULT_CORPUS, load_corpus
+from ocr_backends import read_cassette
+
+
+def load_responses(paths):
+    """Returns ``(by_digest, pool)``: recorded replies by image digest, and replies usable for any image."""
+    by_digest, pool = {}, []
+    for path in paths:
+        if path.endswith(('.sqlite3', '.db')):
+            with sqlite3.connect(path) as db:
+                for digest, response in db.execute("SELECT digest, response FROM responses"):
+                    by_digest[digest] = json.loads(response)
+        elif path.endswith(('.jsonl.gz', '.jsonl')) and _is_cassette(path):
+            by_digest.update((r['digest'], r['response']) for r in read_cassette(path))
+        elif path.endswith('.json'):
+            with open(path, encoding='utf-8') as f:
+                by_digest.update(json.load(f))
+        else:
+            pool.extend({'latex_styled': latex} for latex in load_corpus(path))
+    pool.extend(r for r in by_digest.values() if 'latex_styled' in r)
+    return by_digest, pool
+
+
+def _is_cassette(path):
+    first = next(read_cassette(path), None)
+    return isinstance(first, dict) and 'digest' in first and 'response' in first
+
+
+class StubState:
+    """Recordings, fault injection settings and counters shared by the handler threads."""
+
+    def __init__(self, by_digest, pool, latency=0.0, jitter=0.0, error_rate=0.0, fallback='cycle', seed=None):
+        self.by_digest = by_digest
+        self.pool = pool
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fallback = fallback
+        self.random = random.Random(seed)
+        self.counts = {'requests': 0, 'recorded': 0, 'fallback': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def reply(self, image):
+        """Returns ``(http_status, body)`` for one uploaded image."""
+        digest = hashlib.sha256(image).hexdigest()
+        with self._lock:
+            self.counts['requests'] += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+        time.sleep(delay)
+
+        if failed:
+            return self._count('errors', 500, {'error': "Simulated server error", 'error_info': {'id': 'sim_error'}})
+        if digest in self.by_digest:
+            return self._count('recorded', 200, self.by_digest[digest])
+        if self.fallback == 'cycle' and self.pool:
+            return self._count('fallback', 200, self.pool[int(digest, 16) % len(self.pool)])
+        return self._count('errors', 200, {'error': "No recording for this image",
+                                           'error_info': {'id': 'image_no_content', 'digest': digest}})
+
+    def _count(self, key, status, body):
+        with self._lock:
+            self.counts[key] += 1
+        return status, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # İstemcinin keep-alive bağlantısı açık kalsın
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path.split('?')[0].rstrip('/') != '/v3/text':
+            return self._send(404, {'error': f"Unknown endpoint {self.path}"})
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            image = self._image(body)
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        self._send(*self.server.state.reply(image))
+
+    def _image(self, body):
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+            for part in message.iter_parts():
+                if part.get_param('name', header='content-disposition') == 'file':
+                    return part.get_payload(decode=True)
+            raise ValueError("multipart body has no 'file' part")
+        src = json.loads(body or b'{}').get('src', '')
+        if not src.startswith('data:') or ',' not in src:
+            raise ValueError("expected a 'src' data URI")
+        return base64.b64decode(src.split(',', 1)[1])
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(state, host='127.0.0.1', port=0):
+    """Serves ``state`` on a daemon thread; returns ``(server, base_url)``. ``port=0`` picks a free port."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name="MathpixStub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--responses', nargs='*', default=[DEFAULT_CORPUS],
+                        help="OCR önbelleği (.sqlite3), kaset (.jsonl.gz), {özet: yanıt} JSON'u veya latex_styled derlemi")
+    parser.add_argument('--latency', type=float, default=0.0, help="Yanıt gecikmesi (sn)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Gecikmeye eklenen ± rastgele sapma (sn)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="HTTP 500 dönen isteklerin oranı (0-1)")
+    parser.add_argument('--fallback', choices=['cycle', 'error'], default='cycle',
+                        help="Kaydı olmayan görüntüler için: derlemden yanıt ya da hata")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    by_digest, pool = load_responses([os.path.expanduser(p) for p in args.responses])
+    state = StubState(by_digest, pool, args.latency, args.jitter, args.error_rate, args.fallback, args.seed)
+    server, url = start(state, args.host, args.port)
+    print(f"Mathpix taklidi {url}/v3/text: {len(by_digest)} kayıtlı yanıt, {len(pool)} yedek yanıt")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    print("İstekler:", state.counts)
+
+
+if __name__ == "__main__":
+    main()
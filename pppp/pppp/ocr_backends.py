@@ -0,0 +1,224 @@
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+
+from ocr_cache import CACHE_DIR, image_digest, perceptual_hash
+
+BACKENDS = ('live', 'record', 'replay')
+DEFAULT_CASSETTE = os.path.join(CACHE_DIR, "ocr_cassette.jsonl.gz")
+
+
+class OCRBackend:
+    """What the apps and ``timed_upload`` need from an OCR service.
+
+    ``recognize(buffer, frame, mime)`` returns a ``/v3/text``-shaped dict
+    (``latex_styled`` on success, ``error`` otherwise). ``last_upload`` is
+    the per-thread description of the request that was actually sent, or
+    ``None`` when nothing went over the network. ``MathpixClient`` is the
+    live implementation; ``RecordingBackend`` and ``ReplayBackend`` are below.
+    """
+
+    cache = None
+
+    def __init__(self):
+        self._local = threading.local()
+
+    # Bölgeler eşzamanlı tanındığında her iş parçacığı kendi son yüklemesini görür
+    @property
+    def last_upload(self):
+        return getattr(self._local, 'last_upload', None)
+
+    @last_upload.setter
+    def last_upload(self, value):
+        self._local.last_upload = value
+
+    def recognize(self, buffer, frame=None, mime='image/png'):
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+    def stats_text(self):
+        return ""
+
+    def close(self):
+        pass
+
+
+def _gunzip_prefix(data):
+    """Decompresses ``data`` member by member; returns ``(bytes, clean)``.
+
+    Decompression stops at the first cut-off or damaged member, keeping the
+    bytes recovered up to that point; ``clean`` is then ``False``.
+    """
+    chunks = []
+    while data:
+        member = zlib.decompressobj(wbits=31)
+        pos = 0
+        try:
+            # Parça parça açılır ki bozuk yere kadar çıkan veri kaybolmasın
+            while not member.eof and pos < len(data):
+                chunks.append(member.decompress(data[pos:pos + 65536]))
+                pos += 65536
+        except zlib.error:
+            return b''.join(chunks), False
+        if not member.eof:
+            return b''.join(chunks), False
+        data = member.unused_data + data[pos:]
+    return b''.join(chunks), True
+
+
+def _load_cassette(path):
+    """Returns ``(records, clean)`` for a cassette file.
+
+    ``clean`` is ``False`` when the file ends in a record cut short by a crash
+    (a partial last line or a truncated gzip member); the complete records
+    before it are still returned.
+    """
+    if not os.path.exists(path):
+        return [], True
+    with open(path, 'rb') as f:
+        data = f.read()
+    clean = True
+    if path.endswith('.gz'):
+        data, clean = _gunzip_prefix(data)
+    lines = data.split(b'\n')
+    clean = clean and not lines[-1]
+    records = []
+    for line in lines[:-1]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            clean = False
+    return records, clean
+
+
+def _encode_record(path, record):
+    line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+    # Her kayıt ayrı bir gzip üyesi: çökme en fazla yazılmakta olan kaydı götürür
+    return gzip.compress(line) if path.endswith('.gz') else line
+
+
+def read_cassette(path):
+    """Yields the ``{'digest', 'phash', 'response', 'created'}`` records of a cassette file.
+
+    A cassette is JSON Lines, gzip-compressed when the name ends in ``.gz``
+    (one gzip member per record). Whatever a crash left unfinished at the end
+    of the file -- a partial line, a truncated or damaged gzip member -- is
+    skipped and the records before it are kept.
+    """
+    yield from _load_cassette(path)[0]
+
+
+class RecordingBackend(OCRBackend):
+    """Live OCR that also appends every new (image digest, response) pair to a cassette.
+
+    The digest is the SHA-256 of the uploaded buffer, as in ``OCRCache``; the
+    perceptual hash of the frame is stored too, so a replay with different
+    preprocessing settings can still find the capture. An image already on
+    the cassette is not written twice. A cassette left with a cut-off record
+    by an earlier crash is rewritten without it before anything is appended.
+    """
+
+    def __init__(self, live, path=DEFAULT_CASSETTE):
+        super().__init__()
+        self.live = live
+        self.path = path
+        self.cache = live.cache
+        self.recorded = 0
+        records, clean = _load_cassette(path)
+        self._digests = {record.get('digest') for record in records}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not clean:
+            # Yarım kaydın arkasına eklenen kayıtlar okunamaz; önce sağlam kısım yeniden yazılır
+            print(f"Uyarı: kaset yarıda kesilmiş, {len(records)} kayıt kurtarıldı: {path}")
+            temp = path + ".tmp"
+            with open(temp, 'wb') as f:
+                f.writelines(_encode_record(path, record) for record in records)
+            os.replace(temp, path)
+        self._file = open(path, 'ab')
+
+    @property
+    def last_upload(self):
+        return self.live.last_upload
+
+    def recognize(self, buffer, frame=None, mime='image/png'):
+        result = self.live.recognize(buffer, frame, mime)
+        digest = image_digest(buffer)
+        with self._lock:
+            if digest not in self._digests:
+                self._digests.add(digest)
+                record = {'digest': digest, 'phash': perceptual_hash(frame) if frame is not None else None,
+                          'response': result, 'created': time.time()}
+                self._file.write(_encode_record(self.path, record))
+                self._file.flush()
+                self.recorded += 1
+        return result
+
+    def warm_up(self):
+        self.live.warm_up()
+
+    def stats_text(self):
+        return f"{self.live.stats_text()}, kasete {self.recorded} yanıt yazıldı"
+
+    def close(self):
+        self.live.close()
+        with self._lock:
+            self._file.close()
+
+
+class ReplayBackend(OCRBackend):
+    """Serves responses from a cassette with no network access at all.
+
+    Lookup is by buffer digest first, then by the frame's perceptual hash.
+    An image that is not on the cassette gets a Mathpix-style error reply.
+    """
+
+    def __init__(self, path=DEFAULT_CASSETTE):
+        super().__init__()
+        self.path = path
+        self.responses = {}
+        self.by_phash = {}
+        for record in read_cassette(path):
+            self.responses[record['digest']] = record['response']
+            if record.get('phash'):
+                self.by_phash.setdefault(record['phash'], record['response'])
+        if not self.responses:
+            print(f"Uyarı: kaset boş ya da yok: {path}")
+        self.hits = 0
+        self.misses = 0
+
+    def recognize(self, buffer, frame=None, mime='image/png'):
+        self.last_upload = None
+        digest = image_digest(buffer)
+        response = self.responses.get(digest)
+        if response is None and frame is not None and self.by_phash:
+            response = self.by_phash.get(perceptual_hash(frame))
+        if response is None:
+            self.misses += 1
+            return {'error': "Kasette bu görüntü yok", 'error_info': {'id': 'cassette_miss', 'digest': digest}}
+        self.hits += 1
+        return response
+
+    def stats_text(self):
+        return f"Kaset: {self.hits} isabet / {self.misses} ıskalama"
+
+
+def create_backend(kind, live_factory, cassette=None):
+    """Builds the OCR backend named ``kind`` (``live``, ``record`` or ``replay``).
+
+    ``live_factory`` is called only when a live client is needed, so replay
+    runs need no credentials.
+    """
+    cassette = cassette or DEFAULT_CASSETTE
+    if kind == 'live':
+        return live_factory()
+    if kind == 'record':
+        return RecordingBackend(live_factory(), cassette)
+    if kind == 'replay':
+        return ReplayBackend(cassette)
+    raise ValueError(f"Bilinmeyen OCR arka ucu: {kind} (seçenekler: {', '.join(BACKENDS)})")
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Kalıcı önbelleklerin varsayılan klasörü
+CACHE_DIR = os.getenv("MATHOCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".mathocr"))
+
+
+def image_digest(buffer):
+    return hashlib.sha256(bytes(buffer)).hexdigest()
+
+
+def perceptual_hash(frame, hash_size=8, method='dhash'):
+    """aHash/dHash of a BGR or grayscale frame as a hex string.
+
+    The frame is shrunk to a few pixels of grayscale, so small camera shake,
+    noise and exposure changes map to the same (or a nearby) hash.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if method == 'ahash':
+        small = cv2.resize(gray, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+        bits = small > small.mean()
+    else:
+        small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits.ravel()).tobytes().hex()
+
+
+def hamming_distance(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+class OCRCache:
+    """Persistent Mathpix response cache keyed by the SHA-256 of the encoded image.
+
+    Entries live in a SQLite file and are evicted least-recently-used first once
+    the stored responses exceed ``max_bytes`` or have not been used for
+    ``max_age`` seconds. With ``phash_distance > 0`` a lookup that misses on the
+    exact digest falls back to the closest stored perceptual hash within that
+    many bits, which catches repeated camera frames of the same page.
+    """
+
+    def __init__(self, path=None, max_bytes=50 * 1024 * 1024, max_age=30 * 24 * 3600,
+                 phash_distance=0):
+        self.path = path or os.path.join(CACHE_DIR, "ocr_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.phash_distance = phash_distance
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                digest TEXT PRIMARY KEY,
+                phash TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._db.commit()
+        self._evict()
+
+    def get(self, digest, phash=None):
+        with self._lock:
+            row = self._db.execute("SELECT digest, response FROM responses WHERE digest = ?",
+                                   (digest,)).fetchone()
+            if row is not None:
+                self.hits += 1
+            elif phash is not None and self.phash_distance > 0:
+                row = self._nearest(phash)
+                if row is not None:
+                    self.near_hits += 1
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE digest = ?", (time.time(), row[0]))
+            self._db.commit()
+            return json.loads(row[1])
+
+    def _nearest(self, phash):
+        best, best_distance = None, self.phash_distance + 1
+        for digest, stored in self._db.execute("SELECT digest, phash FROM responses WHERE phash IS NOT NULL"):
+            distance = hamming_distance(phash, stored)
+            if distance < best_distance:
+                best, best_distance = digest, distance
+        if best is None:
+            return None
+        return self._db.execute("SELECT digest, response FROM responses WHERE digest = ?", (best,)).fetchone()
+
+    def put(self, digest, response, phash=None):
+        payload = json.dumps(response)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (digest, phash, payload, len(payload), now, now))
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        self._db.execute("DELETE FROM responses WHERE last_used < ?", (time.time() - self.max_age,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for digest, size in self._db.execute(
+                    "SELECT digest, size FROM responses ORDER BY last_used").fetchall():
+                self._db.execute("DELETE FROM responses WHERE digest = ?", (digest,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'hits': self.hits, 'near_hits': self.near_hits, 'misses': self.misses,
+                'entries': entries, 'bytes': size}
+
+    def stats_text(self):
+        return f"Önbellek: {self.hits + self.near_hits} isabet / {self.misses} ıskalama"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
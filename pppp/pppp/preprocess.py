@@ -0,0 +1,171 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from tracing import span
+
+ENCODERS = {
+    'png': ('.png', 'image/png'),
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'webp': ('.webp', 'image/webp')
+}
+
+# Varsayılan: gri ton + mürekkep kutusuna kırp + en fazla 1600 px + PNG
+DEFAULT_SPEC = "gray,crop,max=1600,png=3"
+
+
+class Preprocessor:
+    """Shrinks a frame before it is uploaded for OCR.
+
+    Steps, each optional and done with OpenCV/NumPy on the whole array:
+    grayscale conversion, contrast normalisation (``'clahe'``, ``'stretch'``) or
+    binarisation (``'otsu'``, ``'adaptive'``), cropping to the bounding box of the
+    ink, downscaling so the longer side is at most ``max_dim`` and encoding as
+    PNG (``quality`` = compression level 0-9), JPEG or WebP (``quality`` 0-100).
+
+    ``record`` keeps uploaded bytes and end-to-end latency per setting label so
+    different settings can be compared on real captures; ``report`` and
+    ``stats_text`` read them back. Both are safe to call from several threads.
+    """
+
+    def __init__(self, grayscale=True, contrast=None, crop=True, crop_margin=16,
+                 max_dim=1600, encoder='png', quality=3):
+        if encoder not in ENCODERS:
+            raise ValueError(f"Bilinmeyen kodlayıcı: {encoder}")
+        self.grayscale = grayscale
+        self.contrast = contrast
+        self.crop = crop
+        self.crop_margin = crop_margin
+        self.max_dim = max_dim
+        self.encoder = encoder
+        self.quality = quality
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Parses e.g. ``"gray,otsu,crop,max=1280,jpeg=85"``; ``"off"`` sends the raw PNG."""
+        options = dict(grayscale=False, contrast=None, crop=False, max_dim=None, encoder='png', quality=3)
+        for part in (p.strip() for p in spec.split(',')):
+            name, _, value = part.partition('=')
+            if name in ('', 'off'):
+                continue
+            elif name == 'gray':
+                options['grayscale'] = True
+            elif name in ('clahe', 'stretch', 'otsu', 'adaptive'):
+                options['contrast'] = name
+            elif name == 'crop':
+                options['crop'] = True
+            elif name == 'max':
+                options['max_dim'] = int(value)
+            elif name in ENCODERS:
+                options['encoder'] = name
+                if value:
+                    options['quality'] = int(value)
+                elif name != 'png':
+                    options['quality'] = 90
+            else:
+                raise ValueError(f"Bilinmeyen ön işleme adımı: {part}")
+        return cls(**options)
+
+    def label(self):
+        parts = []
+        if self.grayscale:
+            parts.append('gray')
+        if self.contrast:
+            parts.append(self.contrast)
+        if self.crop:
+            parts.append('crop')
+        if self.max_dim:
+            parts.append(f'max={self.max_dim}')
+        parts.append(f'{self.encoder}={self.quality}')
+        return ','.join(parts)
+
+    def process(self, frame):
+        """Returns ``(encoded_buffer, mime_type)`` for the frame."""
+        image = frame
+        if self.grayscale or self.contrast:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+        if self.contrast == 'clahe':
+            image = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(image)
+        elif self.contrast == 'stretch':
+            image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX)
+        elif self.contrast == 'otsu':
+            _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        elif self.contrast == 'adaptive':
+            image = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                          cv2.THRESH_BINARY, 31, 15)
+
+        if self.crop:
+            image = self._crop_to_ink(image)
+
+        if self.max_dim:
+            height, width = image.shape[:2]
+            scale = self.max_dim / max(height, width)
+            if scale < 1:
+                image = cv2.resize(image, (round(width * scale), round(height * scale)),
+                                   interpolation=cv2.INTER_AREA)
+
+        ext, mime = ENCODERS[self.encoder]
+        if self.encoder == 'png':
+            params = [cv2.IMWRITE_PNG_COMPRESSION, self.quality]
+        elif self.encoder == 'jpeg':
+            params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        else:
+            params = [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+        ok, buffer = cv2.imencode(ext, image, params)
+        if not ok:
+            raise ValueError(f"Görüntü {self.encoder} olarak kodlanamadı")
+        return buffer, mime
+
+    def _crop_to_ink(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        # Koyu mürekkep açık zemin üzerinde varsayılır
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        points = cv2.findNonZero(ink)
+        if points is None:
+            return image
+        x, y, w, h = cv2.boundingRect(points)
+        m = self.crop_margin
+        height, width = gray.shape
+        return image[max(y - m, 0):min(y + h + m, height), max(x - m, 0):min(x + w + m, width)]
+
+    def record(self, uploaded_bytes, latency):
+        # Bölgeler ve toplu işlem kayıtları ayrı iş parçacıklarından gelir
+        with self._lock:
+            entry = self.stats.setdefault(self.label(), {'count': 0, 'bytes': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['bytes'] += uploaded_bytes
+            entry['seconds'] += latency
+
+    def report(self):
+        with self._lock:
+            return {label: {'count': e['count'],
+                            'avg_bytes': e['bytes'] / e['count'],
+                            'avg_latency_ms': e['seconds'] * 1000 / e['count']}
+                    for label, e in self.stats.items()}
+
+    def stats_text(self):
+        report = self.report()
+        if not report:
+            return f"Ön işleme [{self.label()}]: henüz yükleme yok"
+        return "; ".join(f"Ön işleme [{label}]: {e['count']} yükleme, ort. {e['avg_bytes']:.0f} bayt, "
+                         f"{e['avg_latency_ms']:.0f} ms" for label, e in report.items())
+
+
+def timed_upload(preprocessor, client, frame, progress=print):
+    """Preprocesses and recognises one frame, recording size and latency of real uploads."""
+    started = time.perf_counter()
+    progress("Görüntü hazırlanıyor...")
+    with span('preprocess'):
+        buffer, mime = preprocessor.process(frame)
+    progress("Mathpix'e gönderiliyor...")
+    with span('ocr'):
+        result = client.recognize(buffer, frame, mime)
+    if client.last_upload is not None:
+        preprocessor.record(len(buffer), time.perf_counter() - started)
+    return result
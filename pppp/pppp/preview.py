@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+from PyQt5.QtCore import QRectF, Qt, QTimer
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+from PyQt5.QtWidgets import QLabel
+
+
+class VideoPreview(QLabel):
+    """Camera preview that paints BGR frames without per-frame QImage/QPixmap copies.
+
+    ``show_frame`` resizes the frame once with OpenCV, straight into a buffer
+    that is reused until the widget size changes, and a QImage wraps that buffer
+    as ``Format_BGR888`` so no colour conversion happens. ``paintEvent`` draws
+    it centred in the contents rect. It is still a QLabel, so the style sheet
+    background, border and padding are drawn as before.
+
+    ``set_overlay`` draws per-region results over the live picture for a few
+    seconds: a box per region and, under it, the rendered result (a QImage) or
+    a short text.
+    """
+
+    def __init__(self, parent=None, interpolation=cv2.INTER_LINEAR):
+        super().__init__(parent)
+        self.interpolation = interpolation
+        self._buffer = None
+        self._image = None
+        self._overlay = []
+        self._overlay_size = None
+        self._overlay_timer = QTimer(self)
+        self._overlay_timer.setSingleShot(True)
+        self._overlay_timer.timeout.connect(self.clear_overlay)
+
+    def set_overlay(self, items, frame_size, seconds=10):
+        """``items``: ``(box, label, ok)`` tuples in frame pixels; ``frame_size``: ``(width, height)``."""
+        self._overlay = list(items)
+        self._overlay_size = frame_size
+        self._overlay_timer.start(int(seconds * 1000))
+        self.update()
+
+    def clear_overlay(self):
+        self._overlay = []
+        self.update()
+
+    def show_frame(self, frame):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        area = self.contentsRect()
+        height, width = frame.shape[:2]
+        scale = min(area.width() / width, area.height() / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+        if self._buffer is None or (self._buffer.shape[1], self._buffer.shape[0]) != size:
+            self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._image = QImage(self._buffer.data, size[0], size[1], self._buffer.strides[0], QImage.Format_BGR888)
+        if size == (width, height):
+            np.copyto(self._buffer, frame)
+        else:
+            cv2.resize(frame, size, dst=self._buffer, interpolation=self.interpolation)
+        self.update()
+
+    def clear(self):
+        self._buffer = None
+        self._image = None
+        self._overlay = []
+        super().clear()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None:
+            return
+        area = self.contentsRect()
+        left = area.x() + (area.width() - self._image.width()) // 2
+        top = area.y() + (area.height() - self._image.height()) // 2
+        painter = QPainter(self)
+        painter.drawImage(left, top, self._image)
+        if self._overlay:
+            self._paint_overlay(painter, left, top)
+        painter.end()
+
+    def _paint_overlay(self, painter, left, top):
+        scale = self._image.width() / self._overlay_size[0]
+        for (x, y, w, h), label, ok in self._overlay:
+            box = QRectF(left + x * scale, top + y * scale, w * scale, h * scale)
+            painter.setPen(QPen(QColor('#27ae60' if ok else '#c0392b'), 2))
+            painter.drawRect(box)
+            if isinstance(label, QImage):
+                target = label.size().scaled(int(box.width()), 32, Qt.KeepAspectRatio)
+                painter.drawImage(QRectF(box.left(), box.bottom() + 2, target.width(), target.height()), label)
+            elif label:
+                painter.fillRect(QRectF(box.left(), box.bottom() + 2, box.width(), 20), QColor(45, 52, 54, 200))
+                painter.setPen(QColor('#dfe6e9'))
+                painter.drawText(QRectF(box.left() + 4, box.bottom() + 2, box.width() - 8, 20),
+                                 Qt.AlignVCenter | Qt.AlignLeft, label)
@@ -0,0 +1,208 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import deque
+
+# Şu an bu iş parçacığında profillenen yakalama; çözücü süreçlerinden gelen istatistikler buna eklenir
+_local = threading.local()
+# Python 3.12'den beri cProfile süreç geneli çalışır ve aynı anda yalnızca biri etkin olabilir
+_PROFILE_LOCK = threading.Lock()
+
+
+def is_active():
+    """True while the calling thread is inside ``CaptureProfiler.run``."""
+    return getattr(_local, 'remote', None) is not None
+
+
+def add_stats(stats):
+    """Adds a ``pstats``-style dict gathered in another process to the current capture's profile."""
+    remote = getattr(_local, 'remote', None)
+    if remote is not None and stats:
+        remote.append(_RemoteStats(stats))
+
+
+class _RemoteStats:
+    # pstats.Stats kabul eder: create_stats() ve stats özniteliği olan her nesne
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def in_capture(fn):
+    """Binds ``fn`` to the calling thread's capture, for running it on another thread.
+
+    Solver-process stats gathered inside ``fn`` are then merged into that
+    capture's profile. Outside a capture ``fn`` is returned as is.
+    """
+    remote = getattr(_local, 'remote', None)
+    if remote is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        _local.remote = remote
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.remote = None
+
+    return bound
+
+
+def _enable(profile):
+    try:
+        profile.enable()
+        return True
+    except ValueError:  # 3.12+: süreçte başka bir profil aracı etkin
+        return False
+
+
+def profile_call(fn, *args, **kwargs):
+    """Runs ``fn`` under cProfile; returns ``(result, stats_dict)``. Used inside solver processes."""
+    profile = cProfile.Profile()
+    try:
+        result = profile.runcall(fn, *args, **kwargs)
+    finally:
+        profile.create_stats()
+    return result, profile.stats
+
+
+def capture_tag(outcome):
+    """A short file-name-safe tag for a pipeline result: the cleaned LaTeX when there is one."""
+    if isinstance(outcome, dict):
+        text = outcome.get('latex_expr') or ('error' if 'error' in outcome or outcome.get('failed') else 'capture')
+    elif isinstance(outcome, list):
+        text = f'{len(outcome)}_regions'
+    else:
+        text = 'capture'
+    return re.sub(r'_+', '_', re.sub(r'[^A-Za-z0-9]+', '_', text)).strip('_')[:60] or 'capture'
+
+
+class CaptureProfiler:
+    """Opt-in cProfile hook: one ``.prof`` file per OCR request, plus a rolling summary.
+
+    ``run(fn, *args)`` profiles one call on the calling thread. SymPy runs in
+    ``SolverPool`` processes; while a run is active the pool profiles the job
+    there and sends the stats back, and they are merged into the same file.
+    Files are named ``<time>-<n>-<cleaned LaTeX>.prof``, and ``index.jsonl``
+    records the full LaTeX and duration of each. ``summary.txt`` holds the
+    ``top`` functions by own time over the last ``window`` requests.
+    ``wrap_frames(fn)`` profiles camera ticks into one ``frames.prof``,
+    rewritten every ``frame_batch`` ticks.
+    With ``directory=None`` everything is a pass-through.
+
+    Only one profile is active at a time in the process (from Python 3.12
+    cProfile refuses a second one). A capture waits for a camera tick to
+    finish; a tick that comes while a capture, or a profiler outside this
+    class, is active runs unprofiled and is counted in ``skipped``. A frame
+    with several equation regions is one capture: run ``solve_regions``
+    under ``run``, and the regions' solver stats go into the same file.
+    """
+
+    def __init__(self, directory=None, top=25, window=20, frames=False, frame_batch=300):
+        self.directory = directory
+        self.top = top
+        self.frames = frames
+        self.frame_batch = frame_batch
+        self._recent = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._frame_profile = None
+        self._frame_ticks = 0
+        self.skipped = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def run(self, fn, *args, **kwargs):
+        if not self.enabled or is_active():
+            return fn(*args, **kwargs)
+
+        with _PROFILE_LOCK:
+            profile = cProfile.Profile()
+            if not _enable(profile):
+                self._skip()
+                return fn(*args, **kwargs)
+            _local.remote = remote = []
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                _local.remote = None
+        self._save(profile, remote, capture_tag(result), result, time.perf_counter() - started)
+        return result
+
+    def _skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def _save(self, profile, remote, tag, result, seconds):
+        stats = pstats.Stats(profile)
+        for extra in remote:
+            stats.add(extra)
+        with self._lock:
+            self._count += 1
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._count:04d}-{tag}.prof"
+            stats.dump_stats(os.path.join(self.directory, name))
+            with open(os.path.join(self.directory, 'index.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'file': name, 'created': time.time(), 'seconds': round(seconds, 4),
+                                    'latex': result.get('latex_expr') if isinstance(result, dict) else None,
+                                    'solver_processes': len(remote)}, ensure_ascii=False) + "\n")
+            self._recent.append(stats.stats)
+            summary = self.summary_text()
+            with open(os.path.join(self.directory, 'summary.txt'), 'w', encoding='utf-8') as f:
+                f.write(summary)
+        print(f"Profil: {name} ({seconds * 1000:.0f} ms)")
+
+    def summary_text(self):
+        """The hottest ``top`` functions by own time over the recent requests, as pstats prints them."""
+        if not self._recent:
+            return ""
+        recent = list(self._recent)
+        stream = io.StringIO()
+        # Stats kaynağın sözlüğünü sahiplenip yerinde günceller; kopyası verilir
+        merged = pstats.Stats(_RemoteStats(dict(recent[0])), stream=stream)
+        for stats in recent[1:]:
+            merged.add(_RemoteStats(stats))
+        stream.write(f"Son {len(recent)} istek, kendi süresine göre en sıcak {self.top} fonksiyon "
+                     f"(başka profil etkin olduğu için {self.skipped} örnek atlandı)\n")
+        merged.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+        return stream.getvalue()
+
+    def wrap_frames(self, fn):
+        """Returns ``fn`` itself unless frame profiling is on; then a wrapper profiling every call."""
+        if not (self.enabled and self.frames):
+            return fn
+
+        def profiled(*args, **kwargs):
+            # Arayüz iş parçacığı beklemez: bir yakalama profillenirken tık profilsiz geçer
+            if not _PROFILE_LOCK.acquire(blocking=False):
+                self._skip()
+                return fn(*args, **kwargs)
+            try:
+                if self._frame_profile is None:
+                    self._frame_profile = cProfile.Profile()
+                if not _enable(self._frame_profile):
+                    self._skip()
+                    return fn(*args, **kwargs)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._frame_profile.disable()
+                    self._frame_ticks += 1
+                    if self._frame_ticks % self.frame_batch == 0:
+                        self._frame_profile.dump_stats(os.path.join(self.directory, 'frames.prof'))
+            finally:
+                _PROFILE_LOCK.release()
+
+        return profiled
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from profiling import in_capture
+
+
+def find_equation_regions(frame, min_area=0.002, max_regions=12, margin=12, work_dim=1000):
+    """Finds the bounding boxes ``(x, y, w, h)`` of separate equations in a frame.
+
+    Dark ink on a light page is separated with an adaptive threshold, then
+    dilated with a flat kernel sized from the median symbol height, so the
+    symbols of one line (and the numerator/denominator of a fraction) merge
+    into one blob while separate equations stay apart. Overlapping blobs are
+    united. Each connected component whose box covers at least
+    ``min_area`` of the frame is one region. The work is done on a copy scaled
+    to ``work_dim`` px. Boxes come back in frame coordinates, padded by
+    ``margin``, in reading order.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height, width = gray.shape
+    scale = min(1.0, work_dim / max(height, width))
+    if scale < 1:
+        gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    small_h, small_w = gray.shape
+
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    # Çekirdek boyutu yazının kendi boyutundan: ortanca sembol yüksekliği
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:count, cv2.CC_STAT_HEIGHT][stats[1:count, cv2.CC_STAT_AREA] >= 8]
+    if heights.size == 0:
+        return []
+    symbol = float(np.median(heights))
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(symbol * 1.5)), max(3, int(symbol * 0.8))))
+    blobs = cv2.dilate(ink, kernel)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blobs, connectivity=8)
+    boxes = []
+    for x, y, w, h, _ in stats[1:count]:
+        # Sayfa kenarı/gölge gibi neredeyse tüm kareyi kaplayan lekeler denklem değildir
+        if w * h < min_area * small_w * small_h or w * h > 0.9 * small_w * small_h:
+            continue
+        boxes.append((x, y, w, h))
+    boxes = sorted(_merge_overlapping(boxes), key=lambda b: b[2] * b[3], reverse=True)[:max_regions]
+
+    regions = []
+    for x, y, w, h in boxes:
+        x0 = max(int(x / scale) - margin, 0)
+        y0 = max(int(y / scale) - margin, 0)
+        x1 = min(int((x + w) / scale) + margin, width)
+        y1 = min(int((y + h) / scale) + margin, height)
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+    # Okuma sırası: önce satır (yarım kutu yüksekliği tolerans), sonra soldan sağa
+    line_height = max((h for _, _, _, h in regions), default=1) / 2
+    return sorted(regions, key=lambda b: (round(b[1] / line_height), b[0]))
+
+
+def _merge_overlapping(boxes):
+    """Unites boxes that overlap (an exponent or limit subscript inside a larger blob's box)."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                ax, ay, aw, ah = boxes[i]
+                bx, by, bw, bh = boxes[j]
+                if ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah:
+                    x, y = min(ax, bx), min(ay, by)
+                    boxes[i] = (x, y, max(ax + aw, bx + bw) - x, max(ay + ah, by + bh) - y)
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def solve_regions(frame, boxes, solve_one, workers=4):
+    """Runs ``solve_one(crop)`` for every box concurrently; results keep the box order.
+
+    Each result is ``solve_one``'s dict with the ``'box'`` added; an exception
+    becomes ``{'error': message}`` so one bad region does not lose the others.
+    Inside a ``CaptureProfiler.run`` the regions belong to that capture.
+    """
+    solve_one = in_capture(solve_one)
+
+    def run(box):
+        x, y, w, h = box
+        try:
+            outcome = solve_one(np.ascontiguousarray(frame[y:y + h, x:x + w]))
+        except Exception as e:
+            outcome = {'error': str(e)}
+        return dict(outcome, box=box)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(boxes)))) as pool:
+        return list(pool.map(run, boxes))
@@ -0,0 +1,153 @@
+from collections import namedtuple
+
+import sympy as sp
+
+from latex_parser import parse_latex_expr
+
+
+# Değerlendirilecek iş: işlem, SymPy ifadesi, değişken ve sınırlar
+#   'limit'     -> bounds = (nokta, yön); yön '+', '-' ya da None
+#   'integrate' -> bounds = (alt, üst) ya da belirsiz integral için None
+#   'diff'      -> bounds = None
+#   'doit'      -> ifade.doit(), doit yoksa evalf()
+#   'value'     -> ifade olduğu gibi döner
+Problem = namedtuple('Problem', ['operation', 'expression', 'variable', 'bounds'])
+
+
+def parse_problem(latex_expr):
+    """Turns a cleaned LaTeX string into a Problem without doing any heavy SymPy work.
+
+    The expression is parsed once by latex_parser; a top-level ``Limit``,
+    ``Integral`` or first-order ``Derivative`` becomes the matching operation,
+    anything else that still holds one of them is evaluated with ``doit``.
+    """
+    expr = parse_latex_expr(latex_expr)
+    if isinstance(expr, sp.Limit):
+        operand, var, point, direction = expr.args
+        return Problem('limit', operand, var, (point, str(direction)))
+    if isinstance(expr, sp.Integral) and len(expr.limits) == 1:
+        limit = expr.limits[0]
+        bounds = (limit[1], limit[2]) if len(limit) == 3 else None
+        return Problem('integrate', expr.function, limit[0], bounds)
+    if isinstance(expr, sp.Derivative) and expr.variable_count[0][1] == 1 and len(expr.variable_count) == 1:
+        return Problem('diff', expr.expr, expr.variables[0], None)
+    if expr.has(sp.Limit, sp.Integral, sp.Derivative):
+        return Problem('doit', expr, None, None)
+    return Problem('value', expr, None, None)
+
+
+def evaluate_problem(problem):
+    """Does the (possibly very slow) SymPy evaluation of a Problem."""
+    operation, expr, var, bounds = problem
+    if operation == 'limit':
+        point, direction = bounds
+        result = sp.limit(expr, var, point, dir=direction or '+')
+        if result is sp.zoo and direction == '+-':
+            # İki yönde farklı işaretli sonsuzluk: 1/x, x -> 0
+            raise ValueError("Sağ ve sol limitler farklı")
+        return result
+    elif operation == 'integrate':
+        if bounds is not None:
+            return sp.integrate(expr, (var, bounds[0], bounds[1]))
+        return sp.integrate(expr, var)
+    elif operation == 'diff':
+        return sp.diff(expr, var)
+    elif operation == 'doit':
+        return expr.doit() if hasattr(expr, 'doit') else expr.evalf()
+    return expr
+
+
+def has_numeric_path(problem):
+    """True for problems ``evaluate_numeric`` can answer: definite integrals and limits of one variable."""
+    operation, expr, var, bounds = problem
+    if operation == 'limit':
+        points = bounds[:1]
+    elif operation == 'integrate' and bounds is not None:
+        points = bounds
+    else:
+        return False
+    return expr.free_symbols <= {var} and not any(sp.sympify(p).free_symbols for p in points)
+
+
+def is_unevaluated(result):
+    """True when SymPy gave up and handed back an ``Integral`` or ``Limit`` instead of a value."""
+    return isinstance(result, sp.Basic) and result.has(sp.Integral, sp.Limit)
+
+
+def _mp_value(value, mpmath):
+    value = sp.sympify(value)
+    if value == sp.oo:
+        return mpmath.inf
+    if value == -sp.oo:
+        return -mpmath.inf
+    if not value.is_real:
+        raise ValueError("Sayısal yöntem yalnızca gerçel sınırlarla çalışır")
+    return mpmath.mpf(str(sp.N(value, mpmath.mp.dps)))
+
+
+def _sympy_number(value, digits=15):
+    value = complex(value)
+    real = sp.Float(value.real, digits)
+    return real if abs(value.imag) <= 1e-12 * max(1.0, abs(value.real)) else real + sp.I * sp.Float(value.imag, digits)
+
+
+def evaluate_numeric(problem, dps=20):
+    """Numeric counterpart of ``evaluate_problem`` for definite integrals and limits, using mpmath.
+
+    Integrals use ``mpmath.quad`` (tanh-sinh, also over infinite ranges) and
+    are accepted only when its error estimate is tiny. Limits use
+    ``mpmath.limit``, which extrapolates ``f`` sampled on a sequence towards
+    the point, and are accepted only when two sampling schedules agree, so a
+    divergent or oscillating limit is an error rather than a wrong number.
+    The result is a 15-digit ``sp.Float`` (or a complex number); anything
+    else is a ``ValueError``.
+    """
+    if not has_numeric_path(problem):
+        raise ValueError("Bu işlem için sayısal yöntem yok")
+    try:
+        return _evaluate_numeric(problem, dps)
+    except (ArithmeticError, TypeError) as e:  # Örnek noktada tanımsız, taşma ya da karmaşık sınır
+        raise ValueError(f"Sayısal yöntem uygulanamadı: {type(e).__name__}") from e
+
+
+def _evaluate_numeric(problem, dps):
+    import mpmath
+
+    operation, expr, var, bounds = problem
+    with mpmath.workdps(dps):
+        f = sp.lambdify(var, expr, 'mpmath')
+        tolerance = mpmath.mpf(10) ** (10 - dps)
+        if operation == 'integrate':
+            value, error = mpmath.quad(f, [_mp_value(bounds[0], mpmath), _mp_value(bounds[1], mpmath)], error=True)
+            if not mpmath.isfinite(value) or error > tolerance * max(1, abs(value)):
+                raise ValueError("Sayısal integral yakınsamadı")
+            return _sympy_number(value)
+
+        point, direction = bounds
+        point = _mp_value(point, mpmath)
+        sides = [1] if mpmath.isinf(point) else [1, -1] if direction == '+-' else [-1] if direction == '-' else [1]
+        values = []
+        for side in sides:
+            # Sonsuzda dizi n = 1, 2, 3...; bir noktada x = nokta ± 1/n alınır
+            g = (lambda n: f(-n)) if point == -mpmath.inf else f
+            at = mpmath.inf if mpmath.isinf(point) else point
+            first, second = (mpmath.limit(g, at, direction=side, exp=exp) for exp in (False, True))
+            if not (mpmath.isfinite(first) and abs(first - second) <= tolerance * 1e3 * max(1, abs(first))):
+                raise ValueError("Sayısal limit yakınsamadı")
+            values.append(first)
+        if abs(values[0] - values[-1]) > tolerance * 1e3 * max(1, abs(values[0])):
+            raise ValueError("Sağ ve sol limitler farklı")
+        return _sympy_number(mpmath.chop(values[0], tolerance))
+
+
+def format_result_latex(result, method='exact'):
+    # Sonucu LaTeX formatına dönüştür; sayısal yaklaşımlar ≈ ile gösterilir
+    result_latex = sp.latex(result)
+    if method == 'numeric':
+        result_latex = '\\approx ' + result_latex
+
+    # Sonucu daha doğal görünmesi için biçimlendir
+    result_latex = result_latex.replace('**', '^')  # x**2'yi x^2'ye dönüştür
+    result_latex = result_latex.replace('*', '')    # Çarpma işaretlerini kaldır
+    result_latex = result_latex.replace('ln', '\\log')  # ln'i log'a geri dönüştür
+    return result_latex
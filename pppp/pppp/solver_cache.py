@@ -0,0 +1,135 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ocr_cache import CACHE_DIR
+
+
+def problem_key(problem):
+    """Canonical key of a solver.Problem: ``sp.srepr`` of every field, hashed.
+
+    SymPy already sorts the arguments of ``Add``/``Mul``, so ``2*x + x**2`` and
+    ``x**2 + 2*x`` give the same ``srepr`` and therefore the same key.
+    """
+    import sympy as sp
+
+    operation, expr, var, bounds = problem
+    parts = [operation, sp.srepr(sp.sympify(expr)), sp.srepr(var)]
+    if bounds is not None:
+        parts.extend(b if isinstance(b, str) or b is None else sp.srepr(sp.sympify(b)) for b in bounds)
+    return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+class SolverCache:
+    """Memoises SymPy results per Problem: an in-memory LRU backed by SQLite.
+
+    ``get`` answers from the ``OrderedDict`` first (no SymPy work at all) and
+    falls back to the SQLite file, where results are stored as ``sp.srepr``
+    text so they survive restarts. The ``max_entries`` most recently used rows
+    are loaded into memory on the first lookup, so SymPy is not needed at
+    start-up. Rows unused for ``max_age`` seconds or beyond ``max_rows`` are
+    deleted, least recently used first.
+    """
+
+    def __init__(self, path=None, max_entries=512, max_rows=20000, max_age=90 * 24 * 3600):
+        self.path = path or os.path.join(CACHE_DIR, "solver_cache.sqlite3")
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._loaded = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+        self._db.commit()
+        self._evict()
+
+    def _load(self):
+        import sympy as sp
+
+        self._loaded = True
+        rows = self._db.execute("SELECT key, result FROM results ORDER BY last_used DESC LIMIT ?",
+                                (self.max_entries,)).fetchall()
+        for key, text in reversed(rows):
+            try:
+                self._memory[key] = sp.sympify(text)
+            except Exception:
+                continue  # Eski/bozuk kayıt, diskten yeniden okunmaz
+
+    def get(self, key):
+        import sympy as sp
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            result = sp.sympify(row[0])
+            self._remember(key, result)
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return result
+
+    def put(self, key, result):
+        import sympy as sp
+
+        text = sp.srepr(result)
+        now = time.time()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._remember(key, result)
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, text, now, now))
+            self._db.commit()
+            self._evict()
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        self._db.execute("DELETE FROM results WHERE last_used < ?", (time.time() - self.max_age,))
+        self._db.execute("""
+            DELETE FROM results WHERE key IN (
+                SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_rows,))
+        self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'memory_entries': len(self._memory), 'rows': rows}
+
+    def stats_text(self):
+        return f"Sonuç önbelleği: {self.hits + self.disk_hits} isabet / {self.misses} ıskalama"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
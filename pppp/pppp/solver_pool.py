@@ -0,0 +1,291 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+from multiprocessing.connection import wait
+
+import profiling
+from profiling import profile_call
+from solver_cache import problem_key
+
+# exact: yalnızca SymPy; numeric: önce mpmath, olmazsa SymPy; race: ikisi aynı anda
+MODES = ('exact', 'numeric', 'race')
+
+
+# Alt süreçte çalışır: SymPy bir kez yüklenir, sonra işler sırayla değerlendirilir
+def _worker_main(conn):
+    from solver import evaluate_numeric, evaluate_problem
+    conn.send('ready')
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        problem, method, profile = job
+        evaluate = evaluate_numeric if method == 'numeric' else evaluate_problem
+        try:
+            if profile:
+                # Ana süreçte profil açıksa SymPy'nin istatistikleri de geri gönderilir
+                result, stats = profile_call(evaluate, problem)
+                conn.send(('ok', result, stats))
+            else:
+                conn.send(('ok', evaluate(problem), None))
+        except Exception as e:
+            conn.send(('error', str(e), None))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class SolverPool:
+    """Evaluates solver.Problem jobs in worker processes with a wall-clock deadline.
+
+    ``solve`` blocks the calling thread (a QThreadPool worker or a batch thread)
+    until a result arrives or ``timeout`` seconds pass. On timeout the worker
+    process is killed and replaced by a fresh one, so a runaway ``sp.integrate``
+    or ``sp.limit`` never holds the app. The result is always a dict:
+    ``{'status': 'ok' | 'error' | 'timeout', 'result', 'error', 'seconds', 'cached', 'method'}``
+    where ``method`` is ``'exact'`` (SymPy) or ``'numeric'`` (mpmath, see
+    ``solver.evaluate_numeric``).
+
+    Definite integrals and limits also have a numeric path. In ``race`` mode
+    SymPy and mpmath run on two workers at once: an exact answer that arrives
+    within ``exact_budget`` seconds wins, after that whichever is ready first
+    is returned. The loser runs on in the background until ``timeout`` (a
+    late exact answer still goes into the cache) and is killed if it is still
+    busy then. An unevaluated ``Integral``/``Limit`` from SymPy does not count
+    as an answer. With no idle worker to spare, the numeric path runs only
+    after SymPy has failed. ``numeric`` mode tries mpmath first and SymPy
+    only if that fails; ``exact`` never uses mpmath.
+
+    With a ``SolverCache`` attached, a problem solved exactly before is
+    answered from the cache without touching a worker process; numeric
+    answers and unevaluated ``Integral``/``Limit`` results are not cached. One process is started up front; more, up to
+    ``workers``, only when jobs arrive while all are busy.
+    """
+
+    def __init__(self, workers=1, timeout=10.0, cache=None, mode='race', exact_budget=1.0):
+        if mode not in MODES:
+            raise ValueError(f"Bilinmeyen çözüm kipi: {mode} (seçenekler: {', '.join(MODES)})")
+        self.timeout = timeout
+        self.cache = cache
+        self.mode = mode
+        self.exact_budget = exact_budget
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = workers
+        self._started = 1
+        self._lock = threading.Lock()
+        self._closed = False
+        self._idle.put(_Worker(self._ctx))
+
+    def _try_acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._started < self._workers:
+                self._started += 1
+                return _Worker(self._ctx)
+        return None
+
+    def _acquire(self):
+        return self._try_acquire() or self._idle.get()
+
+    def solve(self, problem, timeout=None):
+        from solver import has_numeric_path, is_unevaluated  # Problem'i kuran çağıran SymPy'yi zaten yüklemiştir
+
+        start = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            key = problem_key(problem)
+            result = self.cache.get(key)
+            if result is not None:
+                return _outcome('ok', result, None, time.perf_counter() - start, 'exact', cached=True)
+
+        if self.mode == 'exact' or not has_numeric_path(problem):
+            outcome = self._solve(problem, 'exact', timeout)
+        elif self.mode == 'numeric':
+            outcome = self._solve(problem, 'numeric', timeout)
+            if outcome['status'] != 'ok':
+                outcome = self._solve(problem, 'exact', timeout)
+        else:
+            outcome = self._race(problem, timeout, key)
+        # Olduğu gibi geri verilen Integral/Limit çözüm değildir; önbelleğe yazılırsa hep o gösterilir
+        if key is not None and outcome['status'] == 'ok' and outcome['method'] == 'exact' \
+                and not is_unevaluated(outcome['result']):
+            self.cache.put(key, outcome['result'])
+        return outcome
+
+    def _solve(self, problem, method='exact', timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        try:
+            # Yeni başlatılan süreç SymPy'yi yüklerken geçen süre bütçeye sayılmaz
+            worker.wait_ready()
+            start = time.perf_counter()
+            worker.conn.send((problem, method, profiling.is_active()))
+            if not worker.conn.poll(timeout):
+                worker.kill()
+                worker = _Worker(self._ctx)
+                return _outcome('timeout', None, f"{timeout:g} sn sonra vazgeçildi", timeout, method)
+            status, value, stats = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            worker.kill()
+            worker = _Worker(self._ctx)
+            return _outcome('error', None, f"Çözücü süreci çöktü: {e}", 0.0, method)
+        finally:
+            self._idle.put(worker)
+
+        seconds = time.perf_counter() - start
+        profiling.add_stats(stats)
+        if status == 'ok':
+            return _outcome('ok', value, None, seconds, method)
+        return _outcome('error', None, value, seconds, method)
+
+    def _race(self, problem, timeout=None, key=None):
+        from solver import is_unevaluated
+
+        timeout = self.timeout if timeout is None else timeout
+        # Önce kesin çözümün süreci (gerekirse beklenir), sonra boşta varsa ikincisi; böylece
+        # aynı anda yarışan iş parçacıkları birbirinin süreçlerini bekleyip kilitlenmez
+        exact = self._acquire()
+        numeric = self._try_acquire()
+        running = {exact.conn: ('exact', exact)}
+        if numeric is not None:
+            running[numeric.conn] = ('numeric', numeric)
+        outcomes = {}
+        start = time.perf_counter()
+        try:
+            exact.wait_ready()
+            start = time.perf_counter()
+            exact.conn.send((problem, 'exact', profiling.is_active()))
+            if numeric is not None:
+                # Yeni süreç hazır olunca kuyruktaki işi alır; 'ready' aşağıda okunur
+                numeric.conn.send((problem, 'numeric', profiling.is_active()))
+
+            deadline = start + timeout
+            budget_end = start + self.exact_budget
+            while running and 'exact' not in outcomes:
+                numeric_ok = outcomes.get('numeric', {}).get('status') == 'ok'
+                now = time.perf_counter()
+                if now >= deadline or (numeric_ok and now >= budget_end):
+                    break
+                for conn in wait(list(running), (budget_end if numeric_ok else deadline) - now):
+                    method, worker = running[conn]
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError) as e:
+                        worker.kill()
+                        worker = _Worker(self._ctx)
+                        message = ('error', f"Çözücü süreci çöktü: {e}", None)
+                    if message == 'ready':
+                        worker.ready = True
+                        continue
+                    del running[conn]
+                    self._idle.put(worker)
+                    status, value, stats = message
+                    profiling.add_stats(stats)
+                    outcomes[method] = _outcome(status, value if status == 'ok' else None,
+                                                None if status == 'ok' else value,
+                                                time.perf_counter() - start, method)
+                    if method == 'exact' and (status != 'ok' or is_unevaluated(value)):
+                        # SymPy başaramadı ya da integrali/limiti olduğu gibi geri verdi
+                        outcomes['exact_error'] = outcomes.pop('exact')
+        except (EOFError, OSError) as e:
+            return _outcome('error', None, f"Çözücü süreci çöktü: {e}", 0.0, 'exact')
+        finally:
+            for method, worker in running.values():
+                self._finish_later(worker, method, key, start + timeout)
+
+        if 'exact' in outcomes:
+            return outcomes['exact']
+        if outcomes.get('numeric', {}).get('status') == 'ok':
+            return outcomes['numeric']
+        if numeric is None:
+            # Boşta süreç yoktu: SymPy bir sonuç veremedi, sayısal yol şimdi denenir
+            fallback = self._solve(problem, 'numeric')
+            if fallback['status'] == 'ok':
+                fallback['seconds'] = time.perf_counter() - start
+                return fallback
+        return outcomes.get('exact_error') or \
+            _outcome('timeout', None, f"{timeout:g} sn sonra vazgeçildi", timeout, 'exact')
+
+    def _finish_later(self, worker, method, key, deadline):
+        """Lets a worker that lost the race run on until ``deadline`` in the background.
+
+        It then goes back to the pool (and a late exact answer into the cache),
+        or is killed and replaced if it is still busy.
+        """
+        from solver import is_unevaluated
+
+        def drain():
+            try:
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or not worker.conn.poll(remaining):
+                        message = None
+                        break
+                    message = worker.conn.recv()
+                    if message != 'ready':
+                        break
+                    worker.ready = True
+            except (EOFError, OSError):
+                message = None
+            if message is None:
+                worker.kill()
+                if not self._closed:
+                    self._idle.put(_Worker(self._ctx))
+                return
+            if self._closed:
+                worker.stop()
+                return
+            self._idle.put(worker)
+            status, value, _ = message
+            if method == 'exact' and status == 'ok' and key is not None and not is_unevaluated(value):
+                self.cache.put(key, value)
+
+        threading.Thread(target=drain, name="SolverDrain", daemon=True).start()
+
+    def close(self):
+        # Meşgul süreçler daemon olduğu için ana süreçle birlikte kapanır; yarışı kaybedip
+        # arka planda çalışmaya devam edenler işleri bitince durdurulur
+        self._closed = True
+        for _ in range(self._started):
+            try:
+                self._idle.get(timeout=1).stop()
+            except queue.Empty:
+                break
+        if self.cache is not None:
+            self.cache.close()
+
+
+def _outcome(status, result, error, seconds, method, cached=False):
+    return {'status': status, 'result': result, 'error': error, 'seconds': seconds,
+            'cached': cached, 'method': method}
@@ -0,0 +1,49 @@
+import importlib
+import threading
+import time
+
+# Pencerenin açılmasını geciktirmemek için ilk kullanımda yüklenen ağır modüller
+HEAVY_MODULES = (
+    'sympy',
+    'latex_parser',
+    'solver',
+    'matplotlib.mathtext',
+    'requests',
+)
+
+# İşlem başlangıcına göre ölçülen başlangıç anları (sn); bench_startup.py okur
+STARTED = time.perf_counter()
+marks = {}
+preload_times = {}
+
+
+def mark(name):
+    """Records the first time ``name`` happens, in seconds since this module was imported."""
+    if name not in marks:
+        marks[name] = time.perf_counter() - STARTED
+
+
+def _preload(modules):
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Ön yükleme atlandı ({name}): {e}")
+            continue
+        preload_times[name] = time.perf_counter() - start
+    mark('preloaded')
+    print(f"Arka plan yüklemesi: {sum(preload_times.values()) * 1000:.0f} ms")
+
+
+def preload(modules=HEAVY_MODULES):
+    """Imports the heavy modules on a daemon thread; call it right after ``window.show()``.
+
+    The first capture then finds SymPy and matplotlib already loaded instead of
+    paying for the imports itself. A worker that needs a module before the
+    thread reaches it simply waits on Python's import lock.
+    """
+    mark('window_shown')
+    thread = threading.Thread(target=_preload, args=(modules,), daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from latex_normalize import clean_mathpix_latex, significant_tokens
+
+# corpus/latex_styled.txt'ten: tek satırlık dizi ortamıyla gelen Mathpix çıktısı
+ARRAY_INTEGRAL = r'\begin{array}{l}\int_{0}^{2}\left(3 x^{2}-2 x+1\right) dx'
+
+
+def test_clean_drops_the_same_noise_as_the_tokenizer():
+    cleaned = clean_mathpix_latex(ARRAY_INTEGRAL)
+    assert cleaned == r'\int_{0}^{2}\left(3 x^{2}-2 x+1\right) dx'
+    assert [t[1] for t in significant_tokens(cleaned)] == [t[1] for t in significant_tokens(ARRAY_INTEGRAL)]
+
+
+def test_clean_keeps_commands_apart():
+    assert clean_mathpix_latex(r'\pi\,x') == r'\pi x'
+
+
+def test_cleaned_array_output_renders():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    pytest.importorskip('matplotlib')
+    QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+    from latex_render import render_latex_image
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # QImage yazı tipleri için
+    image = render_latex_image(clean_mathpix_latex(ARRAY_INTEGRAL), cache=None)
+    assert image.width() > 0 and image.height() > 0
@@ -0,0 +1,28 @@
+import pytest
+
+from latex_normalize import clean_mathpix_latex
+from latex_parser import LatexParseError, parse_latex_expr
+
+
+def parse(latex):
+    return parse_latex_expr(clean_mathpix_latex(latex))
+
+
+def test_two_rows_are_not_merged_into_one_expression():
+    source = clean_mathpix_latex(r'\begin{array}{l}x+1 \\ x-1\end{array}')
+    with pytest.raises(LatexParseError) as info:
+        parse_latex_expr(source)
+    assert info.value.position == source.index('\\\\')
+
+
+def test_leading_and_trailing_row_breaks_are_layout_noise():
+    assert str(parse(r'\begin{array}{}x^{2}+1 \\ \end{array}')) == 'x**2 + 1'
+
+
+@pytest.mark.parametrize('latex, expected', [
+    (r'\int dx', 'Integral(1, x)'),
+    (r'\int_{0}^{2} d x', 'Integral(1, (x, 0, 2))'),
+    (r'\int \mathrm{d} x', 'Integral(1, x)'),
+])
+def test_bare_differential_integrates_one(latex, expected):
+    assert str(parse(latex)) == expected
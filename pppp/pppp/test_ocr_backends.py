@@ -0,0 +1,66 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from ocr_backends import RecordingBackend, ReplayBackend, read_cassette
+
+
+class FakeLive:
+    cache = None
+    last_upload = None
+
+    def recognize(self, buffer, frame=None, mime='image/png'):
+        return {'latex_styled': buffer.decode('ascii')}
+
+    def warm_up(self):
+        pass
+
+    def stats_text(self):
+        return ""
+
+    def close(self):
+        pass
+
+
+def record(path, *buffers):
+    backend = RecordingBackend(FakeLive(), path)
+    for buffer in buffers:
+        backend.recognize(buffer)
+    backend.close()
+
+
+def latex_of(path):
+    return [r['response']['latex_styled'] for r in read_cassette(path)]
+
+
+@pytest.mark.parametrize('name', ['cassette.jsonl.gz', 'cassette.jsonl'])
+def test_truncated_cassette_is_repaired_before_appending(tmp_path, name):
+    path = str(tmp_path / name)
+    record(path, b'x^2', b'y+1', b'\\sin z')
+    # Çökme: son kaydın ortasında kesilmiş dosya
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 15)
+    assert latex_of(path) == ['x^2', 'y+1']
+
+    record(path, b'\\sin z', b'w')
+    assert latex_of(path) == ['x^2', 'y+1', '\\sin z', 'w']
+    replay = ReplayBackend(path)
+    assert len(replay.responses) == 4
+
+
+def test_member_appended_after_truncated_member_is_not_fatal(tmp_path):
+    # Eski sürümlerin bıraktığı dosya: yarım bir gzip üyesinin arkasına yeni üye eklenmiş
+    path = str(tmp_path / 'cassette.jsonl.gz')
+    first = json.dumps({'digest': 'a', 'response': {'latex_styled': 'a'}}) + "\n"
+    second = json.dumps({'digest': 'b', 'response': {'latex_styled': 'b'}}) + "\n"
+    broken = gzip.compress((first + second).encode() * 50)
+    with open(path, 'wb') as f:
+        f.write(broken[:len(broken) // 2])
+        f.write(gzip.compress(second.encode()))
+    assert set(latex_of(path)) <= {'a', 'b'}
+
+    record(path, b'c')
+    assert latex_of(path)[-1] == 'c'
@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+import profiling
+from profiling import CaptureProfiler
+from regions import solve_regions
+
+
+def index(directory):
+    with open(os.path.join(directory, 'index.jsonl'), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_concurrent_captures_are_serialized(tmp_path):
+    profiler = CaptureProfiler(str(tmp_path))
+    barrier = threading.Barrier(3)
+    results, errors = [], []
+
+    def capture(n):
+        barrier.wait()
+        try:
+            results.append(profiler.run(lambda: {'latex_expr': f'x+{n}'}))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=capture, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(results) == 3 and len(index(str(tmp_path))) == 3
+
+
+def test_frame_tick_during_a_capture_is_skipped(tmp_path):
+    profiler = CaptureProfiler(str(tmp_path), frames=True)
+    tick = profiler.wrap_frames(lambda: 'tick')
+    ticks = []
+
+    def capture():
+        # Yakalama sürerken başka bir iş parçacığından gelen kamera tıkı
+        thread = threading.Thread(target=lambda: ticks.append(tick()))
+        thread.start()
+        thread.join()
+        return {'latex_expr': 'x'}
+
+    profiler.run(capture)
+    assert ticks == ['tick'] and profiler.skipped == 1
+    assert tick() == 'tick' and profiler.skipped == 1
+
+
+def test_regions_belong_to_the_parent_capture(tmp_path):
+    profiler = CaptureProfiler(str(tmp_path))
+    frame = np.zeros((20, 40, 3), np.uint8)
+    boxes = [(0, 0, 10, 10), (20, 0, 10, 10)]
+
+    def solve_one(crop):
+        assert profiling.is_active()
+        profiling.add_stats({('solver.py', 1, 'evaluate_problem'): (1, 1, 0.1, 0.1, {})})
+        return {'latex_expr': 'x'}
+
+    regions = profiler.run(solve_regions, frame, boxes, solve_one)
+    assert [r['box'] for r in regions] == boxes
+    [entry] = index(str(tmp_path))
+    assert entry['solver_processes'] == 2 and entry['file'].endswith('2_regions.prof')
@@ -0,0 +1,19 @@
+from solver import is_unevaluated, parse_problem
+from solver_cache import SolverCache, problem_key
+from solver_pool import SolverPool
+
+
+def test_exact_mode_does_not_cache_unevaluated_integrals(tmp_path):
+    cache = SolverCache(str(tmp_path / 'solver_cache.sqlite3'))
+    pool = SolverPool(timeout=60, cache=cache, mode='exact')
+    try:
+        problem = parse_problem(r'\int_{0}^{1} x^{x} dx')
+        outcome = pool.solve(problem)
+        assert outcome['status'] == 'ok' and is_unevaluated(outcome['result'])
+        assert cache.get(problem_key(problem)) is None
+
+        solved = parse_problem(r'\int_{0}^{1} x^{2} dx')
+        assert pool.solve(solved)['status'] == 'ok'
+        assert cache.get(problem_key(solved)) is not None
+    finally:
+        pool.close()
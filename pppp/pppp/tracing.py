@@ -0,0 +1,144 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+# Arayüzde ve dökümde gösterilen yüzdelikler
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Span:
+    """Context manager returned by ``Tracer.span``; ``seconds``/``ms`` are set on exit."""
+
+    __slots__ = ('tracer', 'name', 'started', 'seconds')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.started = 0.0
+        self.seconds = 0.0
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.started
+        self.tracer.record(self.name, self.seconds)
+        return False
+
+
+class Tracer:
+    """Timed spans per pipeline stage with rolling p50/p95/p99.
+
+    ``with tracer.span('ocr'): ...`` (or ``record(name, seconds)``) appends
+    the duration to that stage's window of the last ``window`` samples;
+    percentiles are computed from the window when asked for, so recording is
+    one ``perf_counter`` pair and a deque append. Totals (count and sum) are
+    kept since start-up for the Prometheus summary. Safe to use from the
+    worker, region and camera threads at once.
+    """
+
+    def __init__(self, window=1024, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        return Span(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def snapshot(self):
+        """``{stage: {'count', 'sum', 'p50', 'p95', 'p99'}}``, durations in seconds."""
+        with self._lock:
+            items = [(name, sorted(samples), list(self._totals[name]))
+                     for name, samples in self._samples.items()]
+        stats = {}
+        for name, samples, (count, total) in items:
+            entry = {'count': count, 'sum': total}
+            for q in QUANTILES:
+                entry[f'p{round(q * 100)}'] = _percentile(samples, q)
+            stats[name] = entry
+        return stats
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, metric='mathocr_stage_seconds'):
+        lines = [f"# HELP {metric} Duration of MathOCR pipeline stages and camera ticks.",
+                 f"# TYPE {metric} summary"]
+        for name, entry in sorted(self.snapshot().items()):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q:g}"}} {entry[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {entry["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {entry["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Writes the metrics to ``path``: Prometheus text for ``.prom``/``.txt``, JSON otherwise.
+
+        The file is replaced atomically, so a textfile collector never reads
+        half of it.
+        """
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temporary, path)
+
+    def status_text(self, total='pipeline'):
+        """One line for the status bar: end-to-end p50/p95/p99 and the slowest stage by p95."""
+        stats = self.snapshot()
+        if total not in stats:
+            return ""
+        entry = stats[total]
+        text = "İşlem p50/p95/p99: " + "/".join(f"{entry[f'p{round(q * 100)}'] * 1000:.0f}" for q in QUANTILES) + " ms"
+        stages = [(s['p95'], name) for name, s in stats.items() if name != total and not name.startswith('camera.')]
+        if stages:
+            p95, name = max(stages)
+            text += f", en yavaş: {name} (p95 {p95 * 1000:.0f} ms)"
+        return text
+
+    def table_text(self):
+        """All stages, one per line; used as the status bar tooltip."""
+        return "\n".join(
+            f"{name}: n={s['count']}, " + "/".join(f"{s[f'p{round(q * 100)}'] * 1000:.1f}" for q in QUANTILES) + " ms"
+            for name, s in sorted(self.snapshot().items()))
+
+
+def _percentile(samples, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples), max(1, math.ceil(q * len(samples)))) - 1]
+
+
+# Uygulama genelinde tek izleyici; MATHOCR_TRACE=0 kaydı kapatır
+tracer = Tracer(window=int(os.getenv("MATHOCR_TRACE_WINDOW", "1024")),
+                enabled=os.getenv("MATHOCR_TRACE", "1") != "0")
+span = tracer.span
@@ -0,0 +1,63 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+# Qt 5.15 QImage ölçekleme/dönüştürmede globalInstance() havuzunu kullanıyor ve
+# GIL'i tutarak bekliyor; işçiler o havuzu doldurursa arayüz kilitleniyor.
+_pool = QThreadPool()
+
+
+# Arka plan işçisinin arayüze geri döndüğü sinyaller
+class WorkerSignals(QObject):
+    progress = pyqtSignal(str)
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class PipelineWorker(QRunnable):
+    """Runs ``fn(*args, progress=..., **kwargs)`` on a QThreadPool thread.
+
+    ``progress`` is a callable taking a status message; every call is delivered
+    to the GUI thread through ``signals.progress``. The return value of ``fn``
+    arrives through ``signals.result``, an exception through ``signals.error``.
+    ``fn`` must not touch widgets: everything it returns is handed back to the
+    GUI thread, which does the ``QPixmap``/widget work.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.fn(*self.args, progress=self.signals.progress.emit, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+def start_worker(owner, fn, *args, on_result=None, on_error=None, on_progress=None, **kwargs):
+    """Creates a PipelineWorker, wires its signals and starts it on the pipeline pool.
+
+    The worker is kept alive on ``owner.active_workers`` (a set) until it finishes
+    so the Python side of the signals object is not garbage collected mid-flight.
+    """
+    worker = PipelineWorker(fn, *args, **kwargs)
+    if on_progress is not None:
+        worker.signals.progress.connect(on_progress)
+    if on_result is not None:
+        worker.signals.result.connect(on_result)
+    if on_error is not None:
+        worker.signals.error.connect(on_error)
+
+    owner.active_workers.add(worker)
+    worker.signals.finished.connect(lambda: owner.active_workers.discard(worker))
+
+    _pool.start(worker)
+    return worker